@@ -4,7 +4,12 @@ import os
 import sys
 import threading
 import json 
-from pdf_processor import process_shipment, process_single_pdf_document 
+import sqlite3
+from pdf_processor import process_shipment, process_single_pdf_document, __version__
+from progress import ProgressReporter, TextSink, INFO
+from run_history import RunHistory, STAGES, STAGE_LABELS, TREND_GROUPS
+from scan_cache import ScanCache
+from sku_finder import LOCALES_ERROR
 
 # --- Constants ---
 BG_COLOR = "#f9f9f9"
@@ -12,6 +17,8 @@ LOG_BG_COLOR = "#f3f4f6"
 LOG_TEXT_COLOR = "#111827"
 FOOTER_TEXT_COLOR = "#9ca3af"
 CONFIG_FILE = "config.json" 
+# Worker processes for the page scan; only PDFs with thousands of pages use them
+SCAN_JOBS = os.cpu_count() or 1
 
 class FBASplitterApp(tk.Frame):
     def __init__(self, master=None):
@@ -32,10 +39,14 @@ class FBASplitterApp(tk.Frame):
         self.selected_paths_or_folder = None 
         self.selection_type = "None" 
         self.display_path = tk.StringVar() 
+        self.bookmarked_output = tk.BooleanVar(value=self.config.get('bookmarked_output', False))
+        self.bisect_scan = tk.BooleanVar(value=self.config.get('bisect_scan', False))
 
         self._configure_styles()
         self._create_widgets()
         self._update_stats_display() 
+        if LOCALES_ERROR:
+            self.update_status(f"Warn: {LOCALES_ERROR}\n")
 
     def _configure_styles(self):
         """Configure ttk styles."""
@@ -125,6 +136,16 @@ class FBASplitterApp(tk.Frame):
         self.path_entry = ttk.Entry(path_frame, textvariable=self.display_path, state='readonly', width=60) 
         self.path_entry.grid(row=0, column=1, sticky="ew")
 
+        # Output format: one PDF per SKU, or one PDF per shipment with a bookmark per SKU
+        self.bookmarked_check = ttk.Checkbutton(input_section, text="One bookmarked PDF per shipment",
+                                                variable=self.bookmarked_output, command=self._save_output_format)
+        self.bookmarked_check.grid(row=2, column=0, columnspan=3, sticky="w", pady=(5, 0))
+
+        # Scan strategy: read a few pages per SKU when the labels are grouped by SKU
+        self.bisect_check = ttk.Checkbutton(input_section, text="Fast scan (labels grouped by SKU)",
+                                            variable=self.bisect_scan, command=self._save_output_format)
+        self.bisect_check.grid(row=3, column=0, columnspan=3, sticky="w", pady=(2, 0))
+
         # --- Section 2: Output --- (Keyword section removed)
         output_section = ttk.Frame(content_frame, style='TFrame')
         output_section.grid(row=1, column=0, sticky="nsew", pady=(10, 0)) 
@@ -142,6 +163,10 @@ class FBASplitterApp(tk.Frame):
                                           command=self.copy_log_to_clipboard, style='Copy.TButton', width=8)
         self.copy_log_button.grid(row=0, column=2, sticky="e", padx=(5,0)) 
 
+        self.history_button = ttk.Button(status_header_frame, text="History", 
+                                         command=self.show_history, style='Copy.TButton', width=8)
+        self.history_button.grid(row=0, column=3, sticky="e", padx=(5,0)) 
+
         # Status Text Area
         self.status_text = scrolledtext.ScrolledText(output_section, wrap=tk.WORD, height=10, 
                                                      state=tk.DISABLED, relief=tk.SUNKEN, borderwidth=1,
@@ -158,6 +183,12 @@ class FBASplitterApp(tk.Frame):
         self.stats_label = ttk.Label(footer_frame, text="", style='Stats.TLabel')
         self.stats_label.grid(row=0, column=1, sticky="e", padx=(10, 0)) 
 
+    def _save_output_format(self):
+        """Remembers the output format and scan choices."""
+        self.config['bookmarked_output'] = self.bookmarked_output.get()
+        self.config['bisect_scan'] = self.bisect_scan.get()
+        self._save_config()
+
     def _update_stats_display(self):
         """Updates the statistics label in the footer."""
         usage = self.config.get('usage_count', 0)
@@ -223,6 +254,62 @@ class FBASplitterApp(tk.Frame):
         except tk.TclError as e:
              self.update_status(f"Error copying log: {e}\n")
 
+    def show_history(self):
+        """Opens a window with the throughput trend from the run history."""
+        window = tk.Toplevel(self.master)
+        window.title("Run History")
+        window.geometry("760x360")
+        window.configure(bg=BG_COLOR)
+
+        controls = ttk.Frame(window, padding="10 10 10 0", style='TFrame')
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Group by:").pack(side=tk.LEFT)
+        group_by = tk.StringVar(value="day")
+        group_box = ttk.Combobox(controls, textvariable=group_by, values=list(TREND_GROUPS), state='readonly', width=10)
+        group_box.pack(side=tk.LEFT, padx=(5, 0))
+
+        columns = ("group", "documents", "pages", "pages_per_second", "mb") + STAGES
+        tree = ttk.Treeview(window, columns=columns, show='headings', height=12)
+        headings = {"group": "Group", "documents": "Docs", "pages": "Pages", "pages_per_second": "Pages/s", "mb": "MB"}
+        headings.update((stage, f"{STAGE_LABELS[stage]} ms/p") for stage in STAGES)
+        for column in columns:
+            tree.heading(column, text=headings[column])
+            tree.column(column, width=130 if column == "group" else 62, anchor="w" if column == "group" else "e")
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        def refresh(event=None):
+            tree.delete(*tree.get_children())
+            try:
+                with RunHistory() as history:
+                    trend = history.throughput_trend(group_by.get())
+            except sqlite3.Error as e:
+                messagebox.showerror("Run History", f"Could not read the run history: {e}", parent=window)
+                return
+            for entry in trend:
+                tree.insert("", tk.END, values=(entry["group"], entry["documents"], entry["pages"],
+                                                f"{entry['pages_per_second']:.0f}", f"{entry['bytes_written'] / 1e6:.2f}",
+                                                *(f"{entry[f'{stage}_ms_per_page']:.2f}" for stage in STAGES)))
+
+        group_box.bind("<<ComboboxSelected>>", refresh)
+        refresh()
+
+    def _start_run_history(self, source):
+        """Opens the run history and starts recording a run. Returns (history, run), both None if unavailable."""
+        try:
+            history = RunHistory()
+            return history, history.start_run(source, __version__)
+        except sqlite3.Error as e:
+            self.update_status(f"Warn: Run history unavailable: {e}\n")
+            return None, None
+
+    def _open_scan_cache(self):
+        """Opens the cache of page scans. Returns a ScanCache, or None if unavailable."""
+        try:
+            return ScanCache()
+        except sqlite3.Error as e:
+            self.update_status(f"Warn: Scan cache unavailable: {e}\n")
+            return None
+
     def start_processing(self):
         """Validates selection and starts the PDF processing in a background thread."""
         if not self.selected_paths_or_folder:
@@ -241,21 +328,31 @@ class FBASplitterApp(tk.Frame):
 
         # Pass None for keyword
         thread = threading.Thread(target=self.run_processing_thread, 
-                                  args=(self.selected_paths_or_folder, self.selection_type, None)) 
+                                  args=(self.selected_paths_or_folder, self.selection_type, None,
+                                        self.bookmarked_output.get(),
+                                        "bisect" if self.bisect_scan.get() else "full")) 
         thread.daemon = True 
         thread.start()
 
-    def run_processing_thread(self, paths_or_folder, selection_type, keyword):
+    def run_processing_thread(self, paths_or_folder, selection_type, keyword, bookmarked=False, scan_strategy="full"):
         """Worker thread function for processing."""
         success_count = 0
         fail_count = 0
         total_files = 0
         total_pages_split_this_run = 0
+        # The history and scan cache connections belong to this thread
+        source = paths_or_folder if selection_type == "Folder" else f"{len(paths_or_folder)} file(s)"
+        history, run = self._start_run_history(source)
+        scan_cache = self._open_scan_cache()
+        progress = ProgressReporter()
+        progress.subscribe(TextSink(self.update_status), INFO)
+        if run:
+            progress.subscribe(run, INFO)
 
         try: 
             if selection_type == "Folder":
                 success_count, fail_count, total_files, total_pages_split_this_run = process_shipment(
-                    paths_or_folder, True, keyword, self.update_status
+                    paths_or_folder, True, keyword, progress, bookmarked, SCAN_JOBS, scan_cache, scan_strategy
                 )
             elif selection_type == "Files":
                 files_to_process = paths_or_folder
@@ -263,7 +360,10 @@ class FBASplitterApp(tk.Frame):
                 self.update_status(f"Processing {total_files} selected file(s)...\n")
                 for i, pdf_path in enumerate(files_to_process):
                      self.update_status(f"--- Processing file {i+1}/{total_files}: {os.path.basename(pdf_path)} ---\n")
-                     success, pages_split = process_single_pdf_document(pdf_path, keyword, self.update_status)
+                     success, pages_split = process_single_pdf_document(pdf_path, keyword, progress,
+                                                                         bookmarked=bookmarked, jobs=SCAN_JOBS,
+                                                                         scan_cache=scan_cache,
+                                                                         scan_strategy=scan_strategy)
                      if success:
                          success_count += 1
                          total_pages_split_this_run += pages_split 
@@ -295,6 +395,16 @@ class FBASplitterApp(tk.Frame):
              import traceback
              self.update_status(traceback.format_exc() + "\n")
         finally:
+             if history:
+                 try:
+                     run.finish()
+                 except sqlite3.Error as e:
+                     run.error = e
+                 if run.error:
+                     self.update_status(f"Warn: Could not record run history: {run.error}\n")
+                 history.close()
+             if scan_cache:
+                 scan_cache.close()
              self.select_files_button.config(state=tk.NORMAL) 
              self.select_folder_button.config(state=tk.NORMAL)
 
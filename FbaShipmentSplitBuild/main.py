@@ -1,7 +1,11 @@
+import multiprocessing
 import tkinter as tk
 from gui import FBASplitterApp # Import the main app class from gui.py
 
 if __name__ == "__main__":
+    # The packaged app starts page-scan worker processes from its own executable
+    multiprocessing.freeze_support()
+
     # Create the main application window
     root = tk.Tk() 
     
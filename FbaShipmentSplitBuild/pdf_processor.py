@@ -2,77 +2,589 @@ import fitz  # PyMuPDF
 import os
 import re
 import glob
+import sys
+import time
+import sqlite3
+import argparse
 from collections import defaultdict
 from utils import sanitize_filename # Use absolute import
 import traceback # Import traceback for detailed error logging
-from sku_finder import find_sku_on_page # Import the extracted function
+from sku_finder import find_sku_on_page, SkuRegion # Import the extracted function
+
+# The manifest, output sinks and tool version are shared with the CSV tools in the parent directory
+SHARED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+from manifest import is_up_to_date, write_manifest, file_sha256
+from run_history import DocumentMetrics, RunHistory
+from scan_cache import ScanCache
+from progress import (as_reporter, ProgressReporter, TextSink, JsonLinesSink, DocumentStarted, DocumentFinished,
+                      PageScanned, SkuFound, FileWritten, Message, DEBUG, INFO, WARNING, LEVELS)
+from output_sinks import (DirectorySink, MemorySink, open_archive_sink, archive_extension, build_bookmarked_pdf,
+                          DEFAULT_SAVE_PROFILE)
+from pdf_splitter import __version__
+
+# Options recorded in the output folder manifest; a change forces PDFs to be split again
+MANIFEST_OPTIONS = {}
+
+# Parallel page scans give each worker process at least this many pages: starting a
+# worker and opening the PDF in it costs about as much as scanning that many pages
+SCAN_PAGES_PER_JOB = 1000
+
+# Page scan strategies: 'full' reads every page, 'bisect' (opt-in, standard mode only)
+# finds where each SKU's run of pages ends and reads a few pages per run
+SCAN_STRATEGIES = ("full", "bisect")
+# Pages read inside each run found by the bisect scan, to check it holds one SKU
+BISECT_SPOT_CHECKS = 3
+# The bisect scan gives up and reads every page once it has read this share of them
+BISECT_MAX_SHARE = 0.25
+
+# Interleaved scans learn which pages are carrier labels from the repeating pattern of
+# the first PERIOD_SAMPLE_PAGES pages (label page + up to MAX_PERIOD - 1 carrier pages),
+# then read only every CARRIER_SAMPLE_EVERY-th carrier page to check the pattern holds
+PERIOD_SAMPLE_PAGES = 12
+MAX_PERIOD = 4
+CARRIER_SAMPLE_EVERY = 16
+
+
+def _manifest_options(archive_format=None, compress=False, bookmarked=False, save_profile=DEFAULT_SAVE_PROFILE):
+    """Manifest options for the output format (folder or zip/tar archive, N files or one bookmarked PDF) and save profile."""
+    options = dict(MANIFEST_OPTIONS)
+    if archive_format is not None:
+        options.update(archive=archive_format, compress=compress)
+    if bookmarked:
+        options["bookmarked"] = True
+    if save_profile != DEFAULT_SAVE_PROFILE:
+        options["save_profile"] = save_profile
+    return options
 
 
 # Removed the old _find_sku_on_page function definition
 
 
-def _create_grouped_output_pdfs(doc, sku_output_pages, shipping_id, output_dir, status_callback):
+def _contiguous_page_runs(page_list):
+    """
+    Collapses a list of page indices into sorted (first, last) runs of consecutive pages.
+    E.g. [4, 0, 1, 2, 7, 8] -> [(0, 2), (4, 4), (7, 8)]
+    """
+    runs = []
+    for page_num in sorted(set(page_list)):
+        if runs and page_num == runs[-1][1] + 1:
+            runs[-1][1] = page_num
+        else:
+            runs.append([page_num, page_num])
+    return [(first, last) for first, last in runs]
+
+
+def _create_grouped_output_pdfs(doc, sku_output_pages, shipping_id, output_dir, progress, sink=None,
+                                metrics=None):
     """
     Creates the grouped output PDFs based on the final calculated page lists for each SKU.
-    Returns the total number of pages written to split PDFs.
+    The PDFs are handed to sink (default: one file per SKU in output_dir).
+    Write and save times of each PDF are added to metrics (a DocumentMetrics), if given.
+    Returns tuple: (total number of pages written to split PDFs, list of file names written)
     """
-    sku_counter = 0
+    if sink is None:
+        sink = DirectorySink(output_dir)
     total_split_pages = 0
-    status_callback(f"  Creating {len(sku_output_pages)} split PDF(s)...\n")
+    written_files = []
+    for filename, _, page_total in _iter_grouped_output_pdfs(doc, sku_output_pages, shipping_id, progress, sink,
+                                                             metrics):
+        total_split_pages += page_total
+        written_files.append(filename)
+    return total_split_pages, written_files
+
+def _output_filename_base(number, sku, shipping_id, box_count):
+    """File name (without .pdf) of the split PDF for an SKU: <number>_<sku>_<shipping_id>_<box_count>"""
+    filename_parts = [str(number), sku, shipping_id, str(box_count)]
+    return sanitize_filename("_".join(part for part in filename_parts if part))
+
+def _iter_grouped_output_pdfs(doc, sku_output_pages, shipping_id, progress, sink, metrics=None):
+    """
+    Writes the PDF of each SKU to sink, one SKU per step.
+    Yields tuple: (file name, SKU, pages written) for every PDF written
+    """
+    progress = as_reporter(progress)
+    metrics = metrics or DocumentMetrics()
+    sku_counter = 0
+    page_count = len(doc)
+    progress.info("Creating %d split PDF(s)...", len(sku_output_pages))
     
     for sku, page_list in sku_output_pages.items():
         if not page_list: 
-            status_callback(f"    Skipping SKU '{sku}' due to empty page list.\n")
+            progress.info("Skipping SKU '%s' due to empty page list.", sku, depth=2)
             continue
             
         sku_counter += 1
         number = sku_counter
         # Use the length of the final page list for the count in the filename
         box_count = len(page_list) 
-        total_split_pages += box_count
 
         # Construct filename
-        filename_parts = [str(number), sku, shipping_id, str(box_count)]
-        output_filename_base = "_".join(part for part in filename_parts if part) 
-        sanitized_filename_base = sanitize_filename(output_filename_base)
-        output_pdf_path = os.path.join(output_dir, f"{sanitized_filename_base}.pdf")
-
-        status_callback(f"    Creating: {sanitized_filename_base}.pdf ({box_count} pages: {min(page_list)+1} to {max(page_list)+1})\n")
+        sanitized_filename_base = _output_filename_base(number, sku, shipping_id, box_count)
 
         new_doc = None
         try:
+            write_start = time.perf_counter()
             new_doc = fitz.open() 
-            # Insert pages one by one from the calculated page list
-            for page_num in sorted(page_list): # Ensure pages are added in order
-                 # Check if page_num is valid for the original document
-                 if 0 <= page_num < len(doc):
-                     new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+            # Check the pages are valid for the original document
+            valid_pages = []
+            for page_num in sorted(page_list):
+                 if 0 <= page_num < page_count:
+                     valid_pages.append(page_num)
                  else:
-                     status_callback(f"    Warn: Invalid page number {page_num+1} requested for insertion into {sanitized_filename_base}.pdf. Skipping.\n")
+                     progress.warning("Invalid page number %d requested for insertion into %s.pdf. Skipping.",
+                                      page_num + 1, sanitized_filename_base, depth=2)
+            # Insert each run of consecutive pages with a single call (in order)
+            for first_page, last_page in _contiguous_page_runs(valid_pages):
+                 new_doc.insert_pdf(doc, from_page=first_page, to_page=last_page)
             
             if len(new_doc) > 0: # Only save if pages were actually inserted
-                new_doc.save(output_pdf_path)
+                save_start = time.perf_counter()
+                size = sink.write_pdf(f"{sanitized_filename_base}.pdf", new_doc, sku, len(new_doc))
+                metrics.add_output(f"{sanitized_filename_base}.pdf", sku, len(new_doc), size,
+                                   save_start - write_start, time.perf_counter() - save_start)
+                if progress.enabled(INFO):
+                    progress.emit(FileWritten(f"{sanitized_filename_base}.pdf", sku, box_count, size,
+                                              min(page_list) + 1, max(page_list) + 1))
             else:
-                status_callback(f"    Warn: No valid pages inserted for {sanitized_filename_base}.pdf. File not saved.\n")
-                total_split_pages -= box_count # Adjust count as file wasn't saved
+                progress.warning("No valid pages inserted for %s.pdf. File not saved.", sanitized_filename_base, depth=2)
+                continue
 
         except Exception as e:
-            status_callback(f"    Error creating/saving PDF {output_pdf_path}: {e}\n")
-            total_split_pages -= box_count # Adjust count as file wasn't saved properly
-            status_callback(traceback.format_exc() + "\n") # Log detailed error
+            progress.error("Could not create/save PDF %s.pdf: %s", sanitized_filename_base, e, depth=2)
+            progress.info(traceback.format_exc(), depth=0) # Log detailed error
+            continue
         finally:
             if new_doc:
                 new_doc.close() 
-                
-    return total_split_pages
 
-def process_single_pdf_document(pdf_path, keyword, status_callback):
+        # Count the pages listed for the SKU, as before (invalid page numbers included)
+        yield f"{sanitized_filename_base}.pdf", sku, box_count
+
+def _create_bookmarked_output_pdf(doc, sku_output_pages, shipping_id, progress, sink, metrics=None):
+    """
+    Creates a single PDF with a bookmark and page labels (e.g. 'SKU-3/12') per SKU,
+    in the order the SKUs were found, instead of one PDF per SKU.
+    Returns tuple: (total number of pages written, list of file names written)
+    """
+    progress = as_reporter(progress)
+    metrics = metrics or DocumentMetrics()
+    page_count = len(doc)
+    output_filename = f"{sanitize_filename(f'{shipping_id}_bookmarked')}.pdf"
+    sections = []
+    for sku, page_list in sku_output_pages.items():
+        valid_pages = [page_num for page_num in page_list if 0 <= page_num < page_count]
+        if len(valid_pages) != len(page_list):
+            progress.warning("%d invalid page number(s) for SKU '%s'. Skipping them.",
+                             len(page_list) - len(valid_pages), sku, depth=2)
+        if valid_pages:
+            sections.append((sku, _contiguous_page_runs(valid_pages)))
+
+    progress.info("Creating %s with %d SKU bookmark(s)...", output_filename, len(sections))
+    bookmarked_doc = None
+    try:
+        write_start = time.perf_counter()
+        bookmarked_doc = build_bookmarked_pdf(doc, sections)
+        total_pages = len(bookmarked_doc)
+        save_start = time.perf_counter()
+        size = sink.write_pdf(output_filename, bookmarked_doc, None, total_pages)
+        metrics.add_output(output_filename, None, total_pages, size,
+                           save_start - write_start, time.perf_counter() - save_start)
+        if progress.enabled(INFO):
+            progress.emit(FileWritten(output_filename, None, total_pages, size, 1, total_pages))
+    except Exception as e:
+        progress.error("Could not create/save PDF %s: %s", output_filename, e, depth=2)
+        progress.info(traceback.format_exc(), depth=0)
+        return 0, []
+    finally:
+        if bookmarked_doc is not None and bookmarked_doc is not doc:
+            bookmarked_doc.close()
+    return total_pages, [output_filename]
+
+def _detect_interleaved_mode(doc, progress):
+    """
+    Detects the page layout from page 2: without an SKU there, every label page is
+    followed by a carrier label (interleaved mode).
+    Returns True for interleaved mode, False for standard mode.
+    """
+    progress = as_reporter(progress)
+    total_pages = len(doc)
+    is_interleaved_mode = False
+    if total_pages >= 2:
+        try:
+            page_one = doc.load_page(1) # Page index 1 is the second page
+            # Use the imported function (keyword argument is no longer used by the new function)
+            sku_on_page_two = find_sku_on_page(page_one, progress)
+            if sku_on_page_two is None:
+                is_interleaved_mode = True
+                # Clarify mode and implication
+                progress.info("Mode Detected: Interleaved (No SKU on page 2). Output PDFs will include pages following SKU pages.") 
+            else:
+                progress.info("Mode Detected: Standard (SKU found on page 2). Output PDFs will include only pages with SKUs.")
+        except Exception as e:
+             progress.warning("Could not check page 2 for mode detection: %s. Assuming Standard Mode.", e)
+    else:
+         progress.warning("PDF has only one page. Assuming Standard Mode.")
+    return is_interleaved_mode
+
+def _scan_sku_pages(doc, progress, jobs=1, pdf_path=None, strategy="full", interleaved=False):
+    """
+    Finds the SKU on every page, reporting a PageScanned event per page (DEBUG)
+    and a SkuFound event for each new SKU. With jobs > 1 and pdf_path (the file doc
+    was opened from), large documents are scanned by up to jobs worker processes;
+    the result and the events are the same as those of a serial scan. With strategy
+    'bisect' (opt-in), _bisect_scan is tried first on standard documents, and the
+    carrier pages of interleaved documents are mostly skipped (see _periodic_scan).
+    Returns tuple: (dict of SKU -> list of page indices where found, list of 1-based page numbers without SKU)
+    """
+    progress = as_reporter(progress)
+    total_pages = len(doc)
+    if strategy == "bisect" and not interleaved:
+        page_skus = _bisect_scan(doc, progress)
+        if page_skus is not None:
+            return _collect_sku_pages(page_skus, progress)
+    # Interleaved pages alternate with carrier labels: no runs to bisect, but carrier pages to skip
+    skip_carriers = strategy == "bisect" and interleaved
+    chunks = _scan_chunks(total_pages, jobs) if pdf_path else []
+    if len(chunks) > 1:
+        progress.info("Scanning %d pages in %d worker processes...", total_pages, min(jobs, len(chunks)))
+        page_skus = _scan_parallel(pdf_path, chunks, jobs, progress, skip_carriers)
+    else:
+        progress.info("Scanning %d pages...", total_pages)
+        page_skus = _scan_pages(doc, 0, total_pages, progress, skip_carriers)
+    return _collect_sku_pages(page_skus, progress)
+
+def _collect_sku_pages(page_skus, progress):
+    """
+    Groups (page index, SKU or None) tuples in page order by SKU, reporting the
+    PageScanned and SkuFound events.
+    Returns tuple: (dict of SKU -> list of page indices where found, list of 1-based page numbers without SKU)
+    """
+    skipped_page_numbers = []
+    sku_pages = defaultdict(list) # Stores SKU -> [list of page indices where found]
+    # Decided once, so the loop builds no events nobody listens to
+    report_pages = progress.enabled(DEBUG)
+    report_skus = progress.enabled(INFO)
+    for page_num, sku in page_skus:
+        if sku:
+            if report_skus and sku not in sku_pages:
+                progress.emit(SkuFound(sku, page_num + 1))
+            sku_pages[sku].append(page_num)
+        else:
+            skipped_page_numbers.append(page_num + 1) 
+        if report_pages:
+            progress.emit(PageScanned(page_num + 1, sku))
+    return sku_pages, skipped_page_numbers
+
+class _ScanAbandoned(Exception):
+    """The bisect scan cannot tell the SKUs of the pages apart; the full scan takes over."""
+
+def _bisect_scan(doc, progress):
+    """
+    Scans a document whose labels are grouped by SKU, reading O(k log n) of its pages
+    for k SKUs: from the start of each run of pages with the same SKU (or without one),
+    steps of doubling size find a page beyond the run, and a binary search between the
+    two finds where it ends. BISECT_SPOT_CHECKS pages inside every run are then read
+    to check it. Pages of a run are assumed to share the SKU read at its ends.
+    Returns list of (page index, SKU or None) in page order, or None if the pages are
+    not grouped by SKU (an SKU in two runs, a spot check that differs) or the scan
+    would read more than BISECT_MAX_SHARE of the pages.
+    """
+    total_pages = len(doc)
+    max_reads = max(1, int(total_pages * BISECT_MAX_SHARE))
+    region = SkuRegion()
+    read = {}
+
+    def sku_at(page_num):
+        if page_num not in read:
+            if len(read) >= max_reads:
+                raise _ScanAbandoned("too many pages read")
+            read[page_num] = find_sku_on_page(doc.load_page(page_num), progress, region)
+        return read[page_num]
+
+    runs = [] # (first page, end page (exclusive), SKU or None)
+    run_skus = set()
+    try:
+        start = 0
+        while start < total_pages:
+            sku = sku_at(start)
+            # Galloping: last page known to have sku, first page beyond it known not to (or the end)
+            last, step = start, 1
+            while last + step < total_pages and sku_at(last + step) == sku:
+                last += step
+                step *= 2
+            end = min(last + step, total_pages)
+            while end - last > 1:
+                middle = (last + end) // 2
+                if sku_at(middle) == sku:
+                    last = middle
+                else:
+                    end = middle
+            if sku in run_skus:
+                raise _ScanAbandoned(f"SKU '{sku}' appears in more than one run of pages")
+            if sku is not None:
+                run_skus.add(sku)
+            runs.append((start, end, sku))
+            start = end
+
+        for first, end, sku in runs:
+            for i in range(1, BISECT_SPOT_CHECKS + 1):
+                page_num = first + (end - first) * i // (BISECT_SPOT_CHECKS + 1)
+                if sku_at(page_num) != sku:
+                    raise _ScanAbandoned(f"page {page_num + 1} does not match its run")
+    except _ScanAbandoned as e:
+        progress.info("Bisect scan stopped after reading %d pages (%s); reading every page.", len(read), e)
+        return None
+
+    progress.info("Bisect scan read %d of %d pages (%d runs).", len(read), total_pages, len(runs))
+    return [(page_num, sku) for first, end, sku in runs for page_num in range(first, end)]
+
+def _scan_pages(doc, start, stop, progress, skip_carriers=False):
+    """
+    Yields (page index, SKU or None) for pages start..stop-1 of doc. With skip_carriers,
+    the carrier pages of an interleaved document are mostly skipped (see _periodic_scan).
+    """
+    region = SkuRegion()
+
+    def read(page_num):
+        # Reads only the SKU block once its position is known
+        return find_sku_on_page(doc.load_page(page_num), progress, region)
+
+    if skip_carriers:
+        yield from enumerate(_periodic_scan(read, start, stop, progress), start)
+        return
+    for page_num in range(start, stop):
+        yield page_num, read(page_num)
+
+def _page_period(has_sku):
+    """
+    The shortest period (2 to MAX_PERIOD) with which the pattern of pages with and
+    without SKU repeats, seen at least twice; None if there is none.
+    """
+    for period in range(2, MAX_PERIOD + 1):
+        if len(has_sku) < 2 * period or all(has_sku[:period]) or not any(has_sku[:period]):
+            continue
+        if all(has_sku[i] == has_sku[i % period] for i in range(len(has_sku))):
+            return period
+    return None
+
+def _periodic_scan(read, start, stop, progress):
+    """
+    Scans pages start..stop-1 of an interleaved document, where every label page is
+    followed by carrier pages without SKU. The period is learned from the first pages;
+    after that every label page is read but only every CARRIER_SAMPLE_EVERY-th carrier
+    page. The skipped carrier pages between two label pages of different SKUs, and
+    those after the last label page, are read as well, so an extra label at the end of
+    a run is not missed. A label page without SKU or a carrier page with one breaks the
+    pattern: then all skipped pages are read too. Carrier pages skipped inside a run
+    are assumed to have no SKU, so the result is not proven equal to reading every page.
+    Returns list: SKU or None of every page
+    """
+    skus = [read(page_num) for page_num in range(start, min(stop, start + PERIOD_SAMPLE_PAGES))]
+    period = _page_period([sku is not None for sku in skus])
+    if period is None:
+        return skus + [read(page_num) for page_num in range(start + len(skus), stop)]
+    carrier_offsets = {offset for offset in range(period) if skus[offset] is None}
+
+    def read_all(page_num):
+        progress.info("Page pattern changes at page %d; reading every page.", page_num + 1, depth=2)
+        for unread_num in unread:
+            skus[unread_num - start] = read(unread_num)
+        return skus + [read(later_num) for later_num in range(start + len(skus), stop)]
+
+    def read_since_label():
+        """Reads the carrier pages skipped since the last label page. Returns False if one has an SKU."""
+        for unread_num in unread_since_label:
+            unread.remove(unread_num)
+            sku = read(unread_num)
+            skus[unread_num - start] = sku
+            if sku is not None:
+                return False
+        unread_since_label.clear()
+        return True
+
+    unread = []
+    unread_since_label = []
+    last_label_sku = next((sku for sku in reversed(skus) if sku is not None), None)
+    carriers = 0
+    for page_num in range(start + len(skus), stop):
+        is_carrier = (page_num - start) % period in carrier_offsets
+        if is_carrier:
+            carriers += 1
+            if carriers % CARRIER_SAMPLE_EVERY:
+                unread.append(page_num)
+                unread_since_label.append(page_num)
+                skus.append(None)
+                continue
+        sku = read(page_num)
+        skus.append(sku)
+        if (sku is None) != is_carrier:
+            return read_all(page_num)
+        if not is_carrier:
+            if sku != last_label_sku and not read_since_label():
+                return read_all(page_num)
+            unread_since_label.clear()
+            last_label_sku = sku
+    if not read_since_label():
+        return read_all(stop - 1)
+    if unread:
+        progress.info("Skipped %d carrier pages (labels repeat every %d pages).", len(unread), period, depth=2)
+    return skus
+
+def _scan_chunks(total_pages, jobs):
+    """
+    Splits the pages into contiguous (start, stop) ranges of at least SCAN_PAGES_PER_JOB
+    pages, a few per worker so that a slow range does not hold up the others.
+    Returns a single range when the document is too small to be worth a worker pool.
+    """
+    jobs = min(jobs or 1, total_pages // SCAN_PAGES_PER_JOB)
+    if jobs <= 1:
+        return [(0, total_pages)]
+    count = min(jobs * 4, total_pages // SCAN_PAGES_PER_JOB)
+    bounds = [total_pages * i // count for i in range(count + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+def _scan_pages_worker(pdf_path, start, stop, level, skip_carriers=False):
+    """
+    Scans pages start..stop-1 in a worker process, which opens its own copy of the PDF.
+    Returns tuple: (list of (page index, SKU or None), list of (level, depth, text) of the
+    warnings and errors the parent's reporter wants, level being its progress.level)
+    """
+    messages = []
+    progress = ProgressReporter()
+    progress.subscribe(lambda event: messages.append((event.level, event.depth, event.message)), max(level, WARNING))
+    doc = fitz.open(pdf_path)
+    try:
+        return list(_scan_pages(doc, start, stop, progress, skip_carriers)), messages
+    finally:
+        doc.close()
+
+def _scan_parallel(pdf_path, chunks, jobs, progress, skip_carriers=False):
+    """Scans the page ranges in worker processes. Returns list of (page index, SKU or None) in page order."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    page_skus = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as executor:
+        futures = [executor.submit(_scan_pages_worker, pdf_path, start, stop, progress.level, skip_carriers)
+                   for start, stop in chunks]
+        # Merged in page order, whichever worker finishes first
+        for future in futures:
+            chunk_skus, messages = future.result()
+            page_skus.extend(chunk_skus)
+            for level, depth, text in messages:
+                progress.emit(Message(level, "%s", (text,), depth))
+    return page_skus
+
+def _cached_scan(scan_cache, pdf_path, total_pages, progress):
+    """
+    Looks the PDF up in the scan cache (a scan_cache.ScanCache or None).
+    Returns tuple: (PDF hash or None, (is_interleaved_mode, SKU or None of every page) or None)
+    """
+    if scan_cache is None:
+        return None, None
+    try:
+        sha256 = file_sha256(pdf_path)
+        return sha256, scan_cache.lookup(sha256, total_pages)
+    except (IOError, OSError, sqlite3.Error) as e:
+        progress.warning("Could not read the scan cache: %s", e)
+        return None, None
+
+def _store_scan(scan_cache, sha256, is_interleaved_mode, sku_pages, total_pages, progress):
+    """Adds a finished page scan to the scan cache."""
+    if scan_cache is None or sha256 is None:
+        return
+    page_skus = [None] * total_pages
+    for sku, found_on_pages in sku_pages.items():
+        for page_num in found_on_pages:
+            page_skus[page_num] = sku
+    try:
+        scan_cache.store(sha256, is_interleaved_mode, page_skus)
+    except sqlite3.Error as e:
+        progress.warning("Could not update the scan cache: %s", e)
+
+def _plan_output_pages(sku_pages, is_interleaved_mode, total_pages):
+    """
+    Determines the output page ranges based on the mode.
+    Returns dict: SKU -> final list of page indices to include
+    """
+    sku_output_pages = defaultdict(list) # Stores SKU -> [final list of page indices to include]
+    for sku, found_on_pages in sku_pages.items():
+        if not found_on_pages: continue # Should not happen, but safe check
+        
+        min_page = min(found_on_pages)
+        max_page = max(found_on_pages)
+        
+        if is_interleaved_mode:
+            # Include all pages from min_page to max_page + 1
+            # Ensure upper bound doesn't exceed total pages
+            end_page_exclusive = min(max_page + 2, total_pages) 
+            page_range = list(range(min_page, end_page_exclusive))
+            sku_output_pages[sku] = page_range
+            # progress.info("SKU '%s': Interleaved range %d-%d.", sku, min_page + 1, end_page_exclusive, depth=2)
+        else:
+            # Standard mode: Only include pages where SKU was found
+            sku_output_pages[sku] = sorted(found_on_pages)
+            # progress.info("SKU '%s': Standard pages %s.", sku, sorted(p + 1 for p in found_on_pages), depth=2)
+    return sku_output_pages
+
+def _find_unchanged_output(input_dir, shipping_id, pdf_path, options):
+    """
+    Looks for an existing <shipping_id>_<N>pages folder whose manifest shows it was
+    split from this exact PDF with the current version and options.
+    Returns the folder path or None.
+    """
+    pattern = os.path.join(glob.escape(input_dir), f"{glob.escape(shipping_id)}_*pages")
+    for candidate in glob.glob(pattern):
+        if os.path.isdir(candidate) and is_up_to_date(candidate, {"pdf": pdf_path}, __version__, options):
+            return candidate
+    return None
+
+def process_single_pdf_document(pdf_path, keyword, progress, skip_unchanged=False,
+                                archive_format=None, compress=False, bookmarked=False,
+                                save_profile=DEFAULT_SAVE_PROFILE, metrics=None, jobs=1, scan_cache=None,
+                                scan_strategy="full"):
     """
     Processes a single PDF document. Detects mode (standard/interleaved) based on page 2.
     Finds SKUs on each page and creates split PDFs based on the detected mode.
+    With skip_unchanged, a PDF already split into an output folder with a matching
+    manifest is not processed again. With archive_format ('zip' or 'tar'), the split
+    PDFs are written into one archive in the output folder instead of separate files.
+    With bookmarked, one PDF with a bookmark per SKU is written instead of a PDF per SKU.
+    save_profile ('fast', 'compact' or 'archive') trades write time for file size.
+    jobs > 1 scans the pages of large PDFs in that many worker processes. With scan_cache
+    (a scan_cache.ScanCache), a PDF scanned before is not scanned again. scan_strategy
+    'bisect' reads only some pages of standard-mode PDFs whose labels are grouped by SKU,
+    and skips most carrier pages of interleaved PDFs.
+    progress is a progress.ProgressReporter, or a callable taking status text lines, or None;
+    the document ends with a DocumentFinished event carrying its metrics (a DocumentMetrics:
+    stage timings, page counts and bytes written), which are also filled into metrics if given.
     Returns tuple: (success_boolean, pages_split_count)
     """
-    status_callback(f"Processing PDF: {os.path.basename(pdf_path)}\n")
+    progress = as_reporter(progress)
+    metrics = metrics or DocumentMetrics(os.path.basename(pdf_path))
+    if progress.enabled(INFO):
+        progress.emit(DocumentStarted(pdf_path))
+    try:
+        success, pages_split, output_dir = _process_single_pdf_document(pdf_path, progress, skip_unchanged, archive_format,
+                                                                        compress, bookmarked, save_profile, metrics,
+                                                                        jobs, scan_cache, scan_strategy)
+    finally:
+        metrics.finish()
+    if not success:
+        metrics.status = "failed"
+    metrics.pages_written = pages_split
+    if progress.enabled(INFO):
+        progress.emit(DocumentFinished(pdf_path, success, metrics.status == "skipped", pages_split,
+                                       len(metrics.outputs), output_dir, metrics))
+    return success, pages_split
+
+def _process_single_pdf_document(pdf_path, progress, skip_unchanged, archive_format, compress, bookmarked,
+                                 save_profile, metrics, jobs, scan_cache, scan_strategy):
+    """
+    Does the work of process_single_pdf_document.
+    Returns tuple: (success_boolean, pages_split_count, output folder or None)
+    """
     doc = None
     pages_with_sku_count = 0 # Count pages where an SKU was *found*
     skipped_page_numbers = []
@@ -89,123 +601,186 @@ def process_single_pdf_document(pdf_path, keyword, status_callback):
         else:
             shipping_id = shipping_id_base
 
+        options = _manifest_options(archive_format, compress, bookmarked, save_profile)
+        if skip_unchanged:
+            unchanged_dir = _find_unchanged_output(input_dir, shipping_id, pdf_path, options)
+            if unchanged_dir:
+                progress.info("Skipped: unchanged since last run (output in %s).", os.path.basename(unchanged_dir))
+                metrics.status = "skipped"
+                return True, 0, unchanged_dir
+
         # Open PDF safely
         try:
-            doc = fitz.open(pdf_path)
+            with metrics.stage("open"):
+                doc = fitz.open(pdf_path)
             total_pages = len(doc)
+            metrics.pages = total_pages
+            metrics.producer = (doc.metadata or {}).get("producer") or ""
             if total_pages == 0:
-                status_callback("  Error: PDF has no pages.\n")
-                return False, 0
+                progress.error("PDF has no pages.")
+                return False, 0, None
         except Exception as e:
-            status_callback(f"  Error opening PDF: {e}\n")
-            return False, 0
+            progress.error("Could not open PDF: %s", e)
+            return False, 0, None
 
         # --- Mode Detection ---
-        if total_pages >= 2:
-            try:
-                page_one = doc.load_page(1) # Page index 1 is the second page
-                # Use the imported function (keyword argument is no longer used by the new function)
-                sku_on_page_two = find_sku_on_page(page_one, status_callback)
-                if sku_on_page_two is None:
-                    is_interleaved_mode = True
-                    # Clarify mode and implication
-                    status_callback("  Mode Detected: Interleaved (No SKU on page 2). Output PDFs will include pages following SKU pages.\n") 
-                else:
-                    status_callback("  Mode Detected: Standard (SKU found on page 2). Output PDFs will include only pages with SKUs.\n")
-            except Exception as e:
-                 status_callback(f"  Warn: Could not check page 2 for mode detection: {e}. Assuming Standard Mode.\n")
-        else:
-             status_callback("  Warn: PDF has only one page. Assuming Standard Mode.\n")
-
+        with metrics.stage("detect"):
+            sha256, cached_scan = _cached_scan(scan_cache, pdf_path, total_pages, progress)
+            if cached_scan:
+                is_interleaved_mode = cached_scan[0]
+                progress.info("Mode: %s (from the scan cache).", "Interleaved" if is_interleaved_mode else "Standard")
+            else:
+                is_interleaved_mode = _detect_interleaved_mode(doc, progress)
+        metrics.mode = "interleaved" if is_interleaved_mode else "standard"
 
         output_folder_name = f"{shipping_id}_{total_pages}pages"
         output_dir = os.path.join(input_dir, output_folder_name)
         os.makedirs(output_dir, exist_ok=True)
 
-        status_callback(f"  Shipping ID: {shipping_id}\n")
-        status_callback(f"  Total Pages: {total_pages}\n")
-        status_callback(f"  Output Dir: {output_folder_name}\n")
+        progress.info("Shipping ID: %s", shipping_id)
+        progress.info("Total Pages: %d", total_pages)
+        progress.info("Output Dir: %s", output_folder_name)
 
         # --- Process pages to find SKU locations ---
-        sku_pages = defaultdict(list) # Stores SKU -> [list of page indices where found]
-        status_callback(f"  Scanning {total_pages} pages...\n")
-        for page_num in range(total_pages):
-            page = doc.load_page(page_num)
-            # Use the imported function (keyword argument is no longer used by the new function)
-            sku = find_sku_on_page(page, status_callback)
-            if sku:
-                sku_pages[sku].append(page_num)
-                pages_with_sku_count += 1
+        with metrics.stage("scan"):
+            if cached_scan:
+                progress.info("Using the cached scan of %d pages.", total_pages)
+                sku_pages, skipped_page_numbers = _collect_sku_pages(enumerate(cached_scan[1]), progress)
             else:
-                skipped_page_numbers.append(page_num + 1) 
+                sku_pages, skipped_page_numbers = _scan_sku_pages(doc, progress, jobs, pdf_path, scan_strategy,
+                                                                  is_interleaved_mode)
+                if scan_strategy == "full":
+                    # Bisected SKU runs rest on spot checks and skipped carrier pages are assumed
+                    # to have no SKU: only scans that read every page are cached
+                    _store_scan(scan_cache, sha256, is_interleaved_mode, sku_pages, total_pages, progress)
+        metrics.skus = len(sku_pages)
+        pages_with_sku_count = sum(len(found_on_pages) for found_on_pages in sku_pages.values())
 
-        status_callback(f"  Finished scanning. Found {len(sku_pages)} unique SKUs across {pages_with_sku_count} pages.\n")
+        progress.info("Finished scanning. Found %d unique SKUs across %d pages.", len(sku_pages), pages_with_sku_count)
 
         if not sku_pages:
-            status_callback("  No SKUs found in this document. No split PDFs created.\n")
-            return True, 0 # Not an error, just nothing to split
+            progress.info("No SKUs found in this document. No split PDFs created.")
+            try:
+                write_manifest(output_dir, {"pdf": pdf_path}, __version__, options, [])
+            except (IOError, OSError) as e:
+                progress.warning("Could not write manifest: %s", e)
+            return True, 0, output_dir # Not an error, just nothing to split
 
         # --- Determine Output Page Ranges based on Mode ---
-        sku_output_pages = defaultdict(list) # Stores SKU -> [final list of page indices to include]
-        for sku, found_on_pages in sku_pages.items():
-            if not found_on_pages: continue # Should not happen, but safe check
-            
-            min_page = min(found_on_pages)
-            max_page = max(found_on_pages)
-            
-            if is_interleaved_mode:
-                # Include all pages from min_page to max_page + 1
-                # Ensure upper bound doesn't exceed total pages
-                end_page_exclusive = min(max_page + 2, total_pages) 
-                page_range = list(range(min_page, end_page_exclusive))
-                sku_output_pages[sku] = page_range
-                # status_callback(f"    SKU '{sku}': Interleaved range {min_page+1}-{end_page_exclusive}.\n")
-            else:
-                # Standard mode: Only include pages where SKU was found
-                sku_output_pages[sku] = sorted(found_on_pages)
-                # status_callback(f"    SKU '{sku}': Standard pages {sorted([p+1 for p in found_on_pages])}.\n")
+        with metrics.stage("plan"):
+            sku_output_pages = _plan_output_pages(sku_pages, is_interleaved_mode, total_pages)
 
         # --- Create output PDFs ---
-        total_split_pages = _create_grouped_output_pdfs(doc, sku_output_pages, shipping_id, output_dir, status_callback)
-        status_callback(f"  Finished creating split PDFs for {base_filename}.\n")
+        if archive_format:
+            archive_name = f"{output_folder_name}{archive_extension(archive_format, compress)}"
+            progress.info("Archive: %s", archive_name)
+            sink = open_archive_sink(os.path.join(output_dir, archive_name), archive_format, compress, save_profile)
+        else:
+            sink = DirectorySink(output_dir, save_profile)
+        with sink:
+            if bookmarked:
+                total_split_pages, written_files = _create_bookmarked_output_pdf(doc, sku_output_pages, shipping_id, progress, sink, metrics)
+            else:
+                total_split_pages, written_files = _create_grouped_output_pdfs(doc, sku_output_pages, shipping_id, output_dir, progress, sink, metrics)
+            with metrics.stage("save"):
+                sink.close(shipment_id=shipping_id, source=base_filename)
+        if archive_format:
+            written_files = [archive_name]
+        progress.info("Finished creating split PDFs for %s.", base_filename)
+        try:
+            write_manifest(output_dir, {"pdf": pdf_path}, __version__, options, written_files)
+        except (IOError, OSError) as e:
+            progress.warning("Could not write manifest: %s", e)
 
         # --- Verification ---
-        status_callback("  Verification:\n")
-        status_callback(f"    Original Pages: {total_pages}\n")
-        status_callback(f"    Pages where SKU found: {pages_with_sku_count}\n")
-        status_callback(f"    Total Pages Written to Split PDFs: {total_split_pages}\n")
+        progress.info("Verification:")
+        progress.info("Original Pages: %d", total_pages, depth=2)
+        progress.info("Pages where SKU found: %d", pages_with_sku_count, depth=2)
+        progress.info("Total Pages Written to Split PDFs: %d", total_split_pages, depth=2)
         
         # Verification logic might differ based on mode
         if is_interleaved_mode:
              # Clarify verification in interleaved mode
-             status_callback("    Verification Info: Interleaved mode used; page ranges include pages following last SKU occurrence.\n") 
+             progress.info("Verification Info: Interleaved mode used; page ranges include pages following last SKU occurrence.", depth=2) 
         elif pages_with_sku_count != total_split_pages:
              # Standard mode failure condition
-             status_callback("    Verification FAILED (Standard Mode): Mismatch between pages where SKU found and pages written.\n")
+             progress.warning("Verification FAILED (Standard Mode): Mismatch between pages where SKU found and pages written.", depth=2)
              # In standard mode, this indicates a potential problem
              # return False, total_split_pages # Decide if this is a hard failure
 
         if skipped_page_numbers:
-             status_callback(f"    Note: {len(skipped_page_numbers)} page(s) were skipped (no SKU found): {skipped_page_numbers}\n")
+             progress.info("Note: %d page(s) were skipped (no SKU found): %s", len(skipped_page_numbers), skipped_page_numbers, depth=2)
              if not is_interleaved_mode: # Only recommend manual check if NOT interleaved
-                 status_callback(f"    It's recommended to check the original PDF for these pages.\n") 
+                 progress.info("It's recommended to check the original PDF for these pages.", depth=2) 
 
-        return True, total_split_pages 
+        return True, total_split_pages, output_dir 
 
     except Exception as e:
-        status_callback(f"  An unexpected error occurred processing {base_filename}: {e}\n")
-        status_callback(traceback.format_exc() + "\n")
-        return False, 0 
+        progress.error("An unexpected error occurred processing %s: %s", base_filename, e)
+        progress.info(traceback.format_exc(), depth=0)
+        return False, 0, None 
     finally:
         if doc:
             doc.close()
 
-def process_shipment(input_path, is_folder, keyword, status_callback):
+def _split_in_memory(pdf_data, shipping_id, progress, bookmarked, save_profile):
+    """
+    Opens and scans a PDF held in memory; the split PDFs are made as the returned generator is consumed.
+    Returns generator of tuples: (file name, SKU or None for the bookmarked PDF, PDF bytes)
+    """
+    progress = as_reporter(progress)
+    data = pdf_data.read() if hasattr(pdf_data, "read") else pdf_data
+    doc = fitz.open(stream=data, filetype="pdf")
+    try:
+        is_interleaved_mode = _detect_interleaved_mode(doc, progress)
+        sku_pages, _ = _scan_sku_pages(doc, progress, interleaved=is_interleaved_mode)
+        sku_output_pages = _plan_output_pages(sku_pages, is_interleaved_mode, len(doc))
+    except Exception:
+        doc.close()
+        raise
+    sink = MemorySink(save_profile)
+
+    def split_files():
+        with doc:
+            if bookmarked:
+                _, written_files = _create_bookmarked_output_pdf(doc, sku_output_pages, shipping_id, progress, sink)
+                for filename in written_files:
+                    yield filename, None, sink.files.pop(filename)
+            else:
+                for filename, sku, _ in _iter_grouped_output_pdfs(doc, sku_output_pages, shipping_id, progress, sink):
+                    yield filename, sku, sink.files.pop(filename)
+    return split_files()
+
+def iter_split_pdf_bytes(pdf_data, shipping_id="labels", progress=None, bookmarked=False,
+                         save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Splits a PDF held in memory (bytes, bytearray, memoryview or a binary file object)
+    by the SKU printed on each label, without touching the filesystem. The pages are
+    scanned right away; each split PDF is made when the generator gets to it.
+    shipping_id is used in the file names. progress (a ProgressReporter or a status text callable) is optional.
+    Returns generator of tuples: (file name, PDF bytes)
+    """
+    split_files = _split_in_memory(pdf_data, shipping_id, progress, bookmarked, save_profile)
+    return ((filename, data) for filename, _, data in split_files)
+
+def split_pdf_bytes(pdf_data, shipping_id="labels", progress=None, save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Splits a PDF held in memory by SKU, without temporary files (see iter_split_pdf_bytes).
+    Returns dict: SKU -> PDF bytes
+    """
+    return {sku: data for _, sku, data in _split_in_memory(pdf_data, shipping_id, progress, False, save_profile)}
+
+def process_shipment(input_path, is_folder, keyword, progress, bookmarked=False, jobs=1, scan_cache=None,
+                     scan_strategy="full"):
     """
     Main processing function called by the GUI thread.
-    Handles both single file and folder processing.
+    Handles both single file and folder processing. In folder mode, PDFs that are
+    unchanged since they were last split are skipped. bookmarked is passed on to
+    process_single_pdf_document, as are jobs (worker processes for the page scan of a
+    large PDF), scan_cache and scan_strategy; progress is reported as there.
     Returns tuple: (success_count, fail_count, total_files, total_pages_split)
     """
+    progress = as_reporter(progress)
     success_count = 0
     fail_count = 0
     total_files = 0
@@ -216,27 +791,31 @@ def process_shipment(input_path, is_folder, keyword, status_callback):
             pdf_files = glob.glob(os.path.join(input_path, '*.[pP][dD][fF]')) 
             pdf_files = list(set(pdf_files)) 
             total_files = len(pdf_files)
-            status_callback(f"Found {total_files} PDF(s) in the folder.\n")
+            progress.info("Found %d PDF(s) in the folder.", total_files, depth=0)
             if not pdf_files:
-                 status_callback("No PDF files found in the selected folder.\n")
+                 progress.info("No PDF files found in the selected folder.", depth=0)
                  return 0, 0, 0, 0 
             
             for i, pdf_path in enumerate(pdf_files):
-                status_callback(f"--- Processing file {i+1}/{total_files} --- \n")
-                success, pages_split = process_single_pdf_document(pdf_path, keyword, status_callback)
+                progress.info("--- Processing file %d/%d --- ", i + 1, total_files, depth=0)
+                success, pages_split = process_single_pdf_document(pdf_path, keyword, progress, skip_unchanged=True,
+                                                                   bookmarked=bookmarked, jobs=jobs,
+                                                                   scan_cache=scan_cache, scan_strategy=scan_strategy)
                 if success:
                     success_count += 1
                     total_pages_split_across_run += pages_split
                 else:
                     fail_count += 1
         except Exception as e:
-            status_callback(f"Error scanning folder {input_path}: {e}\n")
+            progress.error("Could not scan folder %s: %s", input_path, e, depth=0)
             fail_count = total_files 
             total_pages_split_across_run = 0 
     else: # Single file processing
         total_files = 1
         # The input_path is the file path here
-        success, pages_split = process_single_pdf_document(input_path, keyword, status_callback) 
+        success, pages_split = process_single_pdf_document(input_path, keyword, progress, bookmarked=bookmarked,
+                                                           jobs=jobs, scan_cache=scan_cache,
+                                                           scan_strategy=scan_strategy)
         if success:
             success_count += 1
             total_pages_split_across_run = pages_split
@@ -244,3 +823,55 @@ def process_shipment(input_path, is_folder, keyword, status_callback):
             fail_count += 1
             
     return success_count, fail_count, total_files, total_pages_split_across_run
+
+def main():
+    """Command line: split a label PDF or a folder of them, reporting progress as text or JSON lines."""
+    parser = argparse.ArgumentParser(description='Split label PDFs by the SKU printed on each label')
+    parser.add_argument('path', help='Label PDF, or a folder of label PDFs')
+    parser.add_argument('--bookmarked', action='store_true', help='One PDF with a bookmark per SKU instead of a PDF per SKU')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help=f'Worker processes for the page scan of PDFs with {2 * SCAN_PAGES_PER_JOB}+ pages (default: 1)')
+    parser.add_argument('--scan', choices=SCAN_STRATEGIES, default='full',
+                        help="How pages are scanned for SKUs: 'bisect' reads only a few pages of each SKU "
+                             "and skips most carrier pages, for labels grouped by SKU (default: full)")
+    parser.add_argument('--no-scan-cache', action='store_true', help='Scan every PDF again, without the scan cache')
+    parser.add_argument('--json', action='store_true', help='Report progress as JSON lines on stdout')
+    parser.add_argument('--level', choices=list(LEVELS), default='info',
+                        help='Least important progress events reported; debug adds one event per page (default: info)')
+    args = parser.parse_args()
+
+    progress = ProgressReporter()
+    progress.subscribe(JsonLinesSink() if args.json else TextSink(sys.stdout.write), LEVELS[args.level])
+    # Recorded in the same run history as the app's runs
+    history = run = None
+    try:
+        history = RunHistory()
+        run = history.start_run(args.path, __version__)
+        progress.subscribe(run, INFO)
+    except sqlite3.Error as e:
+        progress.warning("Run history unavailable: %s", e, depth=0)
+    scan_cache = None
+    if not args.no_scan_cache:
+        try:
+            scan_cache = ScanCache()
+        except sqlite3.Error as e:
+            progress.warning("Scan cache unavailable: %s", e, depth=0)
+    try:
+        _, fail_count, total_files, _ = process_shipment(args.path, os.path.isdir(args.path), None, progress,
+                                                         args.bookmarked, args.jobs, scan_cache, args.scan)
+    finally:
+        if run:
+            try:
+                run.finish()
+            except sqlite3.Error as e:
+                run.error = e
+            if run.error:
+                progress.warning("Could not record run history: %s", run.error, depth=0)
+        if history:
+            history.close()
+        if scan_cache:
+            scan_cache.close()
+    return 1 if fail_count or not total_files else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
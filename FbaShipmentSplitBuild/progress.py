@@ -0,0 +1,254 @@
+"""
+Progress events of the label-text pipeline.
+
+Processing reports what it does as typed events through a ProgressReporter:
+DocumentStarted, PageScanned, SkuFound, FileWritten, Message (notes, warnings
+and errors) and DocumentFinished. Sinks subscribe with a minimum level: the GUI
+log (TextSink), JSON lines for orchestration (JsonLinesSink) and the run history
+(run_history.Run) are all just callables taking an event.
+
+Nothing is built for events no sink wants: hot paths check reporter.enabled(level)
+before creating an event, and message text is only formatted when a sink reads it.
+"""
+
+import os
+import sys
+import json
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+# Above every level: a reporter without sinks is never enabled
+_NO_SINKS = ERROR + 1
+
+
+class ProgressEvent:
+    """Base class. depth is the indentation of the event's line in the text log."""
+    kind = "event"
+    level = INFO
+    depth = 1
+    fields = ()
+    __slots__ = ()
+
+    @property
+    def message(self):
+        raise NotImplementedError
+
+    def text(self):
+        """The event as a line of the text log."""
+        return f"{'  ' * self.depth}{self.message}\n"
+
+    def to_dict(self):
+        event = {"event": self.kind, "level": LEVEL_NAMES[self.level]}
+        event.update((name, getattr(self, name)) for name in self.fields)
+        event["message"] = self.message
+        return event
+
+
+class DocumentStarted(ProgressEvent):
+    kind = "document_started"
+    depth = 0
+    fields = ("path",)
+    __slots__ = fields
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def message(self):
+        return f"Processing PDF: {os.path.basename(self.path)}"
+
+
+class PageScanned(ProgressEvent):
+    """A page was read; sku is None if no SKU was found on it. page is 1-based."""
+    kind = "page_scanned"
+    level = DEBUG
+    depth = 2
+    fields = ("page", "sku")
+    __slots__ = fields
+
+    def __init__(self, page, sku):
+        self.page = page
+        self.sku = sku
+
+    @property
+    def message(self):
+        return f"Page {self.page}: {self.sku or 'no SKU'}"
+
+
+class SkuFound(ProgressEvent):
+    """An SKU was seen for the first time in the document, on 1-based page."""
+    kind = "sku_found"
+    depth = 2
+    fields = ("sku", "page")
+    __slots__ = fields
+
+    def __init__(self, sku, page):
+        self.sku = sku
+        self.page = page
+
+    @property
+    def message(self):
+        return f"Found SKU '{self.sku}' on page {self.page}"
+
+
+class FileWritten(ProgressEvent):
+    """A split PDF was written. sku is None for the bookmarked PDF; pages are 1-based."""
+    kind = "file_written"
+    depth = 2
+    fields = ("name", "sku", "pages", "bytes", "first_page", "last_page")
+    __slots__ = fields
+
+    def __init__(self, name, sku, pages, bytes, first_page, last_page):
+        self.name = name
+        self.sku = sku
+        self.pages = pages
+        self.bytes = bytes
+        self.first_page = first_page
+        self.last_page = last_page
+
+    @property
+    def message(self):
+        return f"Created: {self.name} ({self.pages} pages: {self.first_page} to {self.last_page})"
+
+
+class Message(ProgressEvent):
+    """
+    A note, warning or error. The text is formatted from fmt % args only when
+    a sink asks for it.
+    """
+    __slots__ = ("level", "depth", "fmt", "args")
+    PREFIXES = {WARNING: "Warn: ", ERROR: "Error: "}
+
+    def __init__(self, level, fmt, args=(), depth=1):
+        self.level = level
+        self.fmt = fmt
+        self.args = args
+        self.depth = depth
+
+    @property
+    def kind(self):
+        return LEVEL_NAMES[self.level] if self.level >= WARNING else "info"
+
+    @property
+    def message(self):
+        return self.fmt % self.args if self.args else self.fmt
+
+    def text(self):
+        return f"{'  ' * self.depth}{self.PREFIXES.get(self.level, '')}{self.message}\n"
+
+    def to_dict(self):
+        return {"event": self.kind, "level": LEVEL_NAMES[self.level], "message": self.message}
+
+
+class DocumentFinished(ProgressEvent):
+    """
+    Processing of a document ended. output_dir is where the split PDFs are (also
+    for a skipped document), metrics its run_history.DocumentMetrics.
+    """
+    kind = "document_finished"
+    fields = ("path", "success", "skipped", "pages_split", "files", "output_dir")
+    __slots__ = fields + ("metrics",)
+
+    def __init__(self, path, success, skipped, pages_split, files, output_dir, metrics):
+        self.path = path
+        self.success = success
+        self.skipped = skipped
+        self.pages_split = pages_split
+        self.files = files
+        self.output_dir = output_dir
+        self.metrics = metrics
+
+    @property
+    def message(self):
+        if not self.success:
+            return f"Failed: {os.path.basename(self.path)}"
+        if self.skipped:
+            return f"Done: {os.path.basename(self.path)} unchanged"
+        return f"Done: {self.pages_split} pages split into {self.files} file(s)"
+
+    def to_dict(self):
+        event = super().to_dict()
+        event["seconds"] = self.metrics.seconds
+        event["stages"] = self.metrics.stages
+        event["bytes_written"] = self.metrics.bytes_written
+        return event
+
+
+class ProgressReporter:
+    """Delivers events to the subscribed sinks whose level they reach."""
+
+    def __init__(self):
+        self._sinks = []
+        self.level = _NO_SINKS
+
+    def subscribe(self, sink, level=INFO):
+        """Adds sink (a callable taking an event) for events of level and above. Returns sink."""
+        self._sinks.append((sink, level))
+        self.level = min(self.level, level)
+        return sink
+
+    def unsubscribe(self, sink):
+        self._sinks = [(s, level) for s, level in self._sinks if s is not sink]
+        self.level = min((level for _, level in self._sinks), default=_NO_SINKS)
+
+    def enabled(self, level):
+        """True if some sink wants events of this level; check before building an event on a hot path."""
+        return level >= self.level
+
+    def emit(self, event):
+        for sink, level in self._sinks:
+            if event.level >= level:
+                sink(event)
+
+    def _message(self, level, fmt, args, depth):
+        if level >= self.level:
+            self.emit(Message(level, fmt, args, depth))
+
+    def info(self, fmt, *args, depth=1):
+        self._message(INFO, fmt, args, depth)
+
+    def warning(self, fmt, *args, depth=1):
+        self._message(WARNING, fmt, args, depth)
+
+    def error(self, fmt, *args, depth=1):
+        self._message(ERROR, fmt, args, depth)
+
+
+class TextSink:
+    """Passes each event as a line of text to callback, e.g. the GUI log's update_status."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def __call__(self, event):
+        self.callback(event.text())
+
+
+class JsonLinesSink:
+    """Writes each event as one JSON object per line (default: to stdout)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def __call__(self, event):
+        self.stream.write(json.dumps(event.to_dict(), default=str) + "\n")
+        self.stream.flush()
+
+
+def as_reporter(progress):
+    """
+    Returns a ProgressReporter for progress: a reporter is used as it is, a callable
+    taking status text (the former status_callback) gets the INFO events as text
+    lines, and None gives a reporter without sinks.
+    """
+    if isinstance(progress, ProgressReporter):
+        return progress
+    reporter = ProgressReporter()
+    if progress is not None:
+        reporter.subscribe(TextSink(progress), INFO)
+    return reporter
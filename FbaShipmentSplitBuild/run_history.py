@@ -0,0 +1,264 @@
+"""
+Run history: per-stage timings and throughput of every processed PDF.
+
+Processing a PDF fills a DocumentMetrics with the time spent in each stage
+(open, mode detection, page scan, plan, per-SKU write, save), the page counts
+and the bytes written. A Run records them into a local SQLite database
+(run_history.sqlite3 next to config.json), together with the app, PyMuPDF and
+Python versions and the PDF producer, so throughput can be compared over time,
+across versions and across label generators.
+
+Trends are shown in the app's History window or on the command line:
+    python run_history.py [--by day|app|pymupdf|producer] [--recent 20]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import platform
+from contextlib import contextmanager
+
+from progress import DocumentFinished
+
+HISTORY_FILE = "run_history.sqlite3"
+STAGES = ("open", "detect", "scan", "plan", "write", "save")
+STAGE_LABELS = {"open": "Open", "detect": "Mode detection", "scan": "Page scan", "plan": "Plan",
+                "write": "SKU write", "save": "Save"}
+
+# Grouping keys of the throughput trend
+TREND_GROUPS = {
+    "day": "date(documents.started, 'unixepoch', 'localtime')",
+    "app": "runs.app_version",
+    "pymupdf": "runs.pymupdf_version",
+    "producer": "documents.producer",
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    source TEXT,
+    app_version TEXT,
+    pymupdf_version TEXT,
+    python_version TEXT,
+    documents INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    name TEXT NOT NULL,
+    started REAL NOT NULL,
+    status TEXT NOT NULL,
+    mode TEXT,
+    producer TEXT,
+    pages INTEGER NOT NULL DEFAULT 0,
+    skus INTEGER NOT NULL DEFAULT 0,
+    pages_written INTEGER NOT NULL DEFAULT 0,
+    bytes_written INTEGER NOT NULL DEFAULT 0,
+    seconds REAL NOT NULL DEFAULT 0,
+    {", ".join(f"{stage}_seconds REAL NOT NULL DEFAULT 0" for stage in STAGES)}
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    document_id INTEGER NOT NULL REFERENCES documents(id),
+    name TEXT NOT NULL,
+    sku TEXT,
+    pages INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    write_seconds REAL NOT NULL,
+    save_seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_started ON documents(started);
+"""
+
+
+def default_history_path():
+    """The history database next to config.json."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_FILE)
+
+
+class DocumentMetrics:
+    """Stage timings (seconds), page counts and bytes written while processing one PDF."""
+
+    def __init__(self, name=""):
+        self.name = name
+        self.started = time.time()
+        self.status = "ok" # 'ok', 'failed' or 'skipped' (unchanged since the last run)
+        self.mode = None # 'standard' or 'interleaved'
+        self.producer = ""
+        self.pages = 0
+        self.skus = 0
+        self.pages_written = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.outputs = [] # (file name, SKU, pages, bytes, write seconds, save seconds)
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Adds the time spent in the with-block to a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def add_output(self, filename, sku, pages, size, write_seconds, save_seconds):
+        """Records one written PDF; its write and save times are added to the stages."""
+        self.outputs.append((filename, sku, pages, size, write_seconds, save_seconds))
+        self.stages["write"] += write_seconds
+        self.stages["save"] += save_seconds
+        self.bytes_written += size
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+
+
+class Run:
+    """
+    One run of the app (a folder or a selection of files), recorded document by document.
+    A Run is also a progress sink: subscribed to a ProgressReporter, it records the metrics
+    of every DocumentFinished event. A failed write is kept in error instead of being raised.
+    """
+
+    def __init__(self, history, run_id):
+        self.history = history
+        self.run_id = run_id
+        self.documents = 0
+        self.failed = 0
+        self.error = None
+
+    def __call__(self, event):
+        if isinstance(event, DocumentFinished):
+            try:
+                self.record(event.metrics)
+            except sqlite3.Error as e:
+                self.error = e
+
+    def record(self, metrics):
+        """Stores the metrics of a processed document."""
+        self.documents += 1
+        self.failed += metrics.status == "failed"
+        self.history.record_document(self.run_id, metrics)
+
+    def finish(self):
+        self.history.finish_run(self.run_id, self.documents, self.failed)
+
+
+class RunHistory:
+    """The SQLite run-history database. A connection belongs to the thread that opened it."""
+
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def start_run(self, source, app_version=""):
+        """Starts recording a run. Returns a Run."""
+        import fitz  # PyMuPDF, already loaded by the processing code
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (started, source, app_version, pymupdf_version, python_version) VALUES (?, ?, ?, ?, ?)",
+                (time.time(), source, app_version, fitz.VersionBind, platform.python_version()))
+        return Run(self, cursor.lastrowid)
+
+    def record_document(self, run_id, metrics):
+        with self.conn:
+            cursor = self.conn.execute(
+                f"INSERT INTO documents (run_id, name, started, status, mode, producer, pages, skus, pages_written, "
+                f"bytes_written, seconds, {', '.join(f'{stage}_seconds' for stage in STAGES)}) "
+                f"VALUES ({', '.join('?' * (11 + len(STAGES)))})",
+                (run_id, metrics.name, metrics.started, metrics.status, metrics.mode, metrics.producer,
+                 metrics.pages, metrics.skus, metrics.pages_written, metrics.bytes_written, metrics.seconds,
+                 *(metrics.stages[stage] for stage in STAGES)))
+            self.conn.executemany(
+                "INSERT INTO outputs (document_id, name, sku, pages, bytes, write_seconds, save_seconds) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, *output) for output in metrics.outputs])
+
+    def finish_run(self, run_id, documents, failed):
+        with self.conn:
+            self.conn.execute("UPDATE runs SET finished = ?, documents = ?, failed = ? WHERE id = ?",
+                              (time.time(), documents, failed, run_id))
+
+    def throughput_trend(self, by="day", limit=30):
+        """
+        Throughput of the successfully processed documents, grouped by day, app version,
+        PyMuPDF version or PDF producer (most recent first).
+        Returns list of dicts: group, documents, pages, bytes_written, seconds, pages_per_second
+        and <stage>_ms_per_page for every stage
+        """
+        group = TREND_GROUPS[by]
+        rows = self.conn.execute(
+            f"SELECT {group} AS grp, COUNT(*), SUM(documents.pages), SUM(documents.bytes_written), SUM(documents.seconds), "
+            f"{', '.join(f'SUM(documents.{stage}_seconds)' for stage in STAGES)} "
+            f"FROM documents JOIN runs ON runs.id = documents.run_id WHERE documents.status = 'ok' "
+            f"GROUP BY grp ORDER BY MAX(documents.started) DESC LIMIT ?", (limit,)).fetchall()
+        trend = []
+        for grp, documents, pages, bytes_written, seconds, *stage_seconds in rows:
+            entry = {"group": grp or "(unknown)", "documents": documents, "pages": pages,
+                     "bytes_written": bytes_written, "seconds": seconds,
+                     "pages_per_second": pages / seconds if seconds else 0.0}
+            for stage, total in zip(STAGES, stage_seconds):
+                entry[f"{stage}_ms_per_page"] = 1000 * total / pages if pages else 0.0
+            trend.append(entry)
+        return trend
+
+    def recent_documents(self, limit=20):
+        """The most recently processed documents. Returns list of dicts (newest first)."""
+        cursor = self.conn.execute(
+            f"SELECT name, started, status, mode, pages, skus, bytes_written, seconds, "
+            f"{', '.join(f'{stage}_seconds' for stage in STAGES)} FROM documents ORDER BY started DESC LIMIT ?", (limit,))
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def format_trend(trend, by):
+    """Text table of a throughput trend."""
+    lines = [f"{by:<20} {'docs':>5} {'pages':>8} {'pages/s':>8} {'MB':>8}  "
+             + " ".join(f"{stage:>7}" for stage in STAGES) + "   (ms per page)"]
+    for entry in trend:
+        lines.append(f"{str(entry['group'])[:20]:<20} {entry['documents']:>5} {entry['pages']:>8} "
+                     f"{entry['pages_per_second']:>8.0f} {entry['bytes_written'] / 1e6:>8.2f}  "
+                     + " ".join(f"{entry[f'{stage}_ms_per_page']:>7.2f}" for stage in STAGES))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show throughput trends from the run history')
+    parser.add_argument('--db', help=f'History database (default: {HISTORY_FILE} next to this script)')
+    parser.add_argument('--by', choices=sorted(TREND_GROUPS), default='day', help='Group the trend by (default: day)')
+    parser.add_argument('--limit', type=int, default=30, help='Number of groups to show (default: 30)')
+    parser.add_argument('--recent', type=int, default=0, help='Also list the N most recent documents')
+    args = parser.parse_args()
+
+    path = args.db or default_history_path()
+    if not os.path.exists(path):
+        print(f"No run history yet ({path})")
+        return 1
+    with RunHistory(path) as history:
+        print(format_trend(history.throughput_trend(args.by, args.limit), args.by))
+        if args.recent:
+            print()
+            print(f"{'started':<19} {'document':<40} {'status':<8} {'pages':>6} {'seconds':>8}")
+            for document in history.recent_documents(args.recent):
+                started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(document["started"]))
+                print(f"{started:<19} {document['name'][:40]:<40} {document['status']:<8} "
+                      f"{document['pages']:>6} {document['seconds']:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Cache of page scans, so an unchanged label PDF is never scanned twice.
+
+The SKU found on each page and the detected mode (standard or interleaved) are
+stored in a local SQLite database (scan_cache.sqlite3 next to config.json),
+keyed by the SHA-256 of the PDF and the scanner version: splitting the same
+PDF again, after a failed save or with other output options, skips mode
+detection and the page scan. Entries not used for the longest time are dropped
+once the cache outgrows its size limit.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+
+from sku_finder import SCANNER_VERSION
+
+CACHE_FILE = "scan_cache.sqlite3"
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    sha256 TEXT NOT NULL,
+    scanner_version TEXT NOT NULL,
+    interleaved INTEGER NOT NULL,
+    pages INTEGER NOT NULL,
+    skus BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (sha256, scanner_version)
+);
+CREATE INDEX IF NOT EXISTS scans_last_used ON scans(last_used);
+"""
+
+
+def default_cache_path():
+    """The cache database next to config.json."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_FILE)
+
+
+def _encode(page_skus):
+    """Per-page SKUs (None for pages without one) as compressed JSON runs of [sku, page count]."""
+    runs = []
+    for sku in page_skus:
+        if runs and runs[-1][0] == sku:
+            runs[-1][1] += 1
+        else:
+            runs.append([sku, 1])
+    return zlib.compress(json.dumps(runs, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode(data):
+    page_skus = []
+    for sku, count in json.loads(zlib.decompress(data).decode("utf-8")):
+        page_skus.extend([sku] * count)
+    return page_skus
+
+
+class ScanCache:
+    """The SQLite scan cache. A connection belongs to the thread that opened it."""
+
+    def __init__(self, path=None, max_bytes=MAX_CACHE_BYTES):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def lookup(self, sha256, pages):
+        """
+        The cached scan of the PDF with this hash, if it has the given page count.
+        Returns tuple: (is_interleaved_mode, list of the SKU or None of every page), or None
+        """
+        row = self.conn.execute("SELECT interleaved, pages, skus FROM scans WHERE sha256 = ? AND scanner_version = ?",
+                                (sha256, SCANNER_VERSION)).fetchone()
+        if row is None or row[1] != pages:
+            return None
+        try:
+            page_skus = _decode(row[2])
+        except (ValueError, zlib.error):
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE scans SET last_used = ? WHERE sha256 = ? AND scanner_version = ?",
+                              (time.time(), sha256, SCANNER_VERSION))
+        return bool(row[0]), page_skus
+
+    def store(self, sha256, is_interleaved_mode, page_skus):
+        """Caches a scan, then drops the least recently used scans beyond the size limit."""
+        data = _encode(page_skus)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO scans VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (sha256, SCANNER_VERSION, int(is_interleaved_mode), len(page_skus), data, len(data),
+                               time.time()))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM scans").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self.conn.execute("SELECT sha256, scanner_version, size FROM scans "
+                                         "ORDER BY last_used").fetchall()
+                for digest, version, size in rows[:-1]:
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute("DELETE FROM scans WHERE sha256 = ? AND scanner_version = ?", (digest, version))
+                    total -= size
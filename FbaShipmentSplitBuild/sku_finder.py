@@ -1,56 +1,166 @@
 import re # Import regular expression module
+import os
+import json
+import time
+import hashlib
+import warnings
 
-def find_sku_on_page(page, status_callback):
+from progress import as_reporter
+
+# Marketplaces whose labels are recognised: the SKU header(s) and the quantity word(s) of each
+LOCALES_FILE = "label_locales.json"
+# Used when label_locales.json is missing or unreadable
+DEFAULT_LOCALES = [
+    {"name": "US", "headers": ["single sku"], "quantity": ["Qty"]},
+    {"name": "DE", "headers": ["single sku"], "quantity": ["Menge"]},
+    {"name": "JP", "headers": ["単一のsku"], "quantity": ["数量"]},
+]
+
+def load_locales(path=None):
+    """
+    Loads the locales from label_locales.json (default: next to this file).
+    Returns tuple: (list of locale dicts, error message or None); on an error the built-in locales are returned
+    """
+    path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), LOCALES_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            locales = json.load(f)["locales"]
+        for locale in locales:
+            if not locale["headers"] or not locale["quantity"]:
+                raise ValueError(f"locale {locale['name']} needs headers and quantity words")
+        return locales, None
+    except (IOError, ValueError, KeyError, TypeError) as e:
+        return DEFAULT_LOCALES, f"Error loading {LOCALES_FILE}: {e}. Only the built-in US/DE/JP labels are recognised."
+
+def _literal_union(words):
+    """
+    Regex matching any of words, built as a trie so that words sharing a prefix are
+    tried together: matching time hardly grows with the number of words.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+LOCALES, LOCALES_ERROR = load_locales()
+if LOCALES_ERROR:
+    # Shown in the app's log too (see gui.py), where nothing printed can be seen
+    warnings.warn(LOCALES_ERROR, RuntimeWarning)
+
+# Part of the scan cache key: change it whenever a change here (or in the mode detection
+# of pdf_processor) can find different SKUs on the same pages. Editing the locales does so too
+SCANNER_VERSION = "6.2-" + hashlib.sha256(json.dumps(LOCALES, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+# --- Define Patterns ---
+SKU_HEADER_PATTERNS = sorted({header.lower() for locale in LOCALES for header in locale["headers"]})
+QUANTITY_WORDS = sorted({word.lower() for locale in LOCALES for word in locale["quantity"]})
+# All headers in one pattern, searched for in the lower-cased text of the page in a single pass
+SKU_HEADER_PATTERN = re.compile(_literal_union(SKU_HEADER_PATTERNS))
+# Looks for Menge/Qty/数量 (any locale's quantity word), followed by whitespace, then one or more digits. Allows other text after. Case-insensitive.
+QUANTITY_LINE_PATTERN = re.compile(rf'{_literal_union(QUANTITY_WORDS)}\s+\d+', re.IGNORECASE) # Removed '$' anchor
+# Validates if a string looks like a plausible SKU (alphanumeric, underscore, hyphen, dot, plus)
+VALID_SKU_PATTERN = re.compile(r'^[A-Z0-9_.+-]+$', re.IGNORECASE) # Added '+'
+
+# Known label templates: every locale's SKU header and quantity word, with the SKU printed
+# on one or two lines. A document whose SKU block matches one of them on its first pages
+# is read with that template's extractor (see SkuRegion); others use the generic search.
+LABEL_TEMPLATES = [
+    {"name": f"{locale['name']}{' two-line' if sku_lines == 2 else ''}", "header": header.lower(), "quantity": word,
+     "sku_lines": sku_lines}
+    for locale in LOCALES for header in locale["headers"] for word in locale["quantity"] for sku_lines in (1, 2)
+]
+
+def find_sku_on_page(page, progress=None, region=None):
     """
     (Version 6 - Extracted)
     Finds the SKU based on the structure:
-    1. Line containing "SKU" header ("single sku", "単一のsku").
+    1. Line containing "SKU" header ("single sku", "単一のsku", ...).
     2. SKU value on the next 1 or 2 lines.
-    3. Quantity line (Menge/Qty/数量 + number) immediately after the SKU value line(s).
+    3. Quantity line (Menge/Qty/数量/... + number) immediately after the SKU value line(s).
+    The headers and quantity words are those of the locales in label_locales.json.
+    progress (a ProgressReporter or a status text callable) gets the errors, if given.
+    With region (a SkuRegion shared by the pages of a document), only the learned
+    clip rect is read, falling back to the full page when the clip finds no SKU, and
+    once the label template is known its extractor goes straight to the SKU lines.
     Returns the SKU string or None if not found.
     """
     # Ensure page object is valid
     if not page:
-        if status_callback: status_callback("    Error: Invalid page object received in find_sku_on_page.\n")
+        as_reporter(progress).error("Invalid page object received in find_sku_on_page.", depth=2)
         return None
 
+    if region is not None and region.rect is not None and page.rect == region.page_rect:
+        start = time.perf_counter()
+        try:
+            lines = _text_lines(page, region.rect)
+            sku = region.template_sku(lines)
+            if sku is None:
+                sku, first_line, last_line = _find_sku_in_lines(lines)
+                if sku:
+                    region.fingerprint(lines, first_line, last_line)
+        except Exception:
+            sku = None
+        region.clip_seconds += time.perf_counter() - start
+        region.clip_reads += 1
+        if sku:
+            region.hits += 1
+            return sku
+        # Clip missed: the full page decides
+        region.missed()
+
     try:
         # Get text, preserving line breaks reasonably well
-        text = page.get_text("text")
-        # Split into lines and remove leading/trailing whitespace from each
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        start = time.perf_counter()
+        lines = _text_lines(page)
+        if region is not None:
+            region.full_seconds += time.perf_counter() - start
+            region.full_reads += 1
     except Exception as e:
-        if status_callback: status_callback(f"    Error getting text from page {page.number + 1 if page else 'N/A'}: {e}\n")
+        as_reporter(progress).error("Could not get text from page %s: %s", page.number + 1 if page else 'N/A', e, depth=2)
         return None
 
     if not lines:
-        if status_callback: status_callback(f"    Warn: No text lines found on page {page.number + 1}.\n")
+        as_reporter(progress).warning("No text lines found on page %d.", page.number + 1, depth=2)
         return None
 
-    # --- Define Patterns ---
-    sku_header_patterns = ["single sku", "単一のsku"]
-    # Looks for Menge/Qty/数量, followed by whitespace, then one or more digits. Allows other text after. Case-insensitive.
-    quantity_line_pattern = re.compile(r'(?:Menge|Qty|数量)\s+\d+', re.IGNORECASE) # Removed '$' anchor
-    # Validates if a string looks like a plausible SKU (alphanumeric, underscore, hyphen, dot, plus)
-    valid_sku_chars_regex = re.compile(r'^[A-Z0-9_.+-]+$', re.IGNORECASE) # Added '+'
+    sku, first_line, last_line = _find_sku_in_lines(lines)
+    if sku and region is not None:
+        region.learn(page, lines, first_line, last_line)
+    return sku
+
+def _text_lines(page, clip=None):
+    """Non-empty, stripped text lines of the page (or of the clip rect on it)."""
+    text = page.get_text("text", clip=clip)
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def _find_sku_in_lines(lines):
+    """
+    The SKU structure search of find_sku_on_page on a page's text lines.
+    Returns tuple: (SKU or None, index of the header line, index of the quantity line)
+    """
+    quantity_line_pattern = QUANTITY_LINE_PATTERN
+    valid_sku_chars_regex = VALID_SKU_PATTERN
 
     # --- Find SKU based on Structure ---
-    sku_header_line_index = -1
-
-    # 1. Find the SKU header line
-    for i, line in enumerate(lines):
-        line_lower = line.lower()
-        for pattern in sku_header_patterns:
-            if pattern in line_lower:
-                sku_header_line_index = i
-                # if status_callback: status_callback(f"Debug: Found SKU header '{pattern}' on line {i+1}") # Debug
-                break # Stop checking patterns for this line
-        if sku_header_line_index != -1:
-            break # Stop checking lines
+    # 1. Find the SKU header line: the first line with any locale's header, in one pass over the text
+    text = "\n".join(lines).lower()
+    header_match = SKU_HEADER_PATTERN.search(text)
+    sku_header_line_index = text.count("\n", 0, header_match.start()) if header_match else -1
 
     if sku_header_line_index == -1:
-        # if status_callback: status_callback(f"Debug: No SKU header line found on page {page.number + 1}") # Debug
-        return None # Header not found, cannot proceed with this logic
+        # as_reporter(progress).info(f"Debug: No SKU header line found on page {page.number + 1}") # Debug
+        return None, -1, -1 # Header not found, cannot proceed with this logic
 
     # 2. Check lines following the header
     line_after_header = lines[sku_header_line_index + 1] if sku_header_line_index + 1 < len(lines) else None
@@ -59,30 +169,172 @@ def find_sku_on_page(page, status_callback):
 
     potential_sku = None
 
+    quantity_line_index = -1
+
     # Scenario 1: Quantity line is 2 lines after header (SKU is 1 line)
     if line_two_after_header and quantity_line_pattern.search(line_two_after_header):
-        # if status_callback: status_callback(f"Debug: Scenario 1 detected. Qty line: '{line_two_after_header}'") # Debug
+        # as_reporter(progress).info(f"Debug: Scenario 1 detected. Qty line: '{line_two_after_header}'") # Debug
         if line_after_header:
             potential_sku = line_after_header
-            # if status_callback: status_callback(f"Debug: Potential 1-line SKU: '{potential_sku}'") # Debug
+            quantity_line_index = sku_header_line_index + 2
+            # as_reporter(progress).info(f"Debug: Potential 1-line SKU: '{potential_sku}'") # Debug
 
     # Scenario 2: Quantity line is 3 lines after header (SKU is 2 lines)
     elif line_three_after_header and quantity_line_pattern.search(line_three_after_header):
-        # if status_callback: status_callback(f"Debug: Scenario 2 detected. Qty line: '{line_three_after_header}'") # Debug
+        # as_reporter(progress).info(f"Debug: Scenario 2 detected. Qty line: '{line_three_after_header}'") # Debug
         if line_after_header and line_two_after_header:
             # Combine the two lines presumed to be the SKU
             potential_sku = line_after_header + line_two_after_header
-            # if status_callback: status_callback(f"Debug: Potential 2-line SKU: '{potential_sku}'") # Debug
+            quantity_line_index = sku_header_line_index + 3
+            # as_reporter(progress).info(f"Debug: Potential 2-line SKU: '{potential_sku}'") # Debug
 
     # 3. Validate the potential SKU
     if potential_sku:
         # Basic validation: check if it contains valid characters
         if valid_sku_chars_regex.match(potential_sku):
-            # if status_callback: status_callback(f"Debug: Valid SKU found: '{potential_sku}'") # Debug
-            return potential_sku
+            # as_reporter(progress).info(f"Debug: Valid SKU found: '{potential_sku}'") # Debug
+            return potential_sku, sku_header_line_index, quantity_line_index
         else:
-            # if status_callback: status_callback(f"Debug: Potential SKU '{potential_sku}' failed validation.") # Debug
-            return None # Failed validation
+            # as_reporter(progress).info(f"Debug: Potential SKU '{potential_sku}' failed validation.") # Debug
+            return None, -1, -1 # Failed validation
     else:
-        # if status_callback: status_callback(f"Debug: No SKU found matching scenarios on page {page.number + 1}") # Debug
-        return None # Did not fit either scenario
+        # as_reporter(progress).info(f"Debug: No SKU found matching scenarios on page {page.number + 1}") # Debug
+        return None, -1, -1 # Did not fit either scenario
+
+class LabelTemplate:
+    """
+    A label template of LABEL_TEMPLATES, with its quantity line pattern compiled (the
+    quantity word starts the line on the templates).
+    """
+
+    def __init__(self, name, header, quantity, sku_lines):
+        self.name = name
+        self.header = header
+        self.sku_lines = sku_lines
+        self.quantity_pattern = re.compile(rf'{re.escape(quantity)}\s+\d+', re.IGNORECASE)
+
+    def matches(self, lines, header_line, quantity_line):
+        """True if the SKU block found at these lines is of this template."""
+        return (quantity_line - header_line - 1 == self.sku_lines
+                and self.header in lines[header_line].lower()
+                and self.quantity_pattern.match(lines[quantity_line]) is not None)
+
+    def extract(self, lines, header_line):
+        """
+        The SKU of a block of this template whose header is at lines[header_line], or None
+        if the lines do not fit. Only returns an SKU the generic search would find too.
+        """
+        quantity_line = header_line + 1 + self.sku_lines
+        if quantity_line >= len(lines) or not self.quantity_pattern.match(lines[quantity_line]):
+            return None
+        if self.header not in lines[header_line].lower():
+            return None
+        # The generic search takes the first header line, and a one-line SKU before a two-line one
+        if header_line and _has_header(lines[:header_line]):
+            return None
+        if self.sku_lines == 1:
+            sku = lines[header_line + 1]
+        elif QUANTITY_LINE_PATTERN.search(lines[header_line + 2]):
+            return None
+        else:
+            sku = lines[header_line + 1] + lines[header_line + 2]
+        return sku if VALID_SKU_PATTERN.match(sku) else None
+
+def _has_header(lines):
+    return SKU_HEADER_PATTERN.search("\n".join(lines).lower()) is not None
+
+TEMPLATES = [LabelTemplate(**template) for template in LABEL_TEMPLATES]
+
+class SkuRegion:
+    """
+    Where the SKU block sits on the labels of one document. Amazon prints it in the
+    same spot on every label, so the header-to-quantity lines of the first page with
+    an SKU give a clip rect (a full-width band with a margin) that later pages are
+    read from. A page where the clip misses but the full page has an SKU relearns the
+    rect. Pages without an SKU (carrier labels) are read twice, clip and full page,
+    so the clip is dropped once those extra reads cost more than the clip saves.
+    Once FINGERPRINT_PAGES clips in a row show the same label template with the header
+    on the same line, that template's extractor reads the clips of later pages.
+    """
+    MIN_MISSES = 8
+    FINGERPRINT_PAGES = 3
+
+    def __init__(self):
+        self.rect = None
+        self.page_rect = None
+        self.disabled = False
+        self.hits = 0
+        self.misses = 0
+        self.relearned = 0
+        self.clip_seconds = 0.0
+        self.clip_reads = 0
+        self.full_seconds = 0.0
+        self.full_reads = 0
+        self.template = None
+        self.header_line = None
+        self.template_hits = 0
+        self._candidate = None
+        self._candidate_pages = 0
+
+    def template_sku(self, lines):
+        """The SKU in the clip's lines by the known template, or None (then the generic search decides)."""
+        if self.template is None:
+            return None
+        sku = self.template.extract(lines, self.header_line)
+        if sku:
+            self.template_hits += 1
+        return sku
+
+    def fingerprint(self, lines, header_line, quantity_line):
+        """Matches an SKU block found by the generic search in a clip against the known templates."""
+        template = next((t for t in TEMPLATES if t.matches(lines, header_line, quantity_line)), None)
+        candidate = (template, header_line) if template else None
+        if candidate is not None and candidate == self._candidate:
+            self._candidate_pages += 1
+        else:
+            self._candidate = candidate
+            self._candidate_pages = 1
+        if candidate is not None and self._candidate_pages >= self.FINGERPRINT_PAGES:
+            self.template, self.header_line = candidate
+
+    def missed(self):
+        """Counts a clip read that found no SKU; drops the clip if it no longer pays off."""
+        self.misses += 1
+        if self.misses < self.MIN_MISSES or not self.full_reads:
+            return
+        clip_cost = self.clip_seconds / self.clip_reads
+        saved = self.hits * (self.full_seconds / self.full_reads - clip_cost)
+        if self.misses * clip_cost > saved:
+            self.rect = None
+            self.disabled = True
+
+    def learn(self, page, lines, first_line, last_line):
+        """Takes the clip rect from lines first_line..last_line (the SKU block) of page."""
+        if self.disabled:
+            return
+        if self.page_rect is not None:
+            self.relearned += 1
+            if self.relearned > self.MIN_MISSES and self.relearned > self.hits:
+                # The block moves from page to page
+                self.rect = None
+                self.disabled = True
+                return
+        self.rect = None
+        self.page_rect = page.rect
+        self.template = self.header_line = self._candidate = None
+        # The "text" lines come in the same order as the lines of the "dict" extraction
+        boxes = []
+        for block in page.get_text("dict")["blocks"]:
+            for line in block.get("lines", ()):
+                text = "".join(span["text"] for span in line["spans"]).strip()
+                if text:
+                    boxes.append((text, line["bbox"]))
+        if len(boxes) != len(lines) or any(text != line for (text, _), line in zip(boxes, lines)):
+            return
+        top = min(bbox[1] for _, bbox in boxes[first_line:last_line + 1])
+        bottom = max(bbox[3] for _, bbox in boxes[first_line:last_line + 1])
+        line_height = max(bbox[3] - bbox[1] for _, bbox in boxes[first_line:last_line + 1])
+        # One line of margin above, two below: room for an SKU printed on two lines.
+        # Text coordinates are those of the unrotated page
+        area = page.rect * page.derotation_matrix
+        self.rect = area & (area.x0, top - line_height, area.x1, bottom + 2 * line_height)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark and parity check for the process_csv grouping engines.
+
+Writes a synthetic box-content CSV (shuffled, comma-separated Box IDs, SKUs
+split over several rows, blank and short rows), runs process_csv with the
+python and pandas engines, checks that both return identical groups and
+prints the time taken by each.
+
+Usage: python benchmarks/bench_csv_engines.py [--boxes 1000000] [--skus 2000]
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pdf_splitter import process_csv
+
+def write_csv(path, shipment_id, boxes, skus, seed=1):
+    """Write a box-content CSV with irregular rows mixed in."""
+    rng = random.Random(seed)
+    box_ids = [f"{shipment_id}U{n:06d}" for n in range(1, boxes + 1)]
+    rng.shuffle(box_ids)
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Shipment ID", shipment_id])
+        writer.writerow(["Name", "Benchmark shipment"])
+        writer.writerow([])
+        writer.writerow(["Merchant SKU", "Title", "SKU", "ASIN", "Units", "Total boxes", "Box ID"])
+        position = 0
+        while position < boxes:
+            count = rng.randint(1, 40)
+            sku_number = rng.randrange(skus)
+            row_boxes = box_ids[position:position + count]
+            position += count
+            writer.writerow([f"M{sku_number}", "Item, with comma", f"SKU-{sku_number:05d}",
+                             f"B0{sku_number:08d}", count, len(row_boxes), ", ".join(row_boxes)])
+            roll = rng.random()
+            if roll < 0.01:
+                writer.writerow([])
+            elif roll < 0.02:
+                writer.writerow(["Totals", "", ""])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the python and pandas CSV engines')
+    parser.add_argument('--boxes', type=int, default=1000000, help='Number of Box IDs (default: 1000000)')
+    parser.add_argument('--skus', type=int, default=2000, help='Number of distinct SKUs (default: 2000)')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "FBA15BENCH.csv")
+        write_csv(csv_path, "FBA15BENCH", args.boxes, args.skus)
+        print(f"CSV: {args.boxes} boxes, {args.skus} SKUs, {os.path.getsize(csv_path) / 1e6:.1f} MB")
+
+        results = {}
+        for engine in ("python", "pandas"):
+            start = time.perf_counter()
+            results[engine] = process_csv(csv_path, engine=engine)
+            elapsed = time.perf_counter() - start
+            print(f"  {engine:<7} {elapsed:8.3f}s  {args.boxes / elapsed:12.0f} boxes/sec")
+
+    if results["python"] != results["pandas"]:
+        print("FAILED: engines returned different groups")
+        return 1
+    print(f"Parity OK: {len(results['python'][1])} identical groups")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
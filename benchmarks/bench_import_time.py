@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Start-up time guard for the pdf_splitter CLI.
+
+Parses `python -X importtime` output for `import pdf_splitter` and
+`import process_all`, and runs process_csv on a small CSV in a fresh
+interpreter. Fails (exit code 1) if pandas is imported anywhere on the
+CLI path, if fitz is imported before a PDF is opened, or if the
+cumulative import time exceeds the budget.
+
+Usage: python benchmarks/bench_import_time.py [--budget-ms 100] [--repeat 5]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Modules that must not be loaded just by importing the CLI modules
+HEAVY_MODULES = ("pandas", "numpy", "fitz", "pymupdf", "multiprocessing")
+
+def import_times(module):
+    """
+    Import module in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (cumulative microseconds for module, set of top-level packages imported)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    cumulative = None
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        if not self_us.isdigit():
+            continue  # column header line
+        packages.add(name.split(".")[0])
+        if name == module:
+            cumulative = int(cumulative_us)
+    return cumulative, packages
+
+def modules_after_process_csv(csv_path):
+    """Run process_csv in a fresh interpreter and return the heavy modules it loaded."""
+    code = ("import sys, pdf_splitter; "
+            f"pdf_splitter.process_csv({csv_path!r}); "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    return [m for m in result.stdout.strip().split(",") if m]
+
+def main():
+    parser = argparse.ArgumentParser(description='Guard CLI import time against regressions')
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help='Maximum cumulative import time of pdf_splitter in ms (default: 100)')
+    parser.add_argument('--repeat', type=int, default=5, help='Imports per module, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    failures = []
+    for module in ("pdf_splitter", "process_all"):
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best_us = min(cumulative for cumulative, _ in runs)
+        heavy = sorted(set(HEAVY_MODULES) & runs[0][1])
+        print(f"import {module:<13} {best_us / 1000:8.1f} ms  heavy modules: {', '.join(heavy) or 'none'}")
+        if heavy:
+            failures.append(f"{module} imports {', '.join(heavy)}")
+        if best_us / 1000 > args.budget_ms:
+            failures.append(f"{module} import took {best_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "FBA15IMPORT.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("Shipment ID,FBA15IMPORT\n\nSKU,ASIN,Total boxes,Box ID\n")
+            f.write('SKU-1,B000000001,2,"FBA15IMPORTU000001, FBA15IMPORTU000002"\n')
+        loaded = modules_after_process_csv(csv_path)
+        print(f"process_csv loads:  {', '.join(loaded) or 'none'}")
+        if loaded:
+            failures.append(f"process_csv imports {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
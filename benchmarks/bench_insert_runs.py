@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark for pdf_processor._create_grouped_output_pdfs.
+
+Compares the previous one-insert_pdf-call-per-page loop with the coalesced
+run insertion, in standard and interleaved mode, and prints pages/sec.
+
+Usage: python benchmarks/bench_insert_runs.py [--pages 3000] [--skus 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "FbaShipmentSplitBuild"))
+from pdf_processor import _create_grouped_output_pdfs
+from label_fixtures import make_label_pdf, sku_layout
+
+def per_page_insertion(doc, sku_output_pages, output_dir):
+    """The insertion loop before coalescing: one insert_pdf call per page."""
+    for number, (sku, page_list) in enumerate(sku_output_pages.items(), 1):
+        new_doc = fitz.open()
+        for page_num in sorted(page_list):
+            if 0 <= page_num < len(doc):
+                new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+        new_doc.save(os.path.join(output_dir, f"{number}_{sku}.pdf"))
+        new_doc.close()
+
+def coalesced_insertion(doc, sku_output_pages, output_dir):
+    _create_grouped_output_pdfs(doc, sku_output_pages, "FBA15TESTBENCH", output_dir, lambda message: None)
+
+def output_pages(layout, interleaved):
+    """Page lists per SKU as process_single_pdf_document would compute them."""
+    pages = {}
+    step = 2 if interleaved else 1
+    first = 0
+    for sku, box_count in layout:
+        pages[sku] = list(range(first, first + box_count * step))
+        first += box_count * step
+    return pages
+
+def run(name, insert, doc, sku_output_pages, repeat):
+    total_pages = sum(len(p) for p in sku_output_pages.values())
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            insert(doc, sku_output_pages, output_dir)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {name:<12} {best:8.3f}s  {total_pages / best:10.0f} pages/sec")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-page vs coalesced insert_pdf')
+    parser.add_argument('--pages', type=int, default=3000, help='Number of box labels (default: 3000)')
+    parser.add_argument('--skus', type=int, default=20, help='Number of SKUs (default: 20)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    layout = sku_layout(args.pages, args.skus)
+    for interleaved in (False, True):
+        doc = make_label_pdf(layout, interleaved=interleaved)
+        sku_output_pages = output_pages(layout, interleaved)
+        print(f"{'Interleaved' if interleaved else 'Standard'} mode: {len(doc)} pages, {args.skus} SKUs")
+        before = run("per-page", per_page_insertion, doc, sku_output_pages, args.repeat)
+        after = run("coalesced", coalesced_insertion, doc, sku_output_pages, args.repeat)
+        print(f"  speedup      {before / after:8.2f}x")
+        doc.close()
+
+if __name__ == "__main__":
+    main()
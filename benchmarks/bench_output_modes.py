@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the output modes of pdf_splitter.split_pdf.
+
+Splits the same label PDF into one PDF per SKU (the default) and into a single
+bookmarked PDF, and prints the time and bytes written for each mode. The label
+pages carry an embedded font and image, which the N-file mode copies into every
+SKU file.
+
+Usage: python benchmarks/bench_output_modes.py [--pages 3000] [--skus 50]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pdf_splitter import split_pdf
+from label_fixtures import make_label_pdf, sku_layout
+
+SHIPMENT_ID = "FBA15TESTBENCH"
+
+def groups_for(layout):
+    """SKU groups as process_csv would return them for this layout."""
+    groups = []
+    first = 1
+    for row_num, (sku, box_count) in enumerate(layout, 1):
+        groups.append({
+            "RowNum": row_num,
+            "SKU": sku,
+            "ASIN": f"B{row_num:09d}",
+            "TotalBoxes": box_count,
+            "PageRange": (first, first + box_count - 1)
+        })
+        first += box_count
+    return groups
+
+def directory_bytes(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+def run(name, pdf_path, groups, repeat, **options):
+    best = None
+    written = 0
+    files = 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            split_pdf(pdf_path, SHIPMENT_ID, groups, output_dir, **options)
+            elapsed = time.perf_counter() - start
+            written = directory_bytes(output_dir)
+            files = len(os.listdir(output_dir))
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {name:<12} {best:8.3f}s  {written / 1e6:9.2f} MB in {files} file(s)")
+    return best, written
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark one PDF per SKU vs one bookmarked PDF')
+    parser.add_argument('--pages', type=int, default=3000, help='Number of box labels (default: 3000)')
+    parser.add_argument('--skus', type=int, default=50, help='Number of SKUs (default: 50)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per mode, best time is reported (default: 3)')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    layout = sku_layout(args.pages, args.skus)
+    groups = groups_for(layout)
+    with tempfile.TemporaryDirectory() as work_dir:
+        pdf_path = os.path.join(work_dir, f"package-{SHIPMENT_ID}.pdf")
+        doc = make_label_pdf(layout, SHIPMENT_ID, embedded_resources=True)
+        doc.save(pdf_path, garbage=3, deflate=True)
+        doc.close()
+        print(f"Label PDF: {args.pages} pages, {args.skus} SKUs, {os.path.getsize(pdf_path) / 1e6:.2f} MB")
+
+        n_time, n_bytes = run("per-SKU", pdf_path, groups, args.repeat)
+        b_time, b_bytes = run("bookmarked", pdf_path, groups, args.repeat, bookmarked=True)
+        print(f"  bookmarked is {n_time / b_time:.2f}x faster and writes {n_bytes / max(b_bytes, 1):.2f}x fewer bytes")
+
+if __name__ == "__main__":
+    main()
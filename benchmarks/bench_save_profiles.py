@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the save profiles of the split outputs (output_sinks.SAVE_PROFILES).
+
+Splits a label PDF whose pages carry an embedded font and image with every
+profile, one PDF per SKU and as a single bookmarked PDF, and prints the write
+time against the bytes written.
+
+Usage: python benchmarks/bench_save_profiles.py [--pages 3000] [--skus 50]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pdf_splitter import split_pdf
+from output_sinks import SAVE_PROFILES
+from label_fixtures import make_label_pdf, sku_layout
+from bench_output_modes import SHIPMENT_ID, groups_for, directory_bytes
+
+def run(pdf_path, groups, repeat, save_profile, bookmarked):
+    best = None
+    written = 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            split_pdf(pdf_path, SHIPMENT_ID, groups, output_dir, bookmarked=bookmarked, save_profile=save_profile)
+            elapsed = time.perf_counter() - start
+            written = directory_bytes(output_dir)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, written
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark write time vs output size per save profile')
+    parser.add_argument('--pages', type=int, default=3000, help='Number of box labels (default: 3000)')
+    parser.add_argument('--skus', type=int, default=50, help='Number of SKUs (default: 50)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per profile, best time is reported (default: 3)')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    layout = sku_layout(args.pages, args.skus)
+    groups = groups_for(layout)
+    with tempfile.TemporaryDirectory() as work_dir:
+        pdf_path = os.path.join(work_dir, f"package-{SHIPMENT_ID}.pdf")
+        doc = make_label_pdf(layout, SHIPMENT_ID, embedded_resources=True)
+        doc.save(pdf_path)
+        doc.close()
+        print(f"Label PDF: {args.pages} pages, {args.skus} SKUs, {os.path.getsize(pdf_path) / 1e6:.2f} MB")
+
+        for bookmarked in (False, True):
+            print("One bookmarked PDF:" if bookmarked else "One PDF per SKU:")
+            baseline = None
+            for save_profile in SAVE_PROFILES:
+                elapsed, written = run(pdf_path, groups, args.repeat, save_profile, bookmarked)
+                baseline = baseline or written
+                print(f"  {save_profile:<8} {elapsed:8.3f}s  {written / 1e6:9.2f} MB  {written / baseline:6.2f}x size")
+
+if __name__ == "__main__":
+    main()
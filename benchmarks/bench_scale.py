@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+End-to-end scale benchmark over synthetic shipments (see shipment_generator.py).
+
+Scenarios:
+    split_pdf         process_csv + split_pdf on one shipment (CSV pipeline)
+    single_pdf        process_single_pdf_document on one label PDF (label-text pipeline)
+    process_all       process_all.py on a folder of shipments (CSV batch entry point)
+    process_shipment  pdf_processor.process_shipment on a folder of PDFs (GUI batch entry point)
+
+The single-shipment scenarios run for every --pages size, the folder scenarios
+for every --shipments count. Each run happens in a fresh child process, which
+reports the time taken, its peak resident set size and the bytes of output it
+wrote; pages/sec counts label pages read. Results are printed as a table and,
+with --output, appended to a JSON file so runs can be compared.
+
+Usage:
+    python benchmarks/bench_scale.py                       (quick preset)
+    python benchmarks/bench_scale.py --preset full --output scale.json
+    python benchmarks/bench_scale.py --pages 10,5000 --shipments 1,200 --scenarios split_pdf,process_all
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import platform
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCH_DIR, "..")
+GUI_DIR = os.path.join(ROOT_DIR, "FbaShipmentSplitBuild")
+
+SCENARIOS = ("split_pdf", "single_pdf", "process_all", "process_shipment")
+FOLDER_SCENARIOS = ("process_all", "process_shipment")
+
+PRESETS = {
+    # label pages of the single-shipment runs, shipments of the folder runs
+    "quick": {"pages": [10, 1000], "shipments": [1, 20]},
+    "full": {"pages": [10, 1000, 10000, 50000], "shipments": [1, 100, 1000]},
+}
+
+def peak_rss_bytes():
+    """Peak RSS of this process and its finished children, None where unavailable (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports kilobytes, macOS bytes
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+def tree_bytes(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(parent, name))
+               for parent, _, names in os.walk(path) for name in names)
+
+def run_scenario(scenario, directory, jobs):
+    """Child process side: run one scenario on directory and return its measurements."""
+    logging.disable(logging.INFO)
+    before = set(os.listdir(directory))
+
+    if scenario in ("single_pdf", "process_shipment"):
+        sys.path.insert(0, GUI_DIR)
+        from pdf_processor import process_single_pdf_document, process_shipment
+    else:
+        sys.path.insert(0, ROOT_DIR)
+        import process_all
+        from pdf_splitter import process_csv, split_pdf
+
+    start = time.perf_counter()
+    if scenario == "split_pdf":
+        csv_name = next(name for name in before if name.endswith(".csv"))
+        pdf_name = next(name for name in before if name.endswith(".pdf"))
+        shipment_id, groups = process_csv(os.path.join(directory, csv_name))
+        split_pdf(os.path.join(directory, pdf_name), shipment_id, groups,
+                  os.path.join(directory, f"shipment_{shipment_id}"), jobs=jobs)
+    elif scenario == "single_pdf":
+        pdf_name = next(name for name in before if name.endswith(".pdf"))
+        success, _ = process_single_pdf_document(os.path.join(directory, pdf_name), None, None)
+        if not success:
+            raise RuntimeError("process_single_pdf_document failed")
+    elif scenario == "process_all":
+        sys.argv = ["process_all.py", directory, "--force", "--jobs", str(jobs)]
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                status = process_all.main()
+            finally:
+                sys.stdout = stdout
+        if status:
+            raise RuntimeError("process_all.py reported failed shipments")
+    else:
+        _, fail_count, _, _ = process_shipment(directory, True, None, None)
+        if fail_count:
+            raise RuntimeError(f"process_shipment failed on {fail_count} PDF(s)")
+    seconds = time.perf_counter() - start
+
+    written = sum(tree_bytes(os.path.join(directory, name)) for name in set(os.listdir(directory)) - before)
+    return {"seconds": seconds, "bytes_written": written, "peak_rss": peak_rss_bytes()}
+
+def measure(scenario, directory, jobs):
+    """Runs a scenario in a fresh child process and removes the outputs it wrote."""
+    before = set(os.listdir(directory))
+    command = [sys.executable, os.path.abspath(__file__), "--child", scenario, directory, "--jobs", str(jobs)]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True)
+    finally:
+        for name in set(os.listdir(directory)) - before:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{scenario} failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def build_corpus(work_dir, pages_sizes, shipment_counts, batch_pages, seed):
+    """Generate the shipment folders. Returns (kind, size, directory, shipments, pages) tuples."""
+    from shipment_generator import generate_folder
+
+    corpus = []
+    for pages in pages_sizes:
+        directory = os.path.join(work_dir, f"single_{pages}")
+        generated = generate_folder(directory, 1, pages, skus=max(1, pages // 25), seed=seed)
+        corpus.append(("single", pages, directory, 1, generated[0][3]))
+    for shipments in shipment_counts:
+        directory = os.path.join(work_dir, f"folder_{shipments}")
+        generated = generate_folder(directory, shipments, batch_pages[0], batch_pages[1], seed=seed)
+        corpus.append(("folder", shipments, directory, shipments, sum(g[3] for g in generated)))
+    return corpus
+
+def _size_list(text):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end scale benchmark over synthetic shipments')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick', help='Sizes to run (default: quick)')
+    parser.add_argument('--pages', type=_size_list, help='Comma-separated label page counts of the single-shipment runs')
+    parser.add_argument('--shipments', type=_size_list, help='Comma-separated shipment counts of the folder runs')
+    parser.add_argument('--batch-pages', type=_size_list, default=[10, 100],
+                        help='Page count range MIN,MAX of each shipment in the folder runs (default: 10,100)')
+    parser.add_argument('--scenarios', default=",".join(SCENARIOS),
+                        help=f'Comma-separated scenarios to run (default: {",".join(SCENARIOS)})')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='--jobs for split_pdf and process_all (default: 1)')
+    parser.add_argument('--seed', type=int, default=1, help='Generator seed (default: 1)')
+    parser.add_argument('--keep', metavar='DIR', help='Generate the corpus into DIR and keep it')
+    parser.add_argument('--output', metavar='JSON', help='Append the results to this JSON file')
+    parser.add_argument('--child', nargs=2, metavar=('SCENARIO', 'DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child[0], args.child[1], args.jobs)))
+        return 0
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    pages_sizes = args.pages or PRESETS[args.preset]["pages"]
+    shipment_counts = args.shipments or PRESETS[args.preset]["shipments"]
+    batch_pages = (args.batch_pages * 2)[:2]
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix="bench_scale_")
+    results = []
+    try:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Generate in a separate process: children inherit the peak RSS of the process that starts them
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            corpus = executor.submit(build_corpus, work_dir, pages_sizes, shipment_counts, batch_pages,
+                                     args.seed).result()
+        print(f"Generated {sum(entry[4] for entry in corpus)} label pages in {time.perf_counter() - start:.1f}s")
+        print(f"{'scenario':<17} {'shipments':>9} {'pages':>7} {'seconds':>9} {'pages/sec':>10} "
+              f"{'peak RSS':>10} {'written':>10}")
+
+        for scenario in scenarios:
+            kind = "folder" if scenario in FOLDER_SCENARIOS else "single"
+            for entry_kind, _, directory, shipments, pages in corpus:
+                if entry_kind != kind:
+                    continue
+                measured = measure(scenario, directory, args.jobs)
+                result = dict(scenario=scenario, shipments=shipments, pages=pages, jobs=args.jobs,
+                              pages_per_sec=pages / measured["seconds"], **measured)
+                results.append(result)
+                rss = f"{result['peak_rss'] / 1e6:8.1f}MB" if result["peak_rss"] else f"{'n/a':>10}"
+                print(f"{scenario:<17} {shipments:>9} {pages:>7} {result['seconds']:>9.3f} "
+                      f"{result['pages_per_sec']:>10.0f} {rss} {result['bytes_written'] / 1e6:>8.2f}MB")
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        history = []
+        if os.path.exists(args.output):
+            with open(args.output, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        history.append({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                        "results": results})
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(history, f, indent=4)
+        print(f"Results appended to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
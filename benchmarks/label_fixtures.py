@@ -0,0 +1,87 @@
+"""
+Synthetic label PDFs for the benchmarks.
+
+Pages follow the "Single SKU / <sku> / Qty <n>" text layout that
+sku_finder.find_sku_on_page parses, with one page per box. With
+embedded_resources, every page is drawn over a shared template carrying an
+embedded (subset) TrueType font and an image, as real carrier labels do, so
+the cost of copying resources into split outputs shows up in the numbers.
+"""
+
+import random
+
+import fitz  # PyMuPDF
+
+LABEL_WIDTH = 288   # 4x6 inch label
+LABEL_HEIGHT = 432
+CHUNK_PAGES = 200
+
+def _label_template():
+    """One-page document with an embedded font subset and an incompressible image."""
+    template = fitz.open()
+    page = template.new_page(width=LABEL_WIDTH, height=LABEL_HEIGHT)
+    page.insert_font(fontname="label", fontbuffer=fitz.Font("cjk").buffer)
+    page.insert_text((20, 24), "Amazon.com Services, Inc. / FBA", fontsize=8, fontname="label")
+    noise = random.Random(7)
+    pixels = bytes(noise.getrandbits(8) for _ in range(160 * 160))
+    image = fitz.Pixmap(fitz.csGRAY, 160, 160, pixels, False)
+    page.insert_image(fitz.Rect(64, 100, 224, 260), stream=image.tobytes("png"))
+    template.subset_fonts()
+    return fitz.open("pdf", template.tobytes(garbage=3, deflate=True))
+
+def make_label_pdf(sku_boxes, shipment_id="FBA15TESTBENCH", interleaved=False, embedded_resources=False):
+    """
+    Build a label PDF in memory.
+
+    Args:
+        sku_boxes: List of (sku, box_count) tuples, in page order
+        shipment_id: Shipment ID printed in each Box ID
+        interleaved: Add a carrier label page (no SKU) after every box label
+        embedded_resources: Draw the pages over a shared template with an embedded font and image
+
+    Returns:
+        fitz.Document: The open label document
+    """
+    doc = fitz.open()
+    template = _label_template() if embedded_resources else None
+    # Pages are drawn into small chunk documents that are appended to doc: drawing on
+    # a page gets slower the more pages its document has
+    chunk = fitz.open()
+    font = fitz.Font("helv")
+    box_number = 1
+    for sku, box_count in sku_boxes:
+        for _ in range(box_count):
+            page = chunk.new_page(width=LABEL_WIDTH, height=LABEL_HEIGHT)
+            if template:
+                page.show_pdf_page(page.rect, template, 0)
+            writer = fitz.TextWriter(page.rect)
+            writer.append((20, 40), "FBA: Amazon.com Services", font=font, fontsize=9)
+            writer.append((20, 60), f"{shipment_id}U{box_number:06d}", font=font, fontsize=12)
+            writer.append((20, 300), "Single SKU", font=font, fontsize=9)
+            writer.append((20, 315), sku, font=font, fontsize=9)
+            writer.append((20, 330), "Qty 1", font=font, fontsize=9)
+            writer.write_text(page)
+            box_number += 1
+            if interleaved:
+                carrier = chunk.new_page(width=LABEL_WIDTH, height=LABEL_HEIGHT)
+                if template:
+                    carrier.show_pdf_page(carrier.rect, template, 0)
+                writer = fitz.TextWriter(carrier.rect)
+                writer.append((20, 40), "UPS GROUND", font=font, fontsize=14)
+                writer.append((20, 80), f"TRACKING #: 1Z{box_number:016d}", font=font, fontsize=9)
+                writer.write_text(carrier)
+            if len(chunk) >= CHUNK_PAGES:
+                doc.insert_pdf(chunk)
+                chunk.close()
+                chunk = fitz.open()
+    if len(chunk):
+        doc.insert_pdf(chunk)
+    chunk.close()
+    if template:
+        template.close()
+    return doc
+
+def sku_layout(total_pages, sku_count):
+    """Spread total_pages boxes over sku_count SKUs as evenly as possible."""
+    base, extra = divmod(total_pages, sku_count)
+    return [(f"SKU-{i + 1:04d}", base + (1 if i < extra else 0)) for i in range(sku_count)]
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Synthetic shipment generator for the benchmarks and for trying out the splitter.
+
+Writes realistic Amazon box-content CSVs (preamble rows with a 'Shipment ID'
+line, a header row, SKUs split over several rows in shuffled order and
+comma-separated Box IDs) together with the matching label PDF for each
+shipment. Page N of a label PDF is the label of Box ID <shipment>U<N>, in the
+"Single SKU / <sku> / Qty <n>" layout that sku_finder.find_sku_on_page parses,
+so both the CSV pipeline (process_all.py) and the label-text pipeline split the
+files into the same SKU groups.
+
+Files are named <shipment>-boxes.csv and package-<shipment>.pdf, which is what
+process_all.py pairs up and what the label-text pipeline takes the shipping ID from.
+
+Usage:
+    python benchmarks/shipment_generator.py OUTPUT_DIR [--shipments 10] [--pages 200]
+    python benchmarks/shipment_generator.py OUTPUT_DIR --shipments 1000 --pages 10 --max-pages 500
+    python benchmarks/shipment_generator.py . --sample     (sample_shipment.csv + sample_labels.pdf for example.py)
+"""
+
+import os
+import sys
+import csv
+import string
+import random
+import argparse
+
+from label_fixtures import make_label_pdf
+
+MIN_PAGES = 10
+MAX_PAGES = 50000
+MAX_SHIPMENTS = 1000
+
+PRODUCTS = ["Mug", "Tumbler", "Bottle", "Lunchbox", "Coaster", "Candle", "Notebook", "Planner",
+            "Tote", "Pouch", "Lanyard", "Keychain", "Puzzle", "Poster", "Sticker Pack", "Phone Case"]
+COLORS = ["Black", "White", "Navy", "Red", "Sage", "Sand", "Blush", "Teal"]
+
+def shipment_ids(count, seed=1):
+    """Distinct shipment IDs that look like Amazon's (FBA15 + 7 upper-case alphanumerics)."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_uppercase + string.digits
+    ids = []
+    seen = set()
+    while len(ids) < count:
+        shipment_id = "FBA15" + "".join(rng.choice(alphabet) for _ in range(7))
+        if shipment_id not in seen:
+            seen.add(shipment_id)
+            ids.append(shipment_id)
+    return ids
+
+def _product(n):
+    """SKU and listing title of product number n."""
+    product = PRODUCTS[n % len(PRODUCTS)]
+    color = COLORS[n // len(PRODUCTS) % len(COLORS)]
+    return f"{product.upper().replace(' ', '')}-{color.upper()}-{n:04d}", f"{color} {product}, Pack of {n % 4 + 1}"
+
+def random_layout(pages, rng, skus=None):
+    """
+    Split pages boxes over SKUs with uneven box counts, as real shipments have.
+
+    Args:
+        pages: Number of boxes (one label page each)
+        rng: random.Random instance
+        skus: Number of SKUs (default: about one per 25 boxes)
+
+    Returns:
+        list: (sku, box_count) tuples in page order
+    """
+    if skus is None:
+        skus = max(1, min(pages, round(pages / 25) + rng.randint(0, 3)))
+    skus = max(1, min(skus, pages))
+    # Random cut points give box counts from 1 to many times the average
+    cuts = sorted(rng.sample(range(1, pages), skus - 1)) if skus > 1 else []
+    counts = [b - a for a, b in zip([0] + cuts, cuts + [pages])]
+    names = rng.sample(range(10000), skus)
+    return [(_product(n)[0], count) for n, count in zip(names, counts)]
+
+def write_box_content_csv(path, shipment_id, sku_boxes, rng):
+    """
+    Write the box-content CSV of a shipment whose Box IDs <shipment_id>U000001...
+    are assigned to the SKUs in layout order.
+
+    Each SKU's boxes are spread over one to three rows and the rows are shuffled,
+    like the exports list them; sorted by Box ID they give the label page order again.
+    """
+    rows = []
+    box_number = 1
+    for sku, box_count in sku_boxes:
+        n = int(sku.rsplit("-", 1)[1])
+        title = _product(n)[1]
+        parts = min(box_count, rng.randint(1, 3))
+        cuts = sorted(rng.sample(range(1, box_count), parts - 1)) if parts > 1 else []
+        for first, last in zip([0] + cuts, cuts + [box_count]):
+            box_ids = [f"{shipment_id}U{box_number + i:06d}" for i in range(first, last)]
+            units = len(box_ids) * (n % 12 + 1)
+            rows.append([sku, title, sku, f"B0{n:08d}", f"X00{n:07d}", "New", "Seller", "None",
+                         "Seller", units, len(box_ids), ", ".join(box_ids)])
+        box_number += box_count
+    rng.shuffle(rows)
+
+    total_units = sum(row[9] for row in rows)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Shipment ID", shipment_id])
+        writer.writerow(["Name", f"FBA STA ({shipment_id[-7:]})-{rng.choice(['ABE2', 'CLT2', 'ONT8', 'TEB9'])}"])
+        writer.writerow(["Plan ID", f"PLN{rng.randrange(10 ** 9):09d}"])
+        writer.writerow(["Ship To", "Amazon.com Services, Inc., 705 Boulder Drive, Breinigsville, PA 18031"])
+        writer.writerow(["Total SKUs", len(sku_boxes)])
+        writer.writerow(["Total Units", total_units])
+        writer.writerow([])
+        writer.writerow(["Merchant SKU", "Title", "SKU", "ASIN", "FNSKU", "Condition", "Who will prep?",
+                         "Prep type", "Who will label?", "Shipped", "Total boxes", "Box ID"])
+        writer.writerows(rows)
+
+def generate_shipment(directory, shipment_id, pages, rng, skus=None, interleaved=False,
+                      csv_name=None, pdf_name=None):
+    """
+    Write one shipment (CSV + label PDF) into directory.
+
+    Args:
+        directory: Output directory
+        shipment_id: Shipment ID
+        pages: Number of boxes, i.e. label pages (carrier pages come on top when interleaved)
+        rng: random.Random instance
+        skus: Number of SKUs (default: see random_layout)
+        interleaved: Put a carrier label after every box label. The CSV pipeline cannot
+                     split such PDFs; they are for the label-text pipeline
+        csv_name, pdf_name: File names (default: <id>-boxes.csv and package-<id>.pdf)
+
+    Returns:
+        tuple: (csv_path, pdf_path, page_count)
+    """
+    sku_boxes = random_layout(pages, rng, skus)
+    csv_path = os.path.join(directory, csv_name or f"{shipment_id}-boxes.csv")
+    pdf_path = os.path.join(directory, pdf_name or f"package-{shipment_id}.pdf")
+    write_box_content_csv(csv_path, shipment_id, sku_boxes, rng)
+    doc = make_label_pdf(sku_boxes, shipment_id, interleaved=interleaved, embedded_resources=True)
+    page_count = len(doc)
+    doc.save(pdf_path, garbage=1, deflate=True)
+    doc.close()
+    return csv_path, pdf_path, page_count
+
+def generate_folder(directory, shipments=1, pages=200, max_pages=None, skus=None, interleaved=False, seed=1):
+    """
+    Write a folder of shipments.
+
+    Args:
+        directory: Output directory (created if missing)
+        shipments: Number of shipments (1 to 1000)
+        pages: Label pages per shipment (10 to 50000), or the smallest count with max_pages
+        max_pages: Draw each shipment's page count from pages..max_pages
+        skus: SKUs per shipment (default: scales with the page count)
+        interleaved: Interleave carrier labels (label-text pipeline only)
+        seed: Random seed; the same arguments always give the same files
+
+    Returns:
+        list: (shipment_id, csv_path, pdf_path, page_count) per shipment
+    """
+    max_pages = max_pages or pages
+    if not 1 <= shipments <= MAX_SHIPMENTS:
+        raise ValueError(f"shipments must be between 1 and {MAX_SHIPMENTS}")
+    if not MIN_PAGES <= pages <= max_pages <= MAX_PAGES:
+        raise ValueError(f"pages must be between {MIN_PAGES} and {MAX_PAGES}")
+
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    generated = []
+    for shipment_id in shipment_ids(shipments, seed):
+        csv_path, pdf_path, page_count = generate_shipment(directory, shipment_id, rng.randint(pages, max_pages),
+                                                           rng, skus, interleaved)
+        generated.append((shipment_id, csv_path, pdf_path, page_count))
+    return generated
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic shipments (box-content CSV + label PDF)')
+    parser.add_argument('directory', help='Output directory')
+    parser.add_argument('--shipments', type=int, default=10, help=f'Number of shipments, 1-{MAX_SHIPMENTS} (default: 10)')
+    parser.add_argument('--pages', type=int, default=200,
+                        help=f'Label pages per shipment, {MIN_PAGES}-{MAX_PAGES} (default: 200)')
+    parser.add_argument('--max-pages', type=int, help='Draw each page count between --pages and this')
+    parser.add_argument('--skus', type=int, help='SKUs per shipment (default: about one per 25 boxes)')
+    parser.add_argument('--interleaved', action='store_true',
+                        help='Carrier label after every box label (label-text pipeline only)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--sample', action='store_true',
+                        help='Write one small shipment as sample_shipment.csv + sample_labels.pdf (for example.py)')
+    args = parser.parse_args()
+
+    if args.sample:
+        os.makedirs(args.directory, exist_ok=True)
+        shipment_id = shipment_ids(1, args.seed)[0]
+        csv_path, pdf_path, page_count = generate_shipment(args.directory, shipment_id, 40, random.Random(args.seed),
+                                                           skus=5, csv_name="sample_shipment.csv",
+                                                           pdf_name="sample_labels.pdf")
+        print(f"Wrote {csv_path} and {pdf_path} ({page_count} pages)")
+        return 0
+
+    try:
+        generated = generate_folder(args.directory, args.shipments, args.pages, args.max_pages, args.skus,
+                                    args.interleaved, args.seed)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    total_pages = sum(page_count for *_, page_count in generated)
+    print(f"Wrote {len(generated)} shipment(s), {total_pages} label pages, to {args.directory}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
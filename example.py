@@ -3,10 +3,13 @@
 Example script demonstrating how to use the PDF Splitter.
 
 This script provides a simple example of how to use the PDF Splitter
-with sample data.
+with sample data. Create the sample files with:
+
+    python benchmarks/shipment_generator.py . --sample
 """
 
 import os
+import sys
 from pdf_splitter import process_csv, split_pdf
 
 def main():
@@ -15,6 +18,10 @@ def main():
     csv_path = "sample_shipment.csv"
     pdf_path = "sample_labels.pdf"
     
+    if not (os.path.exists(csv_path) and os.path.exists(pdf_path)):
+        print("Sample files not found. Create them with: python benchmarks/shipment_generator.py . --sample")
+        return 1
+    
     # Process the CSV file
     shipment_id, groups = process_csv(csv_path)
     
@@ -25,6 +32,7 @@ def main():
     split_pdf(pdf_path, shipment_id, groups, output_dir)
     
     print(f"Example completed. Check the '{output_dir}' directory for the split PDFs.")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
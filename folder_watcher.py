@@ -0,0 +1,198 @@
+"""
+Folder watcher for the batch splitter's --watch mode.
+
+Reports files once they have finished being written: a file is only handed out
+after its size and modification time have stayed the same for settle_seconds.
+On Linux, inotify (through ctypes, no extra dependency) tells the watcher which
+files to look at; elsewhere, or if inotify is unavailable, the folder is polled.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct("iIII")
+
+class _Inotify:
+    """Minimal inotify binding. Raises OSError if inotify is not available."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+
+    def add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = path
+
+    def read_events(self, timeout):
+        """
+        Waits up to timeout seconds for events.
+        Returns list of (path, mask); path is None after a queue overflow.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, mask))
+            elif wd in self.watches and name:
+                events.append((os.path.join(self.watches[wd], os.fsdecode(name)), mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class FolderWatcher:
+    """
+    Watches a folder and hands out files once they are completely written.
+
+    Args:
+        directory: Folder to watch
+        is_candidate: Function (file name) -> bool selecting the files of interest
+        is_excluded_dir: Function (folder name) -> bool for subfolders never to enter
+        recursive: Also watch subfolders
+        settle_seconds: How long size and mtime must stay unchanged
+        poll_interval: Seconds between scans when polling
+        use_inotify: Use inotify when available (otherwise always poll)
+    """
+
+    def __init__(self, directory, is_candidate, is_excluded_dir=None, recursive=False,
+                 settle_seconds=2.0, poll_interval=1.0, use_inotify=True):
+        self.directory = directory
+        self.is_candidate = is_candidate
+        self.is_excluded_dir = is_excluded_dir or (lambda name: False)
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+
+        self._pending = {}   # path -> ((size, mtime_ns), time the stat last changed)
+        self._reported = {}  # path -> (size, mtime_ns) when it was handed out
+
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+
+        # Existing files are picked up by the first scan
+        self._scan(add_watches=self._inotify is not None)
+        self._next_scan = time.monotonic() + self.poll_interval
+
+    @property
+    def mode(self):
+        return "inotify" if self._inotify else "polling"
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def _scan(self, root=None, add_watches=False):
+        """Walks root (default: the watched folder, and subfolders if recursive), marking candidate files."""
+        folders = [root or self.directory]
+        while folders:
+            folder = folders.pop()
+            if add_watches:
+                try:
+                    self._inotify.add_watch(folder)
+                except OSError:
+                    pass
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            if self.recursive and not self.is_excluded_dir(entry.name):
+                                folders.append(entry.path)
+                        elif self.is_candidate(entry.name):
+                            self._touch(entry.path)
+            except OSError:
+                continue
+
+    def _touch(self, path):
+        """Re-checks a file; it becomes pending again if it changed since it was reported."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._pending.pop(path, None)
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self._reported.get(path) == signature:
+            return
+        current = self._pending.get(path)
+        if current is None or current[0] != signature:
+            self._pending[path] = (signature, time.monotonic())
+
+    def _handle_events(self, timeout):
+        for path, mask in self._inotify.read_events(timeout):
+            if path is None:
+                # Events were lost, fall back to a full scan
+                self._scan()
+                continue
+            name = os.path.basename(path)
+            if mask & IN_ISDIR:
+                if self.recursive and not self.is_excluded_dir(name) and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may land before the watch is added, so scan the new folder too
+                    self._scan(path, add_watches=True)
+            elif self.is_candidate(name):
+                self._touch(path)
+
+    def wait_for_files(self, timeout=1.0):
+        """
+        Waits up to timeout seconds and returns the files that are now complete,
+        i.e. unchanged for settle_seconds. A file is returned again if it changes later.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if self._inotify:
+                self._handle_events(max(0.0, min(deadline - now, self.settle_seconds / 2)))
+            elif now >= self._next_scan:
+                self._scan()
+                self._next_scan = now + self.poll_interval
+
+            # Debounce: re-stat pending files, hand out the settled ones
+            for path in list(self._pending):
+                self._touch(path)
+            now = time.monotonic()
+            ready = [path for path, (_, changed) in self._pending.items()
+                     if now - changed >= self.settle_seconds]
+            for path in ready:
+                self._reported[path] = self._pending.pop(path)[0]
+
+            if ready or now >= deadline:
+                return sorted(ready)
+            if not self._inotify:
+                time.sleep(min(self.poll_interval, max(0.0, deadline - now), 0.25))
@@ -0,0 +1,129 @@
+"""
+Run manifests for split output folders.
+
+A manifest.json in each output folder records the input files (size, mtime and
+SHA-256), the tool version and the options of the run that produced it, plus
+the files it wrote. A later run can then skip a shipment whose inputs have not
+changed: inputs whose size and mtime match are trusted after a stat, and files
+are only re-hashed when those differ.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+def file_sha256(path):
+    """Returns the hex SHA-256 of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _fingerprint(path):
+    """Size, mtime and hash of an input file."""
+    stat = os.stat(path)
+    return {
+        "name": os.path.basename(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path)
+    }
+
+def load_manifest(output_dir):
+    """Returns the manifest of an output folder, or None if missing or unreadable."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("manifest_version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def _save_manifest(output_dir, manifest):
+    """Writes the manifest atomically so an interrupted run never leaves half a file."""
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(temp_path, manifest_path)
+
+def is_up_to_date(output_dir, inputs, tool_version, options):
+    """
+    Checks whether output_dir already holds the result of splitting these inputs.
+
+    Args:
+        output_dir: Output folder that may contain a manifest
+        inputs: Dict of role (e.g. 'csv', 'pdf') -> input file path
+        tool_version: Version string of the tool doing the split
+        options: Dict of the options that affect the output
+
+    Returns:
+        bool: True if the manifest matches the inputs, version and options and all
+              recorded outputs still exist
+    """
+    manifest = load_manifest(output_dir)
+    if manifest is None:
+        return False
+    if manifest.get("tool_version") != tool_version or manifest.get("options") != options:
+        return False
+
+    recorded_inputs = manifest.get("inputs", {})
+    if set(recorded_inputs) != set(inputs):
+        return False
+
+    refreshed = False
+    for role, path in inputs.items():
+        recorded = recorded_inputs[role]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size == recorded.get("size") and stat.st_mtime_ns == recorded.get("mtime_ns"):
+            continue
+        # Size or mtime changed: only the content hash can tell
+        if stat.st_size != recorded.get("size") or file_sha256(path) != recorded.get("sha256"):
+            return False
+        recorded["mtime_ns"] = stat.st_mtime_ns
+        refreshed = True
+
+    for output_name in manifest.get("outputs", []):
+        if not os.path.exists(os.path.join(output_dir, output_name)):
+            return False
+
+    if refreshed:
+        # Remember the new mtimes so the next check is a plain stat again
+        try:
+            _save_manifest(output_dir, manifest)
+        except IOError:
+            pass
+    return True
+
+def write_manifest(output_dir, inputs, tool_version, options, outputs=None):
+    """
+    Records a completed split in output_dir.
+
+    Args:
+        output_dir: Output folder of the run
+        inputs: Dict of role -> input file path
+        tool_version: Version string of the tool doing the split
+        options: Dict of the options that affect the output
+        outputs: File names written to output_dir (default: everything in it)
+    """
+    if outputs is None:
+        outputs = [name for name in os.listdir(output_dir)
+                   if name != MANIFEST_NAME and not name.endswith(".tmp")]
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "tool_version": tool_version,
+        "options": options,
+        "inputs": {role: _fingerprint(path) for role, path in inputs.items()},
+        "outputs": sorted(outputs),
+        "created": datetime.now().isoformat(timespec='seconds')
+    }
+    _save_manifest(output_dir, manifest)
@@ -0,0 +1,266 @@
+"""
+Output sinks for split PDFs.
+
+The splitters hand every finished SKU document to a sink instead of saving it
+themselves. DirectorySink writes one file per SKU (the classic layout), ZipSink
+and TarSink stream all SKU PDFs into a single archive (also to stdout, which
+does not need to be seekable) followed by an index.json member listing
+SKU -> member name -> page count, and MemorySink keeps the PDF bytes in memory.
+
+Every sink saves with a named save profile (SAVE_PROFILES) trading write time
+for file size.
+
+build_bookmarked_pdf() is the alternative to one PDF per SKU: a single document
+with an outline entry and page labels per SKU, handed to a sink like any other PDF.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import tarfile
+import zipfile
+
+INDEX_MEMBER = "index.json"
+ARCHIVE_FORMATS = ("zip", "tar")
+
+# Save profiles: whether to subset embedded fonts first, and the PyMuPDF save options
+SAVE_PROFILES = {
+    # PyMuPDF defaults: quickest to write, resources copied from the labels are kept as they are
+    "fast": {"subset_fonts": False, "options": {}},
+    # Drop unused objects, compress the streams and pack objects into object streams;
+    # all linear in the number of objects
+    "compact": {"subset_fonts": False, "options": {"garbage": 2, "deflate": True, "use_objstms": 1}},
+    # Smallest files for long-term storage: also merge duplicate objects (the resources every
+    # label page carries its own copy of), subset fonts and recompress images and fonts.
+    # Finding duplicates gets slow for single documents with many thousand pages
+    "archive": {"subset_fonts": True, "options": {"garbage": 4, "deflate": True, "deflate_images": True,
+                                                  "deflate_fonts": True, "use_objstms": 1}},
+}
+DEFAULT_SAVE_PROFILE = "fast"
+
+def prepare_for_save(doc, save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Applies the document changes of a save profile (font subsetting) to doc.
+
+    Returns:
+        dict: Keyword arguments for doc.save() / doc.tobytes()
+    """
+    profile = SAVE_PROFILES[save_profile]
+    if profile["subset_fonts"]:
+        doc.subset_fonts()
+    return profile["options"]
+
+class OutputSink:
+    """Base class: collects index entries and stores PDF bytes via add_bytes()."""
+
+    def __init__(self, save_profile=DEFAULT_SAVE_PROFILE):
+        if save_profile not in SAVE_PROFILES:
+            raise ValueError(f"Unknown save profile: {save_profile}")
+        self.save_profile = save_profile
+        self.entries = []
+        self.closed = False
+
+    def write_pdf(self, name, doc, sku, pages):
+        """Stores an open fitz document under name. Returns the number of bytes written."""
+        options = prepare_for_save(doc, self.save_profile)
+        return self.add_bytes(name, doc.tobytes(**options), sku, pages)
+
+    def add_bytes(self, name, data, sku, pages):
+        self.entries.append({"sku": sku, "member": name, "pages": pages, "bytes": len(data)})
+        self._store(name, data)
+        return len(data)
+
+    def _store(self, name, data):
+        raise NotImplementedError
+
+    def index_bytes(self, **info):
+        return json.dumps(dict(info, members=self.entries), indent=4).encode("utf-8")
+
+    def close(self, **info):
+        """Finishes the output. Keyword arguments are added to the archive index."""
+        if not self.closed:
+            self.closed = True
+            self._close(info)
+
+    def abort(self):
+        """Releases resources after an error without writing the index."""
+        if not self.closed:
+            self.closed = True
+            self._abort()
+
+    def _close(self, info):
+        pass
+
+    def _abort(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class DirectorySink(OutputSink):
+    """One PDF file per SKU in output_dir."""
+
+    def __init__(self, output_dir, save_profile=DEFAULT_SAVE_PROFILE):
+        super().__init__(save_profile)
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write_pdf(self, name, doc, sku, pages):
+        path = os.path.join(self.output_dir, name)
+        doc.save(path, **prepare_for_save(doc, self.save_profile))
+        size = os.path.getsize(path)
+        self.entries.append({"sku": sku, "member": name, "pages": pages, "bytes": size})
+        return size
+
+    def _store(self, name, data):
+        with open(os.path.join(self.output_dir, name), 'wb') as f:
+            f.write(data)
+
+class MemorySink(OutputSink):
+    """Keeps every PDF as bytes in self.files (name -> bytes)."""
+
+    def __init__(self, save_profile=DEFAULT_SAVE_PROFILE):
+        super().__init__(save_profile)
+        self.files = {}
+
+    def _store(self, name, data):
+        self.files[name] = data
+
+class _ArchiveSink(OutputSink):
+    def __init__(self, target, save_profile=DEFAULT_SAVE_PROFILE):
+        super().__init__(save_profile)
+        if target == "-":
+            self._file = sys.stdout.buffer
+            self._owns_file = False
+        elif hasattr(target, "write"):
+            self._file = target
+            self._owns_file = False
+        else:
+            self._file = open(target, 'wb')
+            self._owns_file = True
+
+    def _finish(self):
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+class ZipSink(_ArchiveSink):
+    """All PDFs in one .zip, stored by default since PDF streams are already compressed."""
+
+    def __init__(self, target, compress=False, save_profile=DEFAULT_SAVE_PROFILE):
+        super().__init__(target, save_profile)
+        compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self._zip = zipfile.ZipFile(self._file, 'w', compression=compression)
+
+    def _store(self, name, data):
+        self._zip.writestr(name, data)
+
+    def _close(self, info):
+        self._zip.writestr(INDEX_MEMBER, self.index_bytes(**info))
+        self._zip.close()
+        self._finish()
+
+    def _abort(self):
+        self._zip.close()
+        self._finish()
+
+class TarSink(_ArchiveSink):
+    """All PDFs in one .tar stream (gzip-compressed if compress is set)."""
+
+    def __init__(self, target, compress=False, save_profile=DEFAULT_SAVE_PROFILE):
+        super().__init__(target, save_profile)
+        self._tar = tarfile.open(fileobj=self._file, mode='w|gz' if compress else 'w|')
+
+    def _store(self, name, data):
+        member = tarfile.TarInfo(name)
+        member.size = len(data)
+        member.mtime = int(time.time())
+        self._tar.addfile(member, io.BytesIO(data))
+
+    def _close(self, info):
+        self._store(INDEX_MEMBER, self.index_bytes(**info))
+        self._tar.close()
+        self._finish()
+
+    def _abort(self):
+        self._tar.close()
+        self._finish()
+
+def build_bookmarked_pdf(doc, sections):
+    """
+    Builds one PDF holding all sections in order, with an outline (table of contents)
+    entry per section and page labels like 'SKU-3/12' (page 3 of the section's 12).
+
+    Args:
+        doc: Open source fitz document
+        sections: List of (title, page_runs), page_runs being (first, last) 0-based page index pairs
+
+    Returns:
+        fitz.Document: doc itself when the sections already cover it page by page in order
+                       (nothing is copied, only the outline and labels are set), otherwise a
+                       new document the caller must close
+    """
+    page_order = [page_num for _, runs in sections for first, last in runs
+                  for page_num in range(first, last + 1)]
+    if page_order == list(range(len(doc))):
+        out = doc
+    else:
+        import fitz  # PyMuPDF
+        out = fitz.open()
+        for _, runs in sections:
+            for first, last in runs:
+                out.insert_pdf(doc, from_page=first, to_page=last)
+
+    toc = []
+    labels = []
+    start = 0
+    for title, runs in sections:
+        count = sum(last - first + 1 for first, last in runs)
+        if count == 0:
+            continue
+        toc.append([1, title, start + 1])
+        # A label rule per page: numbering styles cannot express the '/count' suffix
+        labels.extend({"startpage": start + i, "prefix": f"{title}-{i + 1}/{count}", "style": ""}
+                      for i in range(count))
+        start += count
+    out.set_toc(toc)
+    out.set_page_labels(labels)
+    return out
+
+def archive_extension(archive_format, compress=False):
+    """File extension for an archive format, e.g. 'zip' -> '.zip', 'tar' + compress -> '.tar.gz'."""
+    if archive_format == "tar":
+        return ".tar.gz" if compress else ".tar"
+    return ".zip"
+
+def open_archive_sink(target, archive_format=None, compress=False, save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Opens a ZipSink or TarSink.
+
+    Args:
+        target: Archive path, '-' for stdout, or a writable binary file object
+        archive_format: 'zip' or 'tar' (default: from the path's extension, else zip)
+        compress: Deflate (zip) or gzip (tar) the members
+        save_profile: Name of the save profile for the PDFs (see SAVE_PROFILES)
+
+    Returns:
+        OutputSink: The archive sink
+    """
+    if archive_format is None:
+        name = target.lower() if isinstance(target, str) else ""
+        archive_format = "tar" if name.endswith((".tar", ".tar.gz", ".tgz")) else "zip"
+        compress = compress or name.endswith((".tar.gz", ".tgz"))
+    if archive_format == "zip":
+        return ZipSink(target, compress, save_profile)
+    if archive_format == "tar":
+        return TarSink(target, compress, save_profile)
+    raise ValueError(f"Unknown archive format: {archive_format}")
@@ -5,17 +5,29 @@ PDF Splitter by SKU
 This script reads a CSV file containing shipment data and splits a provided PDF file
 into multiple PDFs, grouped by SKU level. The script does not read or analyze the PDF
 content itself but splits strictly by pages, assuming each page corresponds to one box.
-All business logic and sorting rely solely on the CSV data.
+All business logic and sorting rely solely on the CSV data. With --box-ids, the Box ID
+printed on each page is read instead, so the pages may come in any order.
 """
 
 import os
 import sys
-import pandas as pd
-import fitz  # PyMuPDF
 from pathlib import Path
 import logging
 import argparse
 import csv  # Add csv module for quoting constants
+import gzip
+import io
+import zipfile
+from operator import itemgetter
+from output_sinks import (DirectorySink, MemorySink, open_archive_sink, build_bookmarked_pdf, ARCHIVE_FORMATS,
+                          SAVE_PROFILES, DEFAULT_SAVE_PROFILE)
+
+# pandas, fitz (PyMuPDF) and the process pool are imported inside the functions
+# that use them, so the CLI path (process_csv -> split_pdf) never loads pandas and
+# only loads fitz when a PDF is actually opened. benchmarks/bench_import_time.py
+# guards this.
+
+__version__ = "1.1.0"
 
 # Set up logging
 logging.basicConfig(
@@ -27,6 +39,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# CSV exports may arrive plain, gzip-compressed or zipped
+CSV_EXTENSIONS = ('.csv', '.csv.gz', '.zip')
+
+def _is_path(source):
+    """True if source is a file path rather than in-memory data or a file object."""
+    return isinstance(source, (str, os.PathLike))
+
+def _source_name(source):
+    """Name of an input for log messages."""
+    return str(source) if _is_path(source) else f"<in-memory {type(source).__name__}>"
+
 def find_header_row(df):
     """
     Dynamically locate the header row containing required columns.
@@ -37,6 +60,8 @@ def find_header_row(df):
     Returns:
         int: Index of the header row
     """
+    import pandas as pd
+    
     required_columns = ['SKU', 'ASIN', 'Total boxes', 'Box ID']
     
     # Iterate through rows to find a row that contains all required columns
@@ -60,6 +85,8 @@ def extract_shipment_id(df, header_row_idx):
     Returns:
         str: Shipment ID
     """
+    import pandas as pd
+    
     # Look for shipment ID in rows before the header
     for i in range(header_row_idx):
         row = df.iloc[i]
@@ -88,109 +115,268 @@ def extract_shipment_id(df, header_row_idx):
     logger.warning("Could not extract Shipment ID, using default")
     return "UNKNOWN"
 
-def process_csv(csv_path):
+def _open_zip_csv(zip_source, name):
+    """Open the first .csv member of a zip archive (path or binary file object) as text."""
+    archive = zipfile.ZipFile(zip_source)
+    members = [member for member in archive.namelist() if member.lower().endswith('.csv')]
+    if not members:
+        archive.close()
+        raise ValueError(f"No CSV file found in archive {name}")
+    if len(members) > 1:
+        logger.warning(f"Archive contains {len(members)} CSV files, using {members[0]}")
+    # The member keeps a reference to the archive, which is closed with it
+    member = archive.open(members[0])
+    archive.close()
+    return io.TextIOWrapper(member, encoding='utf-8-sig', newline='')
+
+def open_csv_text(csv_path):
     """
-    Process the CSV file to extract shipment data using the csv module directly.
+    Open a CSV export for reading as text, decompressing it on the fly.
+    
+    Supports plain .csv files, gzip-compressed .csv.gz files and .zip archives
+    (the first .csv member is read). Nothing is unpacked to disk.
+    
+    The CSV may also be held in memory: bytes, bytearray, memoryview or a binary
+    or text file object. Gzip and zip data are then recognized by their signature.
     
     Args:
-        csv_path: Path to the CSV file
+        csv_path: Path to the CSV file, or the CSV data itself
         
     Returns:
-        tuple: (shipment_id, groups) where groups is a list of dictionaries with SKU grouping info
+        file: Text file object suitable for csv.reader
+    """
+    if not _is_path(csv_path):
+        data = csv_path.read() if hasattr(csv_path, 'read') else csv_path
+        if isinstance(data, str):
+            return io.StringIO(data.lstrip('\ufeff'), newline='')
+        stream = io.BytesIO(data)
+        signature = stream.getbuffer()[:4].tobytes()
+        if signature[:2] == b'\x1f\x8b':
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=stream), encoding='utf-8-sig', newline='')
+        if signature == b'PK\x03\x04':
+            return _open_zip_csv(stream, _source_name(csv_path))
+        return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    
+    lower_path = str(csv_path).lower()
+    
+    if lower_path.endswith('.gz'):
+        return gzip.open(csv_path, 'rt', encoding='utf-8-sig', newline='')
+    
+    if lower_path.endswith('.zip'):
+        return _open_zip_csv(csv_path, csv_path)
+    
+    return open(csv_path, 'r', encoding='utf-8-sig', newline='')
+
+def _read_csv_header(f):
     """
-    logger.info(f"Processing CSV file: {csv_path}")
+    Read the CSV preamble up to and including the header row.
+    
+    Args:
+        f: Text file object positioned at the start of the CSV
+        
+    Returns:
+        tuple: (shipment_id, header_columns, reader) where reader continues after the header
+    """
+    reader = csv.reader(f)
     
     # Extract shipment ID and find header row
     shipment_id = "UNKNOWN"
-    header_row_index = -1
-    header_columns = []
-    
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        for i, line in enumerate(f):
-            if "Shipment ID" in line and shipment_id == "UNKNOWN":
-                # Extract shipment ID from the line
-                parts = line.strip().split(',')
-                if len(parts) >= 2:
-                    shipment_id = parts[1].strip().strip('"')
-                    logger.info(f"Found Shipment ID: {shipment_id}")
-            
-            if "SKU" in line and "ASIN" in line and "Box ID" in line:
-                header_row_index = i
-                # Extract header column names
-                reader = csv.reader([line])
-                header_columns = next(reader)
-                logger.info(f"Found header row at line {i}")
-                break
+    header_columns = None
+    
+    for i, row in enumerate(reader):
+        line = ",".join(row)
+        if "Shipment ID" in line and shipment_id == "UNKNOWN":
+            # Extract shipment ID from the line
+            if len(row) >= 2:
+                shipment_id = row[1].strip().strip('"')
+                logger.info(f"Found Shipment ID: {shipment_id}")
+        
+        if "SKU" in line and "ASIN" in line and "Box ID" in line:
+            header_columns = row
+            logger.info(f"Found header row at line {i}")
+            break
     
     if shipment_id == "UNKNOWN":
         logger.warning("Could not extract Shipment ID, using default")
     
-    if header_row_index == -1:
+    if header_columns is None:
         raise ValueError("Could not find header row with required columns")
     
-    # Process the CSV data
+    return shipment_id, header_columns, reader
+
+def read_shipment_id(csv_path):
+    """
+    Read only the CSV preamble and header row and return the Shipment ID.
+    
+    Args:
+        csv_path: Path to the CSV file (.csv, .csv.gz or .zip) or in-memory CSV data
+        
+    Returns:
+        str: The Shipment ID, as process_csv would return it
+    """
+    with open_csv_text(csv_path) as f:
+        shipment_id, _, _ = _read_csv_header(f)
+    return shipment_id
+
+def read_box_rows(csv_path):
+    """
+    Read the CSV preamble and header, then stream the box rows in a single pass.
+    
+    Args:
+        csv_path: Path to the CSV file (.csv, .csv.gz or .zip) or in-memory CSV data
+        
+    Returns:
+        tuple: (shipment_id, rows) where rows is a generator of
+               (box_id, row_num, sku, asin) tuples, one per Box ID
+    """
+    f = open_csv_text(csv_path)
+    try:
+        shipment_id, header_columns, reader = _read_csv_header(f)
+    except Exception:
+        f.close()
+        raise
+    
     sku_index = header_columns.index("SKU")
     asin_index = header_columns.index("ASIN")
     box_id_index = header_columns.index("Box ID")
     
-    # Read all data rows
-    data_rows = []
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.reader(f)
-        for i, row in enumerate(reader):
-            if i > header_row_index and len(row) > box_id_index:
-                # Add row number (relative to header row)
-                row_num = i - header_row_index
-                data_rows.append((row_num, row))
-    
-    # Process box IDs (they may be comma-separated)
-    expanded_rows = []
-    for row_num, row in data_rows:
-        sku = row[sku_index]
-        asin = row[asin_index]
-        box_ids_str = row[box_id_index]
-        
-        # Split box IDs (they may be comma-separated)
-        box_ids = box_ids_str.split(',')
-        
-        for box_id in box_ids:
-            box_id = box_id.strip()
-            if box_id:  # Skip empty box IDs
-                expanded_rows.append({
-                    "RowNum": row_num,
-                    "SKU": sku,
-                    "ASIN": asin,
-                    "Box ID": box_id
-                })
+    def rows():
+        with f:
+            # Row number is relative to the header row
+            for row_num, row in enumerate(reader, 1):
+                if len(row) <= box_id_index:
+                    continue
+                sku = row[sku_index]
+                asin = row[asin_index]
+                
+                # Split box IDs (they may be comma-separated)
+                for box_id in row[box_id_index].split(','):
+                    box_id = box_id.strip()
+                    if box_id:  # Skip empty box IDs
+                        yield box_id, row_num, sku, asin
+    
+    return shipment_id, rows()
+
+def _group_boxes_python(rows):
+    """
+    Sort box rows by Box ID and group them by SKU in order of first appearance.
     
+    Args:
+        rows: Iterable of (box_id, row_num, sku, asin) tuples
+        
+    Returns:
+        list: Dictionaries with RowNum, SKU, ASIN and TotalBoxes
+    """
     # Sort by Box ID
-    expanded_rows.sort(key=lambda x: x["Box ID"])
+    box_rows = sorted(rows, key=itemgetter(0))
     
     # Group by SKU
     sku_groups = {}
-    for row in expanded_rows:
-        sku = row["SKU"]
-        if sku not in sku_groups:
+    for box_id, row_num, sku, asin in box_rows:
+        group = sku_groups.get(sku)
+        if group is None:
             sku_groups[sku] = {
-                "RowNum": row["RowNum"],
+                "RowNum": row_num,
                 "SKU": sku,
-                "ASIN": row["ASIN"],
-                "Boxes": []
+                "ASIN": asin,
+                "TotalBoxes": 0
             }
-        sku_groups[sku]["Boxes"].append(row["Box ID"])
+            group = sku_groups[sku]
+        group["TotalBoxes"] += 1
+    
+    return list(sku_groups.values())
+
+def _group_boxes_pandas(f, header_columns):
+    """
+    Columnar version of _group_boxes_python for very large CSVs.
+    
+    Reads the remaining data rows of f with pandas. Instead of sorting every Box ID,
+    each row is reduced to its box count and smallest Box ID: groups appear in the
+    order of their smallest Box ID, and RowNum/ASIN come from the row holding it,
+    which is exactly what sorting by Box ID and grouping by first appearance gives.
+    
+    Args:
+        f: Text file object positioned just after the header row
+        header_columns: Header row columns
+        
+    Returns:
+        list: Dictionaries with RowNum, SKU, ASIN and TotalBoxes
+    """
+    import pandas as pd
+    
+    sku_index = header_columns.index("SKU")
+    asin_index = header_columns.index("ASIN")
+    box_id_index = header_columns.index("Box ID")
+    
+    # Keep blank lines so the row numbers match the csv module's
+    df = pd.read_csv(f, header=None, names=range(len(header_columns)), index_col=False,
+                     usecols=[sku_index, asin_index, box_id_index], dtype=str,
+                     keep_default_na=False, skip_blank_lines=False)
+    df = df.fillna("").rename(columns={sku_index: "SKU", asin_index: "ASIN", box_id_index: "Box ID"})
+    df["RowNum"] = range(1, len(df) + 1)
+    
+    # Reduce each row's comma-separated Box IDs to a count and the smallest ID
+    box_counts = []
+    first_boxes = []
+    for box_ids in df["Box ID"].str.split(",").tolist():
+        box_ids = [box_id for box_id in map(str.strip, box_ids) if box_id]
+        box_counts.append(len(box_ids))
+        first_boxes.append(min(box_ids) if box_ids else "")
+    df["Boxes"] = box_counts
+    df["FirstBox"] = first_boxes
+    df = df[df["Boxes"] > 0]
+    
+    # Per SKU: total boxes, and the earliest row holding its smallest Box ID
+    by_sku = df.groupby("SKU", sort=False)
+    totals = by_sku["Boxes"].sum()
+    firsts = df[df["FirstBox"] == by_sku["FirstBox"].transform("min")].drop_duplicates("SKU")
+    # Stable sort so SKUs sharing a Box ID keep CSV order
+    firsts = firsts.sort_values("FirstBox", kind="stable")
+    
+    return [
+        {"RowNum": row_num, "SKU": sku, "ASIN": asin, "TotalBoxes": total_boxes}
+        for row_num, sku, asin, total_boxes in zip(
+            firsts["RowNum"].tolist(), firsts["SKU"].tolist(), firsts["ASIN"].tolist(),
+            totals.loc[firsts["SKU"]].tolist())
+    ]
+
+def process_csv(csv_path, engine="python"):
+    """
+    Process the CSV file to extract shipment data using the csv module directly.
+    
+    Args:
+        csv_path: Path to the CSV file (.csv, .csv.gz or .zip), or the CSV data as
+                  bytes, memoryview or a file object (see open_csv_text)
+        engine: "python" (default) or "pandas" for the columnar grouping engine,
+                which is faster on CSVs with very many boxes
+        
+    Returns:
+        tuple: (shipment_id, groups) where groups is a list of dictionaries with SKU grouping info
+    """
+    logger.info(f"Processing CSV file: {_source_name(csv_path)}")
+    
+    if engine == "pandas":
+        with open_csv_text(csv_path) as f:
+            shipment_id, header_columns, _ = _read_csv_header(f)
+            sku_groups = _group_boxes_pandas(f, header_columns)
+    elif engine == "python":
+        shipment_id, rows = read_box_rows(csv_path)
+        sku_groups = _group_boxes_python(rows)
+    else:
+        raise ValueError(f"Unknown CSV engine: {engine}")
     
     # Create page ranges
     groups = []
     current_page = 1
     
-    for sku, group_data in sku_groups.items():
-        total_boxes = len(group_data["Boxes"])
+    for group_data in sku_groups:
+        total_boxes = group_data["TotalBoxes"]
         start_page = current_page
         end_page = current_page + total_boxes - 1
         
         groups.append({
             "RowNum": group_data["RowNum"],
-            "SKU": sku,
+            "SKU": group_data["SKU"],
             "ASIN": group_data["ASIN"],
             "TotalBoxes": total_boxes,
             "PageRange": (start_page, end_page)
@@ -204,78 +390,465 @@ def process_csv(csv_path):
     
     return shipment_id, groups
 
-def split_pdf(pdf_path, shipment_id, groups, output_dir=None):
+def _find_box_id(words, prefix):
+    """The first word starting with prefix, as (text, bbox), or (None, None)."""
+    for x0, y0, x1, y1, text, *_ in words:
+        if text.startswith(prefix):
+            return text, (x0, y0, x1, y1)
+    return None, None
+
+def index_box_ids(doc, shipment_id):
     """
-    Split the PDF file based on SKU groupings.
+    Map the Box ID printed on each label page to its page, in one pass over the PDF.
+    
+    Only the words of each page are extracted; the first word starting with the
+    shipment ID followed by "U" (as in FBA15XXXXXXXU000001) is the page's Box ID.
+    Once a Box ID is found, only the band of the page it is printed in is read on
+    the following pages (Amazon prints it in the same place on every label), and
+    the whole page only where that band has no Box ID.
     
     Args:
-        pdf_path: Path to the PDF file
-        shipment_id: Shipment ID for naming
-        groups: List of dictionaries with SKU grouping info
-        output_dir: Directory to save the split PDFs (default: shipment_[shipment_id])
+        doc: Open label PDF document
+        shipment_id: Shipment ID from the CSV
+        
+    Returns:
+        tuple: (index, unlabeled) where index maps Box ID -> 0-based page index and
+               unlabeled lists the 0-based indexes of pages without a Box ID
+        
+    Raises:
+        ValueError: If the same Box ID is printed on two pages
+    """
+    prefix = f"{shipment_id}U"
+    index = {}
+    unlabeled = []
+    band = None
+    for page in doc:
+        box_id = None
+        if band is not None:
+            box_id, _ = _find_box_id(page.get_text("words", clip=band), prefix)
+        if box_id is None:
+            box_id, bbox = _find_box_id(page.get_text("words"), prefix)
+            if band is None and bbox is not None:
+                # The full width of the page, so a Box ID is never cut, and a line above and below.
+                # Word coordinates are those of the unrotated page, and so must the band's be
+                height = bbox[3] - bbox[1]
+                area = page.rect * page.derotation_matrix
+                band = area & (area.x0, bbox[1] - height, area.x1, bbox[3] + height)
+        if box_id is None:
+            unlabeled.append(page.number)
+        elif box_id in index:
+            raise ValueError(f"Box ID {box_id} is printed on pages {index[box_id] + 1} and {page.number + 1}")
+        else:
+            index[box_id] = page.number
+    return index, unlabeled
+
+def _describe_items(items, limit=5):
+    """First few items of a list for an error message."""
+    shown = ", ".join(str(item) for item in items[:limit])
+    return shown + (f" and {len(items) - limit} more" if len(items) > limit else "")
+
+def process_csv_by_box_id(csv_path, pdf_path):
     """
-    logger.info(f"Processing PDF file: {pdf_path}")
+    Group the CSV's boxes by SKU and take each box's page from the Box ID printed on it.
     
-    # Create output directory if not specified
-    if output_dir is None:
-        # Default to creating in current directory
-        output_dir = f"shipment_{shipment_id}"
+    Unlike process_csv, the PDF does not have to be in Box ID order: the pages are
+    indexed by Box ID in one pass (see index_box_ids) and joined with the CSV's
+    Box ID -> SKU rows. Groups are ordered as in process_csv, and each SKU's pages
+    follow its Box IDs, so the split PDFs are the same as for a PDF in order.
     
-    # Create the directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
-    logger.info(f"Output directory: {output_dir}")
+    Args:
+        csv_path: Path to the CSV file, or the CSV data (see process_csv)
+        pdf_path: Path to the PDF file, or the PDF data (see open_pdf)
+        
+    Returns:
+        tuple: (shipment_id, groups) as returned by process_csv; each group also has
+               "Pages", its 1-based page numbers in Box ID order, and its PageRange
+               spans the lowest to the highest of them
+        
+    Raises:
+        ValueError: If the CSV and the PDF do not list the same Box IDs
+    """
+    logger.info(f"Processing CSV file: {_source_name(csv_path)}")
+    shipment_id, rows = read_box_rows(csv_path)
+    box_rows = sorted(rows, key=itemgetter(0))
     
-    # Open the PDF file
+    logger.info(f"Indexing Box IDs in PDF file: {_source_name(pdf_path)}")
+    doc = open_pdf(pdf_path)
     try:
-        doc = fitz.open(pdf_path)
-    except Exception as e:
-        logger.error(f"Error opening PDF file: {e}")
-        raise
+        index, unlabeled = index_box_ids(doc, shipment_id)
+    finally:
+        doc.close()
+    if unlabeled:
+        raise ValueError(f"No Box ID of shipment {shipment_id} found on page(s) "
+                         f"{_describe_items([page_num + 1 for page_num in unlabeled])}")
+    
+    # Join the CSV rows with the page index
+    sku_groups = {}
+    missing = []
+    placed = set()
+    for box_id, row_num, sku, asin in box_rows:
+        page_num = index.get(box_id)
+        if page_num is None or box_id in placed:
+            missing.append(box_id)
+            continue
+        placed.add(box_id)
+        group = sku_groups.get(sku)
+        if group is None:
+            group = sku_groups[sku] = {"RowNum": row_num, "SKU": sku, "ASIN": asin, "Pages": []}
+        group["Pages"].append(page_num + 1)
+    if missing:
+        raise ValueError(f"Box IDs in CSV not found in PDF (or listed twice): {_describe_items(missing)}")
+    extra = sorted(set(index) - placed)
+    if extra:
+        raise ValueError(f"Box IDs in PDF not listed in CSV: {_describe_items(extra)}")
     
-    # Validate that the PDF has the expected number of pages
+    groups = []
+    reordered = 0
+    for group_data in sku_groups.values():
+        pages = group_data["Pages"]
+        if pages != list(range(pages[0], pages[0] + len(pages))):
+            reordered += 1
+        groups.append({
+            "RowNum": group_data["RowNum"],
+            "SKU": group_data["SKU"],
+            "ASIN": group_data["ASIN"],
+            "TotalBoxes": len(pages),
+            "PageRange": (min(pages), max(pages)),
+            "Pages": pages
+        })
+    
+    logger.info(f"Found {len(groups)} SKU groups, matched {len(placed)} Box IDs to pages")
+    if reordered:
+        logger.warning(f"PDF pages are not in Box ID order; {reordered} SKU group(s) are collected from "
+                       f"scattered pages")
+    for group in groups:
+        logger.info(f"Group: {group['SKU']}, ASIN: {group['ASIN']}, Boxes: {group['TotalBoxes']}, Pages: {group['PageRange']}")
+    
+    return shipment_id, groups
+
+def open_pdf(pdf_path):
+    """
+    Open a label PDF from a path or from memory.
+    
+    Args:
+        pdf_path: Path to the PDF file, or the PDF as bytes, bytearray, memoryview
+                  or a binary file object (opened with fitz.open(stream=...))
+        
+    Returns:
+        fitz.Document: The open document
+    """
+    import fitz  # PyMuPDF
+    
+    if _is_path(pdf_path):
+        return fitz.open(pdf_path)
+    data = pdf_path.read() if hasattr(pdf_path, 'read') else pdf_path
+    return fitz.open(stream=data, filetype="pdf")
+
+def _check_page_count(doc, groups):
+    """Raise ValueError unless the PDF has one page per box in the CSV."""
     total_boxes = sum(group["TotalBoxes"] for group in groups)
-    if len(doc) != total_boxes:
-        error_msg = f"PDF page count ({len(doc)}) does not match total boxes in CSV ({total_boxes})"
+    page_count = len(doc)
+    if page_count != total_boxes:
+        error_msg = f"PDF page count ({page_count}) does not match total boxes in CSV ({total_boxes})"
         logger.error(error_msg)
         raise ValueError(error_msg)
     
-    logger.info(f"PDF has {len(doc)} pages, matching {total_boxes} boxes in CSV")
+    logger.info(f"PDF has {page_count} pages, matching {total_boxes} boxes in CSV")
+
+def partition_groups(groups, jobs):
+    """
+    Partition SKU groups into balanced shares for parallel splitting.
+    
+    Groups are assigned largest first to the share with the fewest pages so far,
+    so a single very large SKU does not end up queued behind other work.
     
-    # Split the PDF by SKU groups
-    for group in groups:
-        sku = group["SKU"]
-        asin = group["ASIN"]
-        total_boxes = group["TotalBoxes"]
+    Args:
+        groups: List of dictionaries with SKU grouping info
+        jobs: Number of shares to create
+        
+    Returns:
+        list: Non-empty lists of groups, one per worker
+    """
+    shares = [[] for _ in range(max(1, jobs))]
+    share_pages = [0] * len(shares)
+    
+    for group in sorted(groups, key=lambda g: g["TotalBoxes"], reverse=True):
+        lightest = share_pages.index(min(share_pages))
+        shares[lightest].append(group)
+        share_pages[lightest] += group["TotalBoxes"]
+    
+    return [share for share in shares if share]
+
+def group_page_runs(group):
+    """
+    Pages of a SKU group as 0-based (first, last) runs in output order: its Pages
+    if it was planned by Box ID (see process_csv_by_box_id), else its PageRange.
+    """
+    if "Pages" not in group:
         start_page, end_page = group["PageRange"]
+        return [(start_page - 1, end_page - 1)]
+    runs = []
+    for page_num in group["Pages"]:
+        if runs and runs[-1][1] == page_num - 2:
+            runs[-1][1] = page_num - 1
+        else:
+            runs.append([page_num - 1, page_num - 1])
+    return [tuple(run) for run in runs]
+
+def sku_output_filename(shipment_id, group):
+    """Output file name of a SKU group: [RowNum]_[ShipmentID]_[SKU]_[ASIN]_[TotalBoxes]boxes.pdf"""
+    return f"{group['RowNum']}_{shipment_id}_{group['SKU']}_{group['ASIN']}_{group['TotalBoxes']}boxes.pdf"
+
+def bookmarked_output_filename(shipment_id):
+    """Output file name of the single bookmarked PDF: [ShipmentID]_bookmarked.pdf"""
+    return f"{shipment_id}_bookmarked.pdf"
+
+def _write_bookmarked_pdf(doc, shipment_id, groups, sink):
+    """
+    Write one PDF with an outline entry and page labels per SKU group.
+    
+    Args:
+        doc: Open source PDF document
+        shipment_id: Shipment ID for naming
+        groups: List of dictionaries with SKU grouping info
+        sink: Output sink receiving the PDF (see output_sinks)
         
-        row_num = group["RowNum"]
-        output_filename = f"{row_num}_{shipment_id}_{sku}_{asin}_{total_boxes}boxes.pdf"
-        output_path = os.path.join(output_dir, output_filename)
+    Returns:
+        str: File or archive member name of the written PDF
+    """
+    output_name = bookmarked_output_filename(shipment_id)
+    sections = [(group["SKU"], group_page_runs(group)) for group in groups]
+    
+    logger.info(f"Creating bookmarked PDF with {len(groups)} SKU sections: {output_name}")
+    bookmarked_doc = build_bookmarked_pdf(doc, sections)
+    try:
+        sink.write_pdf(output_name, bookmarked_doc, None, len(bookmarked_doc))
+    finally:
+        if bookmarked_doc is not doc:
+            bookmarked_doc.close()
+    
+    return output_name
+
+def _write_sku_pdf(doc, shipment_id, group, sink):
+    """
+    Write the PDF for a single SKU group.
+    
+    Args:
+        doc: Open source PDF document
+        shipment_id: Shipment ID for naming
+        group: Dictionary with SKU grouping info
+        sink: Output sink receiving the split PDF (see output_sinks)
         
-        logger.info(f"Creating PDF for SKU {sku}: {output_path}")
+    Returns:
+        str: File or archive member name of the written PDF
+    """
+    import fitz  # PyMuPDF
+    
+    sku = group["SKU"]
+    total_boxes = group["TotalBoxes"]
+    
+    output_name = sku_output_filename(shipment_id, group)
+    
+    logger.info(f"Creating PDF for SKU {sku}: {output_name}")
+    
+    # Create a new PDF for this SKU
+    sku_doc = fitz.open()
+    
+    # Add the page range from the original PDF in one call (one per run if planned by Box ID)
+    for first, last in group_page_runs(group):
+        sku_doc.insert_pdf(doc, from_page=first, to_page=last)
+    
+    # Save the new PDF
+    try:
+        sink.write_pdf(output_name, sku_doc, sku, total_boxes)
+        logger.info(f"Saved {output_name} with {total_boxes} pages")
+    except Exception as e:
+        logger.error(f"Error saving PDF: {e}")
+        raise
+    finally:
+        sku_doc.close()
+    
+    return output_name
+
+def _split_groups_worker(pdf_path, shipment_id, groups, output_dir, save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Write a share of the SKU groups from a worker process.
+    
+    Each worker opens the source PDF once for its whole share. Without an
+    output_dir the PDFs are returned to the parent, which adds them to its archive.
+    
+    Returns:
+        list: (name, pdf bytes, sku, pages) tuples if output_dir is None, else an empty list
+    """
+    sink = DirectorySink(output_dir, save_profile) if output_dir else MemorySink(save_profile)
+    doc = open_pdf(pdf_path)
+    try:
+        for group in groups:
+            _write_sku_pdf(doc, shipment_id, group, sink)
+    finally:
+        doc.close()
+    
+    if output_dir:
+        return []
+    return [(entry["member"], sink.files[entry["member"]], entry["sku"], entry["pages"])
+            for entry in sink.entries]
+
+def split_pdf(pdf_path, shipment_id, groups, output_dir=None, jobs=1,
+              archive=None, archive_format=None, compress=False, bookmarked=False,
+              save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Split the PDF file based on SKU groupings.
+    
+    Args:
+        pdf_path: Path to the PDF file, or the PDF data (see open_pdf)
+        shipment_id: Shipment ID for naming
+        groups: List of dictionaries with SKU grouping info
+        output_dir: Directory to save the split PDFs (default: shipment_[shipment_id])
+        jobs: Number of worker processes to spread the SKU groups over (default: 1)
+        archive: Write all split PDFs into this single archive instead of a directory
+                 (a path, '-' for stdout, or a writable binary file object)
+        archive_format: 'zip' or 'tar' (default: from the archive's extension)
+        compress: Deflate zip members / gzip the tar stream
+        bookmarked: Write one PDF with an outline entry and page labels per SKU
+                    instead of one PDF per SKU (jobs is ignored)
+        save_profile: 'fast', 'compact' or 'archive' (see output_sinks.SAVE_PROFILES)
         
-        # Create a new PDF for this SKU
-        sku_doc = fitz.open()
+    Returns:
+        str: The output directory, or the archive if one was given
+    """
+    logger.info(f"Processing PDF file: {_source_name(pdf_path)}")
+    
+    if archive is None:
+        # Create output directory if not specified
+        if output_dir is None:
+            # Default to creating in current directory
+            output_dir = f"shipment_{shipment_id}"
         
-        # Add pages from the original PDF (adjusting for 0-based indexing)
-        for page_num in range(start_page - 1, end_page):
-            sku_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+        logger.info(f"Output directory: {output_dir}")
+    else:
+        output_dir = None
+        logger.info(f"Output archive: {'stdout' if archive == '-' else archive}")
+    
+    if hasattr(pdf_path, 'read'):
+        # Workers need data they can be sent, not a file object
+        pdf_path = pdf_path.read()
+    
+    # Open the PDF file
+    try:
+        doc = open_pdf(pdf_path)
+    except Exception as e:
+        logger.error(f"Error opening PDF file: {e}")
+        raise
+    
+    # Validate that the PDF has the expected number of pages
+    try:
+        _check_page_count(doc, groups)
+    except ValueError:
+        doc.close()
+        raise
+    
+    # Create the directory (or archive) only once the input is known to be good
+    if archive is None:
+        sink = DirectorySink(output_dir, save_profile)
+    else:
+        sink = open_archive_sink(archive, archive_format, compress, save_profile)
+    
+    with sink:
+        shares = partition_groups(groups, jobs)
+        if bookmarked:
+            try:
+                _write_bookmarked_pdf(doc, shipment_id, groups, sink)
+            finally:
+                doc.close()
+        elif len(shares) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            
+            # Workers open their own copy of the PDF
+            doc.close()
+            logger.info(f"Splitting {len(groups)} SKU groups across {len(shares)} worker processes")
+            with ProcessPoolExecutor(max_workers=len(shares)) as executor:
+                worker_source = pdf_path if _is_path(pdf_path) else bytes(pdf_path)
+                futures = [executor.submit(_split_groups_worker, worker_source, shipment_id, share, output_dir,
+                                           save_profile)
+                           for share in shares]
+                returned = {}
+                for future in futures:
+                    for name, data, sku, pages in future.result():
+                        returned[name] = (data, sku, pages)
+            # Archive members follow the group order, whichever worker wrote them
+            for group in groups:
+                name = sku_output_filename(shipment_id, group)
+                if name in returned:
+                    sink.add_bytes(name, *returned[name])
+        else:
+            # Split the PDF by SKU groups
+            try:
+                for group in groups:
+                    _write_sku_pdf(doc, shipment_id, group, sink)
+            finally:
+                # Close the original PDF
+                doc.close()
         
-        # Save the new PDF
-        try:
-            sku_doc.save(output_path)
-            logger.info(f"Saved {output_path} with {total_boxes} pages")
-        except Exception as e:
-            logger.error(f"Error saving PDF: {e}")
-            raise
-        finally:
-            sku_doc.close()
-    
-    # Close the original PDF
-    doc.close()
+        sink.close(shipment_id=shipment_id, source=os.path.basename(pdf_path) if _is_path(pdf_path) else None)
     
     logger.info("PDF splitting completed successfully")
-    return output_dir
+    return output_dir if archive is None else archive
+
+def iter_split_pdf_bytes(pdf_data, shipment_id, groups, bookmarked=False, save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Split a PDF held in memory without touching the filesystem.
+    
+    The PDF is opened and its page count checked right away; the split PDFs are
+    then produced one at a time as the generator is consumed, so only one of
+    them is held in memory.
+    
+    Args:
+        pdf_data: The PDF as bytes, bytearray, memoryview or a binary file object
+        shipment_id: Shipment ID for naming
+        groups: List of dictionaries with SKU grouping info (see process_csv, which
+                also accepts the CSV data in memory)
+        bookmarked: Produce one PDF with a bookmark per SKU instead of one PDF per SKU
+        save_profile: 'fast', 'compact' or 'archive' (see output_sinks.SAVE_PROFILES)
+        
+    Returns:
+        generator: (file name, PDF bytes) tuples
+    """
+    doc = open_pdf(pdf_data)
+    try:
+        _check_page_count(doc, groups)
+    except ValueError:
+        doc.close()
+        raise
+    sink = MemorySink(save_profile)
+    
+    def split_files():
+        with doc:
+            if bookmarked:
+                name = _write_bookmarked_pdf(doc, shipment_id, groups, sink)
+                yield name, sink.files.pop(name)
+            else:
+                for group in groups:
+                    name = _write_sku_pdf(doc, shipment_id, group, sink)
+                    yield name, sink.files.pop(name)
+    
+    return split_files()
+
+def split_pdf_bytes(pdf_data, shipment_id, groups, save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Split a PDF held in memory into one PDF per SKU, without temporary files.
+    
+    Args:
+        pdf_data: The PDF as bytes, bytearray, memoryview or a binary file object
+        shipment_id: Shipment ID for naming
+        groups: List of dictionaries with SKU grouping info
+        save_profile: 'fast', 'compact' or 'archive' (see output_sinks.SAVE_PROFILES)
+        
+    Returns:
+        dict: SKU -> PDF bytes, in group order
+    """
+    skus = {sku_output_filename(shipment_id, group): group["SKU"] for group in groups}
+    return {skus[name]: data
+            for name, data in iter_split_pdf_bytes(pdf_data, shipment_id, groups, save_profile=save_profile)}
 
 def main():
     """Main function to run the script."""
@@ -283,17 +856,49 @@ def main():
     parser.add_argument('csv_file', help='Path to the CSV file')
     parser.add_argument('pdf_file', help='Path to the PDF file')
     parser.add_argument('--output-dir', help='Output directory (default: shipment_[shipment_id])')
+    parser.add_argument('--engine', choices=['python', 'pandas'], default='python',
+                        help='CSV grouping engine; pandas is faster for very large CSVs (default: python)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Number of worker processes to split SKU groups with (default: 1)')
+    parser.add_argument('--archive', metavar='PATH',
+                        help="Write all split PDFs into one .zip/.tar archive instead of a directory ('-' for stdout)")
+    parser.add_argument('--archive-format', choices=ARCHIVE_FORMATS,
+                        help='Archive format (default: from the --archive extension, zip for stdout)')
+    parser.add_argument('--compress', action='store_true',
+                        help='Deflate zip members / gzip the tar archive (default: stored)')
+    parser.add_argument('--bookmarked', action='store_true',
+                        help='Write one PDF with a bookmark and page labels per SKU instead of one PDF per SKU')
+    parser.add_argument('--save-profile', choices=sorted(SAVE_PROFILES), default=DEFAULT_SAVE_PROFILE,
+                        help='fast writes quickest, compact and archive write smaller files (default: fast)')
+    parser.add_argument('--box-ids', action='store_true',
+                        help='Find each box\'s page by the Box ID printed on it instead of trusting the page order')
     
     args = parser.parse_args()
     
+    archive = args.archive
+    if archive == '-':
+        # Keep the real stdout for the archive; anything else printed to stdout
+        # (e.g. library warnings, also from worker processes) goes to stderr
+        sys.stdout.flush()
+        archive = os.fdopen(os.dup(1), 'wb')
+        os.dup2(2, 1)
+        if args.archive_format is None:
+            args.archive_format = "zip"
+    
     try:
         # Process the CSV file
-        shipment_id, groups = process_csv(args.csv_file)
+        if args.box_ids:
+            shipment_id, groups = process_csv_by_box_id(args.csv_file, args.pdf_file)
+        else:
+            shipment_id, groups = process_csv(args.csv_file, engine=args.engine)
         
         # Split the PDF file
-        output_dir = split_pdf(args.pdf_file, shipment_id, groups, args.output_dir)
+        output_dir = split_pdf(args.pdf_file, shipment_id, groups, args.output_dir, jobs=args.jobs,
+                               archive=archive, archive_format=args.archive_format,
+                               compress=args.compress, bookmarked=args.bookmarked,
+                               save_profile=args.save_profile)
         
-        logger.info(f"Process completed successfully. Output saved to {output_dir}")
+        logger.info(f"Process completed successfully. Output saved to {'stdout' if args.archive == '-' else output_dir}")
         return 0
     
     except Exception as e:
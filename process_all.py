@@ -9,64 +9,548 @@ matching them by shipment ID and splitting the PDFs accordingly.
 import os
 import sys
 import re
-from pdf_splitter import process_csv, split_pdf
+import time
+import argparse
+from pdf_splitter import process_csv, process_csv_by_box_id, read_shipment_id, split_pdf, sku_output_filename, CSV_EXTENSIONS, __version__
+from output_sinks import archive_extension, ARCHIVE_FORMATS, SAVE_PROFILES, DEFAULT_SAVE_PROFILE
+from manifest import is_up_to_date, write_manifest
+
+# Options recorded in the manifest; a change forces shipments to be split again
+MANIFEST_OPTIONS = {}
+
+# Amazon shipment IDs are upper-case alphanumerics starting with FBA
+SHIPMENT_ID_PATTERN = re.compile(r'(FBA[0-9A-Z]+)')
+
+# The label-text pipeline (PDFs without a CSV) ships with the GUI build
+TEXT_PIPELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "FbaShipmentSplitBuild")
+
+def manifest_options(archive_format=None, compress=False, save_profile=DEFAULT_SAVE_PROFILE, box_ids=False):
+    """Options recorded in the manifest for a run with the given output format, save profile and page plan."""
+    options = dict(MANIFEST_OPTIONS)
+    if archive_format is not None:
+        options.update(archive=archive_format, compress=compress)
+    if save_profile != DEFAULT_SAVE_PROFILE:
+        options["save_profile"] = save_profile
+    if box_ids:
+        options["box_ids"] = True
+    return options
+
+def is_output_dir(name):
+    """True for folders written by the splitters: shipment_<id> and <id>_<N>pages."""
+    return name.startswith("shipment_") or re.search(r'_\d+pages$', name) is not None
+
+def process_pair(csv_path, pdf_path, directory, engine="python", shipment_id=None, force=False,
+                 archive_format=None, compress=False, save_profile=DEFAULT_SAVE_PROFILE, box_ids=False):
+    """
+    Process one CSV/PDF pair and report the outcome.
+
+    Runs in a worker process when --jobs is greater than 1, so every call opens
+    its own copy of the PDF and nothing is shared between shipments.
+
+    Args:
+        csv_path: Path to the shipment CSV file
+        pdf_path: Path to the matching label PDF file
+        directory: Directory in which the shipment_[ShipmentID] folder is created
+        engine: CSV grouping engine passed to process_csv
+        shipment_id: Shipment ID from the file names, reported if the CSV cannot be read. The
+                     manifest of a previous run is looked up under the CSV's own Shipment ID,
+                     the one the output folder is named after
+        force: Split even if the manifest shows the inputs are unchanged
+        archive_format: 'zip' or 'tar' to write shipment_[ShipmentID]/shipment_[ShipmentID].zip
+                        (or .tar) instead of one PDF file per SKU
+        compress: Deflate (zip) or gzip (tar) the archive members
+        save_profile: Save profile of the split PDFs ('fast', 'compact' or 'archive')
+        box_ids: Find each box's page by the Box ID printed on it (process_csv_by_box_id)
+                 instead of assuming the pages are in Box ID order
+
+    Returns:
+        dict: Summary with csv_file, pdf_file, shipment_id, output_dir, groups, pages, skipped and error
+    """
+    result = {
+        "csv_file": os.path.basename(csv_path),
+        "pdf_file": os.path.basename(pdf_path),
+        "shipment_id": shipment_id,
+        "output_dir": None,
+        "groups": 0,
+        "pages": 0,
+        "skipped": False,
+        "error": None
+    }
+    inputs = {"csv": csv_path, "pdf": pdf_path}
+    options = manifest_options(archive_format, compress, save_profile, box_ids)
+
+    # Skip shipments already split from the same inputs (the CSV header and usually two stat calls)
+    if not force:
+        try:
+            csv_shipment_id = read_shipment_id(csv_path)
+        except Exception:
+            # Reported by process_csv below
+            csv_shipment_id = None
+        if csv_shipment_id:
+            output_dir = os.path.join(directory, f"shipment_{csv_shipment_id}")
+            if is_up_to_date(output_dir, inputs, __version__, options):
+                result.update(shipment_id=csv_shipment_id, output_dir=output_dir, skipped=True)
+                return result
+
+    try:
+        # Process the CSV file
+        if box_ids:
+            shipment_id, groups = process_csv_by_box_id(csv_path, pdf_path)
+        else:
+            shipment_id, groups = process_csv(csv_path, engine=engine)
+        result["shipment_id"] = shipment_id
+
+        # Create output directory as a subfolder where the files are located
+        output_dir = os.path.join(directory, f"shipment_{shipment_id}")
+
+        # Split the PDF file
+        if archive_format:
+            archive_name = f"shipment_{shipment_id}{archive_extension(archive_format, compress)}"
+            os.makedirs(output_dir, exist_ok=True)
+            split_pdf(pdf_path, shipment_id, groups, archive=os.path.join(output_dir, archive_name),
+                      archive_format=archive_format, compress=compress, save_profile=save_profile)
+            outputs = [archive_name]
+        else:
+            split_pdf(pdf_path, shipment_id, groups, output_dir, save_profile=save_profile)
+            outputs = [sku_output_filename(shipment_id, group) for group in groups]
+        result["output_dir"] = output_dir
+        result["groups"] = len(groups)
+        result["pages"] = sum(group["TotalBoxes"] for group in groups)
+
+        write_manifest(output_dir, inputs, __version__, options, outputs)
+    except Exception as e:
+        result["error"] = str(e)
+
+    return result
+
+def process_lone_pdf(pdf_path, archive_format=None, compress=False, save_profile=DEFAULT_SAVE_PROFILE):
+    """
+    Split a PDF that has no CSV using the label-text pipeline of the GUI build,
+    which finds the SKU printed on each label page. archive_format, compress and
+    save_profile work as in process_pair.
+
+    Returns:
+        dict: Summary in the same format as process_pair
+    """
+    if TEXT_PIPELINE_DIR not in sys.path:
+        sys.path.insert(0, TEXT_PIPELINE_DIR)
+    from pdf_processor import process_single_pdf_document
+    from progress import ProgressReporter, DocumentFinished, FileWritten, ERROR, INFO
+
+    events = []
+    progress = ProgressReporter()
+    progress.subscribe(events.append, INFO)
+    success, pages_split = process_single_pdf_document(pdf_path, None, progress, skip_unchanged=True,
+                                                       archive_format=archive_format, compress=compress,
+                                                       save_profile=save_profile)
+    finished = next(event for event in events if isinstance(event, DocumentFinished))
+    errors = [event.message for event in events if event.level >= ERROR]
+
+    return {
+        "csv_file": "-",
+        "pdf_file": os.path.basename(pdf_path),
+        "shipment_id": os.path.splitext(os.path.basename(pdf_path))[0],
+        "output_dir": finished.output_dir or os.path.dirname(pdf_path),
+        "groups": sum(1 for event in events if isinstance(event, FileWritten)),
+        "pages": pages_split,
+        "skipped": finished.skipped,
+        "error": None if success else (errors[-1] if errors else "Text pipeline failed")
+    }
+
+def _warm_worker(lone_pdfs):
+    """Pool initializer: pay the import cost once per worker, not per file."""
+    import signal
+    import fitz  # noqa: F401  PyMuPDF
+
+    # Ctrl+C is handled by the watching process, which lets running work finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if lone_pdfs:
+        if TEXT_PIPELINE_DIR not in sys.path:
+            sys.path.insert(0, TEXT_PIPELINE_DIR)
+        import pdf_processor  # noqa: F401
+
+def failed_result(csv_file, pdf_file, shipment_id, error):
+    """Summary in the format of process_pair for a shipment that could not be processed."""
+    return {
+        "csv_file": csv_file,
+        "pdf_file": pdf_file,
+        "shipment_id": shipment_id,
+        "output_dir": None,
+        "groups": 0,
+        "pages": 0,
+        "skipped": False,
+        "error": error
+    }
+
+def _describe(result):
+    if result["error"]:
+        return f"Error: {result['error']}"
+    if result["skipped"]:
+        return "Unchanged since last run, skipped"
+    return f"Output saved to {result['output_dir']}"
+
+def process_pairs_in_pool(jobs, args):
+    """
+    Process CSV/PDF pairs in a pool of args.jobs worker processes.
+
+    A worker that dies (out of memory, a crash in MuPDF) breaks the whole pool and
+    fails every shipment still queued in it. Those shipments are retried one at a
+    time in a new pool, so only the shipment that crashes its worker is reported as failed.
+
+    Args:
+        jobs: List of (csv_path, pdf_path, output_parent, shipment_id) tuples
+        args: Parsed command line arguments (jobs, engine, force and the output options)
+
+    Returns:
+        list: process_pair results, in the order of jobs
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+
+    results = {}
+    batches = [jobs]
+    while batches:
+        batch = batches.pop(0)
+        broken = []
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(batch))) as executor:
+            futures = {}
+            for job in batch:
+                csv_path, pdf_path, output_parent, shipment_id = job
+                try:
+                    futures[executor.submit(process_pair, csv_path, pdf_path, output_parent, args.engine,
+                                            shipment_id, args.force, args.archive, args.compress,
+                                            args.save_profile, args.box_ids)] = job
+                except BrokenProcessPool:
+                    broken.append(job)
+            for future in as_completed(futures):
+                job = futures[future]
+                csv_path, pdf_path, _, shipment_id = job
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    broken.append(job)
+                    continue
+                except Exception as e:
+                    result = failed_result(os.path.basename(csv_path), os.path.basename(pdf_path), shipment_id,
+                                           f"{type(e).__name__}: {e}")
+                print(f"Finished {result['csv_file']} with {result['pdf_file']}. {_describe(result)}")
+                results[job] = result
+        if broken and len(batch) == 1:
+            csv_path, pdf_path, _, shipment_id = batch[0]
+            result = failed_result(os.path.basename(csv_path), os.path.basename(pdf_path), shipment_id,
+                                   "Worker process died")
+            print(f"Finished {result['csv_file']} with {result['pdf_file']}. {_describe(result)}")
+            results[batch[0]] = result
+        elif broken:
+            print(f"A worker process died, retrying {len(broken)} shipment(s) one at a time")
+            batches.extend([job] for job in broken)
+
+    # Report in the same order as the shipments were matched
+    return [results[job] for job in jobs]
+
+def watch_directory(args):
+    """
+    Watch a directory and split shipments as soon as their files are complete.
+
+    Every complete CSV/PDF pair is queued to a pool of pre-started worker processes.
+    With --lone-pdfs, a PDF still without a CSV after --pair-timeout seconds is split
+    with the label-text pipeline instead. Runs until interrupted with Ctrl+C.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    from folder_watcher import FolderWatcher
+
+    directory = args.directory
+    extensions = CSV_EXTENSIONS + ('.pdf',)
+    watcher = FolderWatcher(directory, lambda name: name.lower().endswith(extensions),
+                            is_excluded_dir=is_output_dir, recursive=args.recursive,
+                            settle_seconds=args.settle)
+    print(f"Watching {directory} ({watcher.mode}) with {args.jobs} worker process(es), press Ctrl+C to stop")
+
+    index = {}      # shipment ID -> {"csv": set of paths, "pdf": set of paths}
+    changed = set() # shipment IDs whose files changed since they were last looked at
+    lone = {}       # PDF path -> time it was first seen without a CSV
+    reported = set()
+    running = {}    # future -> shipment ID or PDF path
+    queued = {}     # future -> (executor, csv file name, PDF file name, shipment ID) for failure reports
+    results = []
+
+    def start_pool():
+        return ProcessPoolExecutor(max_workers=max(1, args.jobs), initializer=_warm_worker,
+                                   initargs=(args.lone_pdfs,))
+
+    def restart_pool():
+        # A worker that crashed (out of memory, a crash in MuPDF) breaks the whole pool
+        nonlocal executor
+        print("A worker process died, starting a new worker pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = start_pool()
+
+    def submit(key, names, task, *task_args):
+        try:
+            future = executor.submit(task, *task_args)
+        except BrokenProcessPool:
+            restart_pool()
+            future = executor.submit(task, *task_args)
+        running[future] = key
+        queued[future] = (executor,) + names
+
+    def collect(future, restart=True):
+        """The result of a finished future; a crash is reported as a failed shipment."""
+        pool, csv_file, pdf_file, shipment_id = queued.pop(future)
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            if restart and pool is executor:
+                restart_pool()
+            return failed_result(csv_file, pdf_file, shipment_id, f"Worker process died: {e}")
+        except Exception as e:
+            return failed_result(csv_file, pdf_file, shipment_id, f"{type(e).__name__}: {e}")
+
+    executor = start_pool()
+    try:
+        while True:
+            for path in watcher.wait_for_files(timeout=1.0):
+                kind = "pdf" if path.lower().endswith(".pdf") else "csv"
+                match = SHIPMENT_ID_PATTERN.search(os.path.basename(path))
+                if match:
+                    index.setdefault(match.group(1), {"csv": set(), "pdf": set()})[kind].add(path)
+                    changed.add(match.group(1))
+                elif kind == "pdf":
+                    lone[path] = time.monotonic()
+                else:
+                    print(f"Could not extract shipment ID from {path}, skipping")
+
+            # Queue complete pairs; shipments already being split wait for the next pass
+            busy = set(running.values())
+            for shipment_id in sorted(changed - busy):
+                changed.discard(shipment_id)
+                files = index[shipment_id]
+                for kind in ("csv", "pdf"):
+                    files[kind] = {path for path in files[kind] if os.path.exists(path)}
+                if len(files["csv"]) > 1 or len(files["pdf"]) > 1:
+                    print(f"Shipment {shipment_id}: ambiguous files {sorted(files['csv'] | files['pdf'])}, skipping")
+                elif files["csv"] and files["pdf"]:
+                    (csv_path,), (pdf_path,) = files["csv"], files["pdf"]
+                    print(f"Queued shipment {shipment_id}: {os.path.basename(csv_path)} + {os.path.basename(pdf_path)}")
+                    submit(shipment_id, (os.path.basename(csv_path), os.path.basename(pdf_path), shipment_id),
+                           process_pair, csv_path, pdf_path, os.path.dirname(csv_path), args.engine, shipment_id,
+                           args.force, args.archive, args.compress, args.save_profile, args.box_ids)
+                elif files["pdf"]:
+                    for pdf_path in files["pdf"]:
+                        lone.setdefault(pdf_path, time.monotonic())
+
+            # PDFs whose CSV never arrived
+            now = time.monotonic()
+            for pdf_path, first_seen in list(lone.items()):
+                match = SHIPMENT_ID_PATTERN.search(os.path.basename(pdf_path))
+                if match and index.get(match.group(1), {}).get("csv"):
+                    del lone[pdf_path]
+                elif now - first_seen >= args.pair_timeout and pdf_path not in running.values():
+                    del lone[pdf_path]
+                    if args.lone_pdfs:
+                        print(f"Queued lone PDF: {os.path.basename(pdf_path)}")
+                        submit(pdf_path, ("-", os.path.basename(pdf_path), None),
+                               process_lone_pdf, pdf_path, args.archive, args.compress, args.save_profile)
+                    elif pdf_path not in reported:
+                        reported.add(pdf_path)
+                        print(f"No CSV for {os.path.basename(pdf_path)} (use --lone-pdfs to split it from the label text)")
+
+            for future in [f for f in running if f.done()]:
+                del running[future]
+                result = collect(future)
+                print(f"Finished {result['csv_file']} with {result['pdf_file']}. {_describe(result)}")
+                results.append(result)
+    except KeyboardInterrupt:
+        print("\nStopping, waiting for running shipments to finish...")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        watcher.close()
+
+    for future in running:
+        if future.done() and not future.cancelled():
+            results.append(collect(future, restart=False))
+
+    failed = print_summary(results)
+    return 1 if failed else 0
+
+def print_summary(results):
+    """Print a per-shipment summary and return the number of failed shipments."""
+    failed = [r for r in results if r["error"]]
+
+    print("\nSummary:")
+    for r in results:
+        if r["error"]:
+            print(f"  FAILED  {r['csv_file']} + {r['pdf_file']}: {r['error']}")
+        elif r.get("skipped"):
+            print(f"  SKIPPED {r['shipment_id']}: unchanged since last run -> {r['output_dir']}")
+        else:
+            print(f"  OK      {r['shipment_id']}: {r['groups']} SKUs, {r['pages']} pages -> {r['output_dir']}")
+    skipped = [r for r in results if r.get("skipped")]
+    print(f"Processed {len(results)} shipment(s): {len(results) - len(failed) - len(skipped)} succeeded, "
+          f"{len(skipped)} skipped, {len(failed)} failed")
+
+    return len(failed)
+
+def index_shipment_files(directory, recursive=False):
+    """
+    Index the CSV and PDF files in a directory by shipment ID in a single pass.
+
+    Output folders (see is_output_dir) are never indexed, since the split PDFs
+    inside them carry the shipment ID in their names as well.
+
+    Args:
+        directory: Directory to scan
+        recursive: Also scan subdirectories
+
+    Returns:
+        tuple: (index, unmatched) where index maps shipment ID to a dict with
+               'csv' and 'pdf' lists of paths, and unmatched lists CSV/PDF paths
+               without a shipment ID in their name
+    """
+    index = {}
+    unmatched = []
+    pending = [directory]
+
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if recursive and not is_output_dir(entry.name):
+                        pending.append(entry.path)
+                    continue
+
+                name = entry.name.lower()
+                if name.endswith(CSV_EXTENSIONS):
+                    kind = "csv"
+                elif name.endswith(".pdf"):
+                    kind = "pdf"
+                else:
+                    continue
+
+                match = SHIPMENT_ID_PATTERN.search(entry.name)
+                if not match:
+                    unmatched.append(entry.path)
+                    continue
+
+                files = index.setdefault(match.group(1), {"csv": [], "pdf": []})
+                files[kind].append(entry.path)
+
+    return index, unmatched
+
+def match_shipments(index):
+    """
+    Pair up the indexed CSV and PDF files of each shipment.
+
+    Returns:
+        tuple: (pairs, problems) where pairs is a list of (shipment_id, csv_path, pdf_path)
+               and problems is a list of (shipment_id, message) for shipments that have
+               a missing, duplicate or ambiguous match
+    """
+    pairs = []
+    problems = []
+
+    for shipment_id in sorted(index):
+        csv_paths = sorted(index[shipment_id]["csv"])
+        pdf_paths = sorted(index[shipment_id]["pdf"])
+
+        if not csv_paths:
+            problems.append((shipment_id, f"No CSV file found for {', '.join(pdf_paths)}"))
+        elif not pdf_paths:
+            problems.append((shipment_id, f"No matching PDF found for {', '.join(csv_paths)}"))
+        elif len(csv_paths) > 1:
+            problems.append((shipment_id, f"Duplicate CSV files: {', '.join(csv_paths)}"))
+        elif len(pdf_paths) > 1:
+            problems.append((shipment_id, f"Ambiguous PDF match for {csv_paths[0]}: {', '.join(pdf_paths)}"))
+        else:
+            pairs.append((shipment_id, csv_paths[0], pdf_paths[0]))
+
+    return pairs, problems
 
 def main():
     """Process all shipment files in the specified directory."""
-    if len(sys.argv) < 2:
-        print("Usage: python process_all.py <directory_path>")
-        return 1
-    
-    directory = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Split all shipment PDFs in a directory by SKU')
+    parser.add_argument('directory', help='Directory containing the CSV and PDF files')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Number of shipments to process in parallel (default: 1)')
+    parser.add_argument('--engine', choices=['python', 'pandas'], default='python',
+                        help='CSV grouping engine; pandas is faster for very large CSVs (default: python)')
+    parser.add_argument('--recursive', '-r', action='store_true',
+                        help='Also look for shipments in subdirectories')
+    parser.add_argument('--force', action='store_true',
+                        help='Split every shipment, even if its inputs are unchanged since the last run')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and split shipments as soon as their files land in the directory')
+    parser.add_argument('--settle', type=float, default=2.0,
+                        help='Watch mode: seconds a file must be unchanged before it is used (default: 2)')
+    parser.add_argument('--lone-pdfs', action='store_true',
+                        help='Watch mode: split PDFs without a CSV using the label-text pipeline')
+    parser.add_argument('--pair-timeout', type=float, default=30.0,
+                        help='Watch mode: seconds to wait for a CSV before a PDF counts as lone (default: 30)')
+    parser.add_argument('--archive', choices=ARCHIVE_FORMATS,
+                        help='Write each shipment as one zip or tar archive instead of one PDF per SKU')
+    parser.add_argument('--compress', action='store_true',
+                        help='With --archive: deflate (zip) or gzip (tar) the archive')
+    parser.add_argument('--save-profile', choices=sorted(SAVE_PROFILES), default=DEFAULT_SAVE_PROFILE,
+                        help='fast writes quickest, compact and archive write smaller files (default: fast)')
+    parser.add_argument('--box-ids', action='store_true',
+                        help='Find each box\'s page by the Box ID printed on it instead of trusting the page order')
+
+    args = parser.parse_args()
+
+    if args.watch:
+        return watch_directory(args)
+
+    directory = args.directory
     print(f"Processing files in directory: {directory}")
-    
-    # Get all CSV and PDF files
-    csv_files = [f for f in os.listdir(directory) if f.endswith('.csv')]
-    pdf_files = [f for f in os.listdir(directory) if f.endswith('.pdf')]
-    
-    print(f"Found {len(csv_files)} CSV files and {len(pdf_files)} PDF files")
-    
-    # Process each CSV file
-    for csv_file in csv_files:
-        # Extract shipment ID from CSV filename
-        match = re.search(r'(FBA\w+)', csv_file)
-        if not match:
-            print(f"Could not extract shipment ID from {csv_file}, skipping")
-            continue
-        
-        shipment_id = match.group(1)
-        print(f"\nProcessing shipment: {shipment_id}")
-        
-        # Find matching PDF file
-        matching_pdfs = [pdf for pdf in pdf_files if shipment_id in pdf]
-        if not matching_pdfs:
-            print(f"No matching PDF found for {csv_file}, skipping")
-            continue
-        
-        # Use the first matching PDF
-        pdf_file = matching_pdfs[0]
-        print(f"Using PDF file: {pdf_file}")
-        
-        # Full paths
-        csv_path = os.path.join(directory, csv_file)
-        pdf_path = os.path.join(directory, pdf_file)
-        
-        try:
-            # Process the CSV file
-            shipment_id, groups = process_csv(csv_path)
-            
-            # Create output directory as a subfolder where the files are located
-            output_dir = os.path.join(directory, f"shipment_{shipment_id}")
-            
-            # Split the PDF file
-            output_dir = split_pdf(pdf_path, shipment_id, groups, output_dir)
-            
-            print(f"Successfully processed {csv_file} with {pdf_file}")
-            print(f"Output saved to {output_dir}")
-        except Exception as e:
-            print(f"Error processing {csv_file} with {pdf_file}: {e}")
-    
-    return 0
+
+    # Index all CSV and PDF files by shipment ID
+    index, unmatched = index_shipment_files(directory, recursive=args.recursive)
+    csv_count = sum(len(files["csv"]) for files in index.values())
+    pdf_count = sum(len(files["pdf"]) for files in index.values())
+    print(f"Found {csv_count} CSV files and {pdf_count} PDF files for {len(index)} shipment(s)")
+
+    for path in unmatched:
+        print(f"Could not extract shipment ID from {path}, skipping")
+
+    # Match each CSV file with its PDF
+    pairs, problems = match_shipments(index)
+    for shipment_id, csv_path, pdf_path in pairs:
+        print(f"Shipment {shipment_id}: {os.path.basename(csv_path)} + {os.path.basename(pdf_path)}")
+
+    # Lone PDFs are not an error, everything else needs to be looked at
+    failed_matches = []
+    for shipment_id, message in problems:
+        print(f"Shipment {shipment_id}: {message}, skipping")
+        if index[shipment_id]["csv"]:
+            failed_matches.append(failed_result(
+                ", ".join(os.path.basename(p) for p in index[shipment_id]["csv"]),
+                ", ".join(os.path.basename(p) for p in index[shipment_id]["pdf"]) or "-",
+                shipment_id, message))
+
+    # Output folders are created next to each CSV file
+    jobs = [(csv_path, pdf_path, os.path.dirname(csv_path), shipment_id) for shipment_id, csv_path, pdf_path in pairs]
+
+    results = []
+    if args.jobs > 1 and len(jobs) > 1:
+        print(f"\nProcessing {len(jobs)} shipment(s) with {args.jobs} worker processes")
+        results = process_pairs_in_pool(jobs, args)
+    else:
+        for csv_path, pdf_path, output_parent, shipment_id in jobs:
+            print(f"\nProcessing shipment: {os.path.basename(csv_path)}")
+            result = process_pair(csv_path, pdf_path, output_parent, args.engine, shipment_id, args.force,
+                                  args.archive, args.compress, args.save_profile, args.box_ids)
+            if result["error"]:
+                print(f"Error processing {result['csv_file']} with {result['pdf_file']}: {result['error']}")
+            elif result["skipped"]:
+                print(f"Unchanged since last run, skipping (output in {result['output_dir']})")
+            else:
+                print(f"Successfully processed {result['csv_file']} with {result['pdf_file']}")
+                print(f"Output saved to {result['output_dir']}")
+            results.append(result)
+
+    failed = print_summary(results + failed_matches)
+    return 1 if failed else 0
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Local HTTP split service.
+
+Keeps a pool of worker processes that have already imported PyMuPDF and the
+splitters, so a split does not pay interpreter start-up and imports. A label
+PDF (plus optional shipment CSV) is uploaded once and the group plan comes back
+right away; the PDF of each SKU is only generated when it is requested, and
+generated PDFs are kept in an LRU cache bounded by total size.
+
+Endpoints:
+    POST   /shipments                   Upload: multipart/form-data with a 'pdf' file and an optional
+                                        'csv' file, or the raw PDF as the request body. Returns the plan
+    GET    /shipments/<job>             The plan of an uploaded shipment
+    GET    /shipments/<job>/files/<f>   One SKU PDF (?profile=fast|compact|archive)
+    DELETE /shipments/<job>             Forget a shipment and its cached PDFs
+    GET    /health                      Pool, job and cache statistics
+
+Without a CSV, SKUs are found from the label text with the pipeline of the GUI
+build (FbaShipmentSplitBuild/pdf_processor.py).
+
+Usage: python split_service.py [--port 8765] [--workers 4] [--cache-mb 256]
+"""
+
+import os
+import sys
+import json
+import shutil
+import signal
+import hashlib
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from collections import OrderedDict
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+from output_sinks import SAVE_PROFILES, DEFAULT_SAVE_PROFILE
+from process_all import TEXT_PIPELINE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Documents each worker keeps open between requests
+WORKER_OPEN_DOCUMENTS = 4
+
+class ByteLRUCache:
+    """Thread-safe LRU cache of bytes values, evicting the least recently used entries beyond max_bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self._entries[key] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def discard(self, predicate):
+        """Removes all entries whose key matches predicate."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self.total_bytes -= len(self._entries.pop(key))
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.total_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+# --- Worker process side ---
+
+_documents = OrderedDict()  # spooled PDF path -> open fitz document
+
+def _warm_worker():
+    """Pool initializer: import everything a split needs once per worker."""
+    import fitz  # noqa: F401  PyMuPDF
+
+    # Ctrl+C is handled by the server process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if TEXT_PIPELINE_DIR not in sys.path:
+        sys.path.insert(0, TEXT_PIPELINE_DIR)
+    import pdf_splitter
+    import pdf_processor  # noqa: F401
+    pdf_splitter.logger.setLevel(logging.WARNING)
+
+def _ping(_=None):
+    """Warm-up task; returns the worker's process ID."""
+    time.sleep(0.05)
+    return os.getpid()
+
+def _open_document(pdf_path):
+    """Opens a spooled PDF, reusing the worker's open copy."""
+    import fitz  # PyMuPDF
+
+    doc = _documents.pop(pdf_path, None)
+    if doc is None:
+        doc = fitz.open(pdf_path)
+    _documents[pdf_path] = doc
+    while len(_documents) > WORKER_OPEN_DOCUMENTS:
+        _documents.popitem(last=False)[1].close()
+    return doc
+
+def _build_plan(pdf_path, csv_data, shipping_id):
+    """
+    Builds the group plan of a spooled PDF: from the CSV if there is one, otherwise
+    from the SKU printed on each label.
+
+    Returns:
+        dict: shipment_id, source ('csv' or 'labels'), pages and files, a list of
+              dicts with sku, file, pages and runs ((first, last) 0-based page runs)
+    """
+    doc = _open_document(pdf_path)
+    if csv_data is not None:
+        from pdf_splitter import process_csv, sku_output_filename, _check_page_count
+
+        shipment_id, groups = process_csv(csv_data)
+        _check_page_count(doc, groups)
+        files = [{"sku": group["SKU"], "file": sku_output_filename(shipment_id, group), "pages": group["TotalBoxes"],
+                  "runs": [(group["PageRange"][0] - 1, group["PageRange"][1] - 1)]}
+                 for group in groups]
+        return {"shipment_id": shipment_id, "source": "csv", "pages": len(doc), "files": files}
+
+    from pdf_processor import (_detect_interleaved_mode, _scan_sku_pages, _plan_output_pages,
+                               _contiguous_page_runs, _output_filename_base)
+
+    is_interleaved_mode = _detect_interleaved_mode(doc, None)
+    sku_pages, _ = _scan_sku_pages(doc, None, interleaved=is_interleaved_mode)
+    sku_output_pages = _plan_output_pages(sku_pages, is_interleaved_mode, len(doc))
+    files = []
+    for sku, page_list in sku_output_pages.items():
+        valid_pages = [page_num for page_num in page_list if 0 <= page_num < len(doc)]
+        if valid_pages:
+            name = f"{_output_filename_base(len(files) + 1, sku, shipping_id, len(page_list))}.pdf"
+            files.append({"sku": sku, "file": name, "pages": len(valid_pages),
+                          "runs": _contiguous_page_runs(valid_pages)})
+    return {"shipment_id": shipping_id, "source": "labels", "pages": len(doc),
+            "interleaved": is_interleaved_mode, "files": files}
+
+def _generate_pdf(pdf_path, runs, save_profile):
+    """Builds one SKU PDF from page runs of a spooled PDF. Returns the PDF bytes."""
+    import fitz  # PyMuPDF
+    from output_sinks import prepare_for_save
+
+    doc = _open_document(pdf_path)
+    sku_doc = fitz.open()
+    try:
+        for first_page, last_page in runs:
+            sku_doc.insert_pdf(doc, from_page=first_page, to_page=last_page)
+        return sku_doc.tobytes(**prepare_for_save(sku_doc, save_profile))
+    finally:
+        sku_doc.close()
+
+# --- Server side ---
+
+class SplitService:
+    """
+    Shipments uploaded to the service, the warm worker pool and the output cache.
+
+    Args:
+        workers: Number of worker processes
+        cache_bytes: Size limit of the generated PDF cache
+        max_jobs: Shipments kept at most; the least recently used one is dropped beyond that
+    """
+
+    def __init__(self, workers=4, cache_bytes=256 * 1024 * 1024, max_jobs=100):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.spool_dir = tempfile.mkdtemp(prefix="split_service_")
+        self.cache = ByteLRUCache(cache_bytes)
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()  # job id -> {"pdf_path", "plan"}
+        self._pending = {}          # cache key -> future of a PDF being generated
+        # Reentrant: a done callback runs right away if the future has already finished
+        self._lock = threading.RLock()
+
+        self.workers = max(1, workers)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # Start every worker now rather than on the first requests
+        list(self.executor.map(_ping, range(self.workers * 2)))
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def submit_shipment(self, pdf_data, csv_data=None, shipping_id=None):
+        """
+        Spools an uploaded PDF and builds its plan. Uploading the same files with the
+        same shipping ID again returns the existing job, including any PDFs already generated.
+
+        Returns:
+            tuple: (job id, plan)
+        """
+        shipping_id = shipping_id or "labels"
+        digest = hashlib.sha256(pdf_data)
+        if csv_data is not None:
+            digest.update(csv_data)
+        # The shipping ID names the output files, so it is part of the job too
+        digest.update(b"\0" + shipping_id.encode("utf-8"))
+        job_id = digest.hexdigest()[:16]
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+                return job_id, job["plan"]
+
+        pdf_path = os.path.join(self.spool_dir, f"{job_id}.pdf")
+        with open(pdf_path, 'wb') as f:
+            f.write(pdf_data)
+        try:
+            plan = self.executor.submit(_build_plan, pdf_path, csv_data, shipping_id).result()
+        except Exception:
+            os.remove(pdf_path)
+            raise
+
+        with self._lock:
+            self._jobs[job_id] = {"pdf_path": pdf_path, "plan": plan}
+            while len(self._jobs) > self.max_jobs:
+                self._forget(next(iter(self._jobs)))
+        return job_id, plan
+
+    def get_plan(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job["plan"] if job else None
+
+    def get_file(self, job_id, file_name, save_profile=DEFAULT_SAVE_PROFILE):
+        """
+        Returns the PDF bytes of one planned file, generating it in a worker unless
+        it is cached. Concurrent requests for the same file share one generation.
+        Returns None for an unknown job or file.
+        """
+        key = (job_id, file_name, save_profile)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            entry = next((entry for entry in job["plan"]["files"] if entry["file"] == file_name), None)
+            if entry is None:
+                return None
+            future = self._pending.get(key)
+            if future is None:
+                future = self.executor.submit(_generate_pdf, job["pdf_path"], entry["runs"], save_profile)
+                self._pending[key] = future
+                future.add_done_callback(lambda done: self._generated(key, done))
+        return future.result()
+
+    def _generated(self, key, future):
+        if not future.cancelled() and future.exception() is None:
+            with self._lock:
+                known = key[0] in self._jobs
+            if known:
+                self.cache.put(key, future.result())
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def delete_shipment(self, job_id):
+        with self._lock:
+            if job_id not in self._jobs:
+                return False
+            self._forget(job_id)
+            return True
+
+    def _forget(self, job_id):
+        """Drops a job, its spooled PDF and cached outputs (caller holds the lock)."""
+        job = self._jobs.pop(job_id)
+        try:
+            os.remove(job["pdf_path"])
+        except OSError:
+            pass
+        self.cache.discard(lambda key: key[0] == job_id)
+
+    def stats(self):
+        with self._lock:
+            jobs = len(self._jobs)
+            pending = len(self._pending)
+        return {"workers": self.workers, "jobs": jobs, "generating": pending, "cache": self.cache.stats()}
+
+def _plan_response(job_id, plan):
+    files = [{"sku": entry["sku"], "file": entry["file"], "pages": entry["pages"],
+              "url": f"/shipments/{job_id}/files/{quote(entry['file'])}"}
+             for entry in plan["files"]]
+    response = {key: value for key, value in plan.items() if key != "files"}
+    response.update(job=job_id, files=files)
+    return response
+
+def _parse_upload(content_type, body):
+    """
+    Splits an upload into (pdf bytes, csv bytes or None, PDF file name or None).
+    Accepts multipart/form-data with 'pdf' and 'csv' fields, or a raw PDF body.
+    """
+    if not content_type.startswith("multipart/form-data"):
+        return body, None, None
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = (part.get_payload(decode=True), part.get_filename())
+    if "pdf" not in fields:
+        raise ValueError("Upload has no 'pdf' field")
+    pdf_data, pdf_name = fields["pdf"]
+    csv_data = fields["csv"][0] if "csv" in fields else None
+    return pdf_data, csv_data, pdf_name
+
+class SplitRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ShipmentSplitter"
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, indent=4).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _path_parts(self):
+        url = urlsplit(self.path)
+        return [unquote(part) for part in url.path.split("/") if part], parse_qs(url.query)
+
+    def do_GET(self):
+        service = self.server.service
+        parts, query = self._path_parts()
+        if parts == ["health"]:
+            return self._send_json(200, service.stats())
+        if len(parts) == 2 and parts[0] == "shipments":
+            plan = service.get_plan(parts[1])
+            if plan is None:
+                return self._send_json(404, {"error": "Unknown shipment"})
+            return self._send_json(200, _plan_response(parts[1], plan))
+        if len(parts) == 4 and parts[0] == "shipments" and parts[2] == "files":
+            save_profile = query.get("profile", [DEFAULT_SAVE_PROFILE])[0]
+            if save_profile not in SAVE_PROFILES:
+                return self._send_json(400, {"error": f"Unknown save profile: {save_profile}"})
+            try:
+                data = service.get_file(parts[1], parts[3], save_profile)
+            except Exception as e:
+                return self._send_json(500, {"error": str(e)})
+            if data is None:
+                return self._send_json(404, {"error": "Unknown shipment or file"})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(parts[3])}")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return None
+        return self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        service = self.server.service
+        parts, query = self._path_parts()
+        if parts != ["shipments"]:
+            return self._send_json(404, {"error": "Not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return self._send_json(400, {"error": "Empty upload"})
+        if length > self.server.max_upload_bytes:
+            return self._send_json(413, {"error": "Upload too large"})
+        body = self.rfile.read(length)
+        try:
+            pdf_data, csv_data, pdf_name = _parse_upload(self.headers.get("Content-Type", ""), body)
+            shipping_id = query.get("shipment_id", [None])[0]
+            if shipping_id is None and pdf_name:
+                shipping_id = os.path.splitext(os.path.basename(pdf_name))[0]
+                if shipping_id.lower().startswith("package-"):
+                    shipping_id = shipping_id[len("package-"):]
+            job_id, plan = service.submit_shipment(pdf_data, csv_data, shipping_id)
+        except Exception as e:
+            return self._send_json(400, {"error": str(e)})
+        return self._send_json(201, _plan_response(job_id, plan))
+
+    def do_DELETE(self):
+        parts, _ = self._path_parts()
+        if len(parts) == 2 and parts[0] == "shipments" and self.server.service.delete_shipment(parts[1]):
+            return self._send_json(200, {"deleted": parts[1]})
+        return self._send_json(404, {"error": "Unknown shipment"})
+
+def main():
+    """Run the split service until interrupted."""
+    parser = argparse.ArgumentParser(description='Local HTTP service splitting label PDFs by SKU on demand')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--workers', '-j', type=int, default=4,
+                        help='Number of pre-started worker processes (default: 4)')
+    parser.add_argument('--cache-mb', type=float, default=256,
+                        help='Size limit of the cache of generated PDFs in MB (default: 256)')
+    parser.add_argument('--max-jobs', type=int, default=100,
+                        help='Uploaded shipments kept before the least recently used is dropped (default: 100)')
+    parser.add_argument('--max-upload-mb', type=float, default=500,
+                        help='Largest accepted upload in MB (default: 500)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    service = SplitService(args.workers, int(args.cache_mb * 1024 * 1024), args.max_jobs)
+    server = ThreadingHTTPServer((args.host, args.port), SplitRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.max_upload_bytes = int(args.max_upload_mb * 1024 * 1024)
+    logger.info(f"Split service on http://{args.host}:{server.server_address[1]} with {service.workers} worker(s)")
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    # Stop the same way on SIGTERM (service managers) as on Ctrl+C
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping")
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
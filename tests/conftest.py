@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The CSV pipeline and the label-text pipeline of the GUI build are separate import roots
+for path in (ROOT, os.path.join(ROOT, "FbaShipmentSplitBuild")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
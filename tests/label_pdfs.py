@@ -0,0 +1,17 @@
+"""Small label PDFs for the tests."""
+
+import fitz  # PyMuPDF
+
+
+def label_pdf(page_skus):
+    """A label PDF with one page per entry: a "Single SKU / <sku> / Qty 1" label, or a carrier page for None."""
+    doc = fitz.open()
+    for sku in page_skus:
+        page = doc.new_page(width=288, height=432)
+        if sku is None:
+            page.insert_text((20, 40), "UPS GROUND", fontsize=14)
+        else:
+            page.insert_text((20, 300), "Single SKU", fontsize=9)
+            page.insert_text((20, 315), sku, fontsize=9)
+            page.insert_text((20, 330), "Qty 1", fontsize=9)
+    return doc
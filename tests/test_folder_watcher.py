@@ -0,0 +1,31 @@
+import time
+
+import pytest
+
+from folder_watcher import FolderWatcher
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_file_is_handed_out_once_it_stops_changing(tmp_path, use_inotify):
+    watcher = FolderWatcher(str(tmp_path), lambda name: name.endswith(".pdf"), settle_seconds=0.3,
+                            poll_interval=0.05, use_inotify=use_inotify)
+    try:
+        labels = tmp_path / "labels.pdf"
+        (tmp_path / "notes.txt").write_text("ignored")
+        with open(labels, "wb") as f:
+            # Still being written: each chunk restarts the settle time
+            for _ in range(4):
+                f.write(b"%PDF" * 1000)
+                f.flush()
+                last_write = time.monotonic()
+                assert watcher.wait_for_files(timeout=0.15) == []
+
+        assert watcher.wait_for_files(timeout=2) == [str(labels)]
+        assert time.monotonic() - last_write >= 0.3
+        assert watcher.wait_for_files(timeout=0.5) == []
+
+        # Handed out again once it changes
+        labels.write_bytes(b"%PDF replaced")
+        assert watcher.wait_for_files(timeout=2) == [str(labels)]
+    finally:
+        watcher.close()
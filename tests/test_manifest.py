@@ -0,0 +1,45 @@
+import os
+
+from manifest import is_up_to_date, load_manifest, write_manifest
+
+OPTIONS = {"archive": None, "save_profile": "fast"}
+
+
+def split_output(tmp_path):
+    """Inputs and an output folder with a manifest, as left by a completed split."""
+    csv_path = tmp_path / "FBA15TEST.csv"
+    csv_path.write_text("Shipment ID,FBA15TEST\n")
+    pdf_path = tmp_path / "labels.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7 labels")
+    output_dir = tmp_path / "shipment_FBA15TEST"
+    output_dir.mkdir()
+    (output_dir / "SKU-A.pdf").write_bytes(b"%PDF-1.7 SKU-A")
+    inputs = {"csv": str(csv_path), "pdf": str(pdf_path)}
+    write_manifest(str(output_dir), inputs, "1.1.0", OPTIONS)
+    return str(output_dir), inputs
+
+
+def test_unchanged_run_is_skipped_until_version_options_or_outputs_change(tmp_path):
+    output_dir, inputs = split_output(tmp_path)
+
+    assert is_up_to_date(output_dir, inputs, "1.1.0", OPTIONS)
+    assert not is_up_to_date(output_dir, inputs, "1.2.0", OPTIONS)
+    assert not is_up_to_date(output_dir, inputs, "1.1.0", dict(OPTIONS, save_profile="compact"))
+    assert not is_up_to_date(output_dir, {"pdf": inputs["pdf"]}, "1.1.0", OPTIONS)
+    os.remove(os.path.join(output_dir, "SKU-A.pdf"))
+    assert not is_up_to_date(output_dir, inputs, "1.1.0", OPTIONS)
+
+
+def test_touched_input_is_rehashed_and_only_changed_content_forces_a_split(tmp_path):
+    output_dir, inputs = split_output(tmp_path)
+    stat = os.stat(inputs["pdf"])
+    os.utime(inputs["pdf"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    # Same content: still up to date, and the new mtime is remembered
+    assert is_up_to_date(output_dir, inputs, "1.1.0", OPTIONS)
+    assert load_manifest(output_dir)["inputs"]["pdf"]["mtime_ns"] == stat.st_mtime_ns + 10**9
+
+    # Same size, other content
+    with open(inputs["pdf"], "wb") as f:
+        f.write(b"%PDF-1.7 LABELS")
+    assert not is_up_to_date(output_dir, inputs, "1.1.0", OPTIONS)
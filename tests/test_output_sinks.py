@@ -0,0 +1,56 @@
+import io
+import json
+import tarfile
+import zipfile
+
+import fitz  # PyMuPDF
+
+from label_pdfs import label_pdf
+from output_sinks import INDEX_MEMBER, open_archive_sink
+
+
+class WriteOnlyStream(io.RawIOBase):
+    """A pipe-like binary stream: it cannot seek or tell."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+
+def write_two_skus(sink):
+    doc = label_pdf(["SKU-A", "SKU-A", "SKU-B"])
+    for name, sku, (first, last) in (("SKU-A.pdf", "SKU-A", (0, 1)), ("SKU-B.pdf", "SKU-B", (2, 2))):
+        part = fitz.open()
+        part.insert_pdf(doc, from_page=first, to_page=last)
+        sink.write_pdf(name, part, sku, last - first + 1)
+    sink.close(shipment_id="FBA15TEST")
+
+
+def test_zip_archive_holds_each_pdf_and_an_index(tmp_path):
+    archive_path = tmp_path / "shipment.zip"
+    write_two_skus(open_archive_sink(str(archive_path)))
+
+    with zipfile.ZipFile(archive_path) as archive:
+        assert archive.namelist() == ["SKU-A.pdf", "SKU-B.pdf", INDEX_MEMBER]
+        index = json.loads(archive.read(INDEX_MEMBER))
+        assert fitz.open("pdf", archive.read("SKU-A.pdf")).page_count == 2
+    assert index["shipment_id"] == "FBA15TEST"
+    assert [(member["sku"], member["member"], member["pages"]) for member in index["members"]] == [
+        ("SKU-A", "SKU-A.pdf", 2), ("SKU-B", "SKU-B.pdf", 1)]
+
+
+def test_gzipped_tar_archive_streams_to_an_unseekable_file():
+    stream = WriteOnlyStream()
+    write_two_skus(open_archive_sink(stream, "tar", compress=True))
+
+    with tarfile.open(fileobj=io.BytesIO(bytes(stream.data)), mode="r:gz") as archive:
+        assert archive.getnames() == ["SKU-A.pdf", "SKU-B.pdf", INDEX_MEMBER]
+        index = json.loads(archive.extractfile(INDEX_MEMBER).read())
+        assert fitz.open("pdf", archive.extractfile("SKU-B.pdf").read()).page_count == 1
+    assert [member["bytes"] > 0 for member in index["members"]] == [True, True]
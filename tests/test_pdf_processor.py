@@ -0,0 +1,77 @@
+import fitz
+import pytest
+
+import pdf_processor
+from label_pdfs import label_pdf
+from progress import ProgressReporter
+from scan_cache import ScanCache
+
+
+def interleaved(skus):
+    return [page for sku in skus for page in (sku, None)]
+
+
+def test_periodic_scan_reads_label_in_carrier_slot_at_sku_boundary():
+    # The ODD label takes the carrier slot after the last A label; the page pattern stays intact
+    pages = interleaved(["A"] * 20) + ["A", "ODD"] + interleaved(["B"] * 20)
+    doc = label_pdf(pages)
+    full = pdf_processor._scan_sku_pages(doc, ProgressReporter())
+    periodic = pdf_processor._scan_sku_pages(doc, ProgressReporter(), strategy="bisect", interleaved=True)
+    assert periodic == full
+    assert periodic[0]["ODD"] == [41]
+
+
+def test_periodic_scan_reads_label_in_trailing_carrier_slot():
+    pages = interleaved(["A"] * 20) + ["A", "ODD"]
+    doc = label_pdf(pages)
+    periodic = pdf_processor._scan_sku_pages(doc, ProgressReporter(), strategy="bisect", interleaved=True)
+    assert periodic == pdf_processor._scan_sku_pages(doc, ProgressReporter())
+
+
+def test_interleaved_scan_reads_label_that_breaks_the_pattern():
+    # X takes a carrier slot inside A's run; only reading every page finds it
+    pages = interleaved(["A"] * 10) + ["A", "X"] + interleaved(["A"] * 10 + ["B"] * 5)
+    doc = label_pdf(pages)
+    sku_pages, _ = pdf_processor._scan_sku_pages(doc, ProgressReporter(), interleaved=True)
+    assert sku_pages == pdf_processor._scan_sku_pages(doc, ProgressReporter())[0]
+    assert sku_pages["X"] == [21]
+
+
+def test_interleaved_full_scans_are_cached_and_skipping_scans_are_not(tmp_path):
+    pdf_path = tmp_path / "package-FBA15TEST.pdf"
+    label_pdf(interleaved(["A"] * 20 + ["B"] * 20)).save(pdf_path)
+    sha256 = pdf_processor.file_sha256(str(pdf_path))
+    with ScanCache(str(tmp_path / "scan_cache.sqlite3")) as scan_cache:
+        success, pages = pdf_processor.process_single_pdf_document(str(pdf_path), None, ProgressReporter(),
+                                                                   scan_cache=scan_cache, scan_strategy="bisect")
+        assert success and pages == 80
+        assert scan_cache.lookup(sha256, 80) is None
+        pdf_processor.process_single_pdf_document(str(pdf_path), None, ProgressReporter(), scan_cache=scan_cache)
+        interleaved_mode, page_skus = scan_cache.lookup(sha256, 80)
+        assert interleaved_mode and page_skus == interleaved(["A"] * 20 + ["B"] * 20)
+
+
+def test_iter_split_pdf_bytes_raises_for_invalid_pdf_at_call_time():
+    with pytest.raises(fitz.FileDataError):
+        pdf_processor.iter_split_pdf_bytes(b"not a pdf")
+
+
+def test_iter_split_pdf_bytes_splits_by_sku():
+    split = pdf_processor.iter_split_pdf_bytes(label_pdf(["A", "A", "B"]).tobytes(), "FBA15TEST")
+    pages = {name: len(fitz.open(stream=data, filetype="pdf")) for name, data in split}
+    assert sorted(pages.values()) == [1, 2]
+
+
+def test_bookmarked_output_is_one_pdf_with_a_section_per_sku(tmp_path):
+    pdf_path = tmp_path / "package-FBA15TEST.pdf"
+    label_pdf(["A", "B", "A", "B", "B"]).save(pdf_path)
+    success, pages = pdf_processor.process_single_pdf_document(str(pdf_path), None, ProgressReporter(),
+                                                               bookmarked=True)
+    assert success and pages == 5
+
+    doc = fitz.open(tmp_path / "FBA15TEST_5pages" / "FBA15TEST_bookmarked.pdf")
+    assert doc.get_toc() == [[1, "A", 1], [1, "B", 3]]
+    assert [page.get_text().split()[2] for page in doc] == ["A", "A", "B", "B", "B"]
+    # get_label() stops at the '/', so read the labels as stored
+    _, labels = doc.xref_get_key(doc.pdf_catalog(), "PageLabels")
+    assert "(A-2/2)" in labels and "(B-3/3)" in labels
@@ -0,0 +1,70 @@
+import csv
+import random
+
+import fitz  # PyMuPDF
+import pytest
+
+from pdf_splitter import process_csv, process_csv_by_box_id
+
+
+def write_shipment_csv(path):
+    """A box-content CSV with several SKUs: split rows, unsorted and comma-separated Box IDs, blank and short rows."""
+    rows = [
+        ("SKU-B", "B0B", "FBA15TESTU000007, FBA15TESTU000005"),
+        ("SKU-A", "B0A", "FBA15TESTU000003,FBA15TESTU000001,FBA15TESTU000002"),
+        None,
+        ("SKU-C", "B0C", "FBA15TESTU000009"),
+        ("SKU-B", "B0B", "FBA15TESTU000004 , FBA15TESTU000006,"),
+        ("SKU-A", "B0A", "FBA15TESTU000008"),
+        ("Totals",),
+        ("SKU-D", "B0D", " "),
+    ]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Shipment ID", "FBA15TEST"])
+        writer.writerow([])
+        writer.writerow(["SKU", "ASIN", "Total boxes", "Box ID"])
+        for row in rows:
+            if row is None:
+                writer.writerow([])
+            elif len(row) == 3:
+                sku, asin, box_ids = row
+                writer.writerow([sku, asin, len(box_ids.split(",")), box_ids])
+            else:
+                writer.writerow(list(row))
+
+
+def test_python_and_pandas_engines_give_identical_groups(tmp_path):
+    pytest.importorskip("pandas")
+    csv_path = tmp_path / "FBA15TEST.csv"
+    write_shipment_csv(csv_path)
+    shipment_id, groups = process_csv(str(csv_path), engine="python")
+    assert process_csv(str(csv_path), engine="pandas") == (shipment_id, groups)
+    assert shipment_id == "FBA15TEST"
+    assert [(group["SKU"], group["TotalBoxes"], group["PageRange"]) for group in groups] == [
+        ("SKU-A", 4, (1, 4)), ("SKU-B", 4, (5, 8)), ("SKU-C", 1, (9, 9))]
+
+
+def test_box_ids_are_read_on_rotated_shuffled_pages(tmp_path):
+    csv_path = tmp_path / "FBA15TEST.csv"
+    write_shipment_csv(csv_path)
+    box_numbers = list(range(1, 10))
+    random.Random(3).shuffle(box_numbers)
+    doc = fitz.open()
+    for box_number in box_numbers:
+        # Landscape labels shown upright: the Box ID runs past the width of the rotated page
+        page = doc.new_page(width=432, height=288)
+        page.insert_text((230, 60), f"FBA15TESTU{box_number:06d}", fontsize=9)
+        page.set_rotation(90)
+    pdf_path = tmp_path / "labels.pdf"
+    doc.save(pdf_path)
+
+    shipment_id, groups = process_csv_by_box_id(str(csv_path), str(pdf_path))
+
+    page_of_box = {box_number: page_num for page_num, box_number in enumerate(box_numbers, 1)}
+    assert shipment_id == "FBA15TEST"
+    assert [(group["SKU"], group["Pages"]) for group in groups] == [
+        ("SKU-A", [page_of_box[n] for n in (1, 2, 3, 8)]),
+        ("SKU-B", [page_of_box[n] for n in (4, 5, 6, 7)]),
+        ("SKU-C", [page_of_box[9]]),
+    ]
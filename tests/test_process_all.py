@@ -0,0 +1,47 @@
+import os
+from types import SimpleNamespace
+
+import process_all
+from label_pdfs import label_pdf
+from process_all import process_pair
+from test_pdf_splitter import write_shipment_csv
+
+
+def test_unchanged_shipment_is_skipped_when_file_names_carry_another_id(tmp_path):
+    csv_path = tmp_path / "FBA15OTHERNAME.csv"
+    pdf_path = tmp_path / "package-FBA15OTHERNAME.pdf"
+    write_shipment_csv(csv_path)
+    label_pdf(["SKU-A"] * 9).save(pdf_path)
+
+    first = process_pair(str(csv_path), str(pdf_path), str(tmp_path), shipment_id="FBA15OTHERNAME")
+    assert first["error"] is None and not first["skipped"]
+    assert first["output_dir"] == str(tmp_path / "shipment_FBA15TEST")
+
+    second = process_pair(str(csv_path), str(pdf_path), str(tmp_path), shipment_id="FBA15OTHERNAME")
+    assert second["skipped"] and second["output_dir"] == first["output_dir"]
+
+
+def crash_on_marked_csv(csv_path, *args):
+    if "CRASH" in csv_path:
+        os._exit(9)
+    return process_pair(csv_path, *args)
+
+
+def test_crashed_worker_fails_only_its_shipment(tmp_path, monkeypatch):
+    jobs = []
+    for name in ("FBA15CRASH", "FBA15GOOD1", "FBA15GOOD2"):
+        directory = tmp_path / name
+        directory.mkdir()
+        write_shipment_csv(directory / f"{name}.csv")
+        label_pdf(["SKU-A"] * 9).save(directory / f"package-{name}.pdf")
+        jobs.append((str(directory / f"{name}.csv"), str(directory / f"package-{name}.pdf"), str(directory), name))
+    # Workers are forked, so they run the patched function too
+    monkeypatch.setattr(process_all, "process_pair", crash_on_marked_csv)
+    args = SimpleNamespace(jobs=2, engine="python", force=False, archive=None, compress=False,
+                           save_profile="fast", box_ids=False)
+
+    results = process_all.process_pairs_in_pool(jobs, args)
+
+    assert [result["pdf_file"] for result in results] == [f"package-{job[3]}.pdf" for job in jobs]
+    assert results[0]["error"] == "Worker process died"
+    assert [result["error"] for result in results[1:]] == [None, None]
@@ -0,0 +1,21 @@
+import scan_cache
+from scan_cache import ScanCache
+
+SHA256 = "0" * 64
+
+
+def test_scans_of_another_scanner_version_are_not_used(tmp_path, monkeypatch):
+    with ScanCache(str(tmp_path / "scan_cache.sqlite3")) as cache:
+        cache.store(SHA256, True, ["A", None, "B", None])
+        assert cache.lookup(SHA256, 4) == (True, ["A", None, "B", None])
+        assert cache.lookup(SHA256, 5) is None
+
+        # A scanner or locale change: the old scan is ignored and a new one stored next to it
+        old_version = scan_cache.SCANNER_VERSION
+        monkeypatch.setattr(scan_cache, "SCANNER_VERSION", old_version + "-changed")
+        assert cache.lookup(SHA256, 4) is None
+        cache.store(SHA256, False, ["A", "A", "B", "B"])
+        assert cache.lookup(SHA256, 4) == (False, ["A", "A", "B", "B"])
+
+        monkeypatch.setattr(scan_cache, "SCANNER_VERSION", old_version)
+        assert cache.lookup(SHA256, 4) == (True, ["A", None, "B", None])
@@ -0,0 +1,65 @@
+import time
+
+import fitz  # PyMuPDF
+import pytest
+
+from label_pdfs import label_pdf
+from split_service import ByteLRUCache, SplitService
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = SplitService(workers=1)
+    yield service
+    service.close()
+
+
+def test_shipping_id_is_part_of_the_job(service):
+    pdf_data = label_pdf(["A", "A", "B"]).tobytes()
+    job_aaa, plan_aaa = service.submit_shipment(pdf_data, shipping_id="AAA")
+    job_bbb, plan_bbb = service.submit_shipment(pdf_data, shipping_id="BBB")
+    assert job_aaa != job_bbb
+    assert all("_AAA_" in entry["file"] for entry in plan_aaa["files"])
+    assert all("_BBB_" in entry["file"] for entry in plan_bbb["files"])
+    assert service.submit_shipment(pdf_data, shipping_id="AAA")[0] == job_aaa
+
+
+def wait_for_cached(service, entries):
+    """The cache is filled by the generation's done callback, which may run just after get_file returns."""
+    deadline = time.monotonic() + 5
+    while service.cache.stats()["entries"] != entries and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return service.cache.stats()["entries"]
+
+
+def test_repeated_upload_and_download_are_served_from_the_job_and_cache(service):
+    pdf_data = label_pdf(["A", "B", "B"]).tobytes()
+    job_id, plan = service.submit_shipment(pdf_data, shipping_id="CACHE")
+    jobs = service.stats()["jobs"]
+    assert service.submit_shipment(pdf_data, shipping_id="CACHE") == (job_id, plan)
+    assert service.stats()["jobs"] == jobs
+
+    entries = service.cache.stats()["entries"]
+    file_b = next(entry["file"] for entry in plan["files"] if entry["sku"] == "B")
+    data = service.get_file(job_id, file_b)
+    assert fitz.open("pdf", data).page_count == 2
+    assert wait_for_cached(service, entries + 1) == entries + 1
+    hits = service.cache.stats()["hits"]
+    assert service.get_file(job_id, file_b) == data
+    assert service.cache.stats()["hits"] == hits + 1
+
+    # Deleting the shipment drops its cached PDFs
+    assert service.delete_shipment(job_id)
+    assert service.cache.stats()["entries"] == entries
+    assert service.get_file(job_id, file_b) is None
+
+
+def test_byte_lru_cache_evicts_least_recently_used_beyond_its_size():
+    cache = ByteLRUCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+    cache.put("too big", b"x" * 11)
+    assert (cache.get("a"), cache.get("b"), cache.get("c"), cache.get("too big")) == (b"aaaa", None, b"cccc", None)
+    assert cache.stats()["bytes"] == 8